@@ -1,3 +1,6 @@
 from .specimenMachine import SMBase, SMSettings, SMFontCollection, SMGlyphSorterQuery, SMGlyphSorter, SMTemplate, SMTemplateAllPages, SMDirector
+from .watcher import SMWatcher
+from .batch import SMBatch
+from .glyphGrid import SMGlyphGrid
 
-__all__ = ["SMBase", "SMSettings", "SMFontCollection", "SMGlyphSorterQuery", "SMGlyphSorter", "SMTemplate", "SMTemplateAllPages", "SMDirector"]
\ No newline at end of file
+__all__ = ["SMBase", "SMSettings", "SMFontCollection", "SMGlyphSorterQuery", "SMGlyphSorter", "SMTemplate", "SMTemplateAllPages", "SMDirector", "SMWatcher", "SMBatch", "SMGlyphGrid"]
\ No newline at end of file
@@ -0,0 +1,180 @@
+from .specimenMachine import SMBase
+from . import fontHelpers
+
+import concurrent.futures
+import traceback
+import importlib
+import argparse
+import datetime
+import pathlib
+import glob
+import json
+import time
+import os
+
+# ----------------------------------------
+# each worker process keeps a font pool for its whole life,
+# with the imports, fontspecs and hyperglot results already loaded
+# the next project starts warm.
+
+_worker_font_pool = None
+
+def _get_worker_font_pool(metadata_cache, font_memory_budget, lazy_fonts):
+    global _worker_font_pool
+    if _worker_font_pool is None:
+        _worker_font_pool = fontHelpers.FontPool(lazy=lazy_fonts, metadata_cache=metadata_cache, memory_budget=font_memory_budget)
+    return _worker_font_pool
+
+def _run_project(director_class, project_path, director_options, draw_options, pool_options):
+    font_pool = _get_worker_font_pool(**pool_options)
+    result = {"project": str(project_path), "pid": os.getpid()}
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        director = director_class(project_path, font_pool=font_pool, **director_options)
+        try:
+            saved = director.draw(**draw_options)
+        finally:
+            director.close()
+        result["status"] = "ok"
+        result["saved"] = [str(path) for path in saved]
+    except Exception:
+        result["status"] = "failed"
+        result["error"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+    result["cpu_seconds"] = time.process_time() - cpu_start
+    result["font_pool"] = font_pool.stats
+    return result
+
+# ----------------------------------------
+
+class SMBatch(SMBase):
+    """
+    draws many specimen projects with the same director class,
+    over a pool of worker processes (workers=1 draws them in this process).
+
+    workers are kept for the whole batch so the caches stay warm from one project to the next:
+    imports and fontspecs, hyperglot results, a font pool shared by the projects of a worker
+    (bounded by font_memory_budget, in bytes) and the persistent metadata cache
+    (metadata_cache is True for the default location, a path, or a FontMetadataCache).
+
+    the director class must be importable by the workers.
+    """
+
+    def __init__(self, director_class, projects, workers=1, metadata_cache=True, font_memory_budget=512*1024*1024, lazy_fonts=True, director_options=None, draw_options=None):
+        self.director_class = director_class
+        self.project_paths = self.expand_project_paths(projects)
+        self.workers = workers
+        if metadata_cache is True:
+            metadata_cache = fontHelpers.FontMetadataCache()
+        elif isinstance(metadata_cache, (str, pathlib.Path)):
+            metadata_cache = fontHelpers.FontMetadataCache(metadata_cache)
+        self.pool_options = {"metadata_cache": metadata_cache, "font_memory_budget": font_memory_budget, "lazy_fonts": lazy_fonts}
+        self.director_options = dict(metadata_cache=metadata_cache, lazy_fonts=lazy_fonts)
+        self.director_options.update(director_options or {})
+        self.draw_options = dict(draw_options or {})
+
+    @staticmethod
+    def expand_project_paths(projects):
+        """
+        project roots from paths and glob patterns, in order and without duplicates
+        """
+        if isinstance(projects, (str, pathlib.Path)):
+            projects = [projects]
+        paths = []
+        for project in projects:
+            project = str(project)
+            if glob.has_magic(project):
+                paths += sorted(pathlib.Path(p) for p in glob.glob(project) if pathlib.Path(p).is_dir())
+            else:
+                paths.append(pathlib.Path(project))
+        return list(dict.fromkeys(paths))
+
+    # ----------------------------------------
+
+    def run(self, report_path=None):
+        """
+        draw every project, returns the report (also saved as json at report_path)
+        """
+        started = datetime.datetime.now()
+        start = time.perf_counter()
+        args = (self.director_options, self.draw_options, self.pool_options)
+        total = len(self.project_paths)
+
+        results = {}
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        if workers <= 1:
+            for done, project_path in enumerate(self.project_paths, 1):
+                results[project_path] = _run_project(self.director_class, project_path, *args)
+                self._print_progress(done, total, results[project_path])
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, total) or 1) as pool:
+                futures = {pool.submit(_run_project, self.director_class, project_path, *args): project_path for project_path in self.project_paths}
+                for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                    project_path = futures[future]
+                    try:
+                        results[project_path] = future.result()
+                    except Exception:
+                        # the worker itself died
+                        results[project_path] = {"project": str(project_path), "status": "failed", "error": traceback.format_exc()}
+                    self._print_progress(done, total, results[project_path])
+
+        projects = [results[project_path] for project_path in self.project_paths]
+        report = {
+            "started": started.isoformat(timespec="seconds"),
+            "seconds": time.perf_counter() - start,
+            "workers": workers,
+            "director": f"{self.director_class.__module__}.{self.director_class.__qualname__}",
+            "succeeded": sum(1 for p in projects if p["status"] == "ok"),
+            "failed": sum(1 for p in projects if p["status"] != "ok"),
+            "projects": projects,
+            }
+        if report_path is not None:
+            with open(report_path, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+            print(f"-- saved report {report_path}")
+        print(self.format_summary(report))
+        return report
+
+    def _print_progress(self, done, total, result):
+        if result["status"] == "ok":
+            print(f"-- [{done}/{total}] {result['project']} in {result['seconds']:.2f}s")
+        else:
+            print(f"-- [{done}/{total}] failed {result['project']}\n{result['error']}")
+
+    @staticmethod
+    def format_summary(report):
+        projects = report["projects"]
+        width = max([len(p["project"]) for p in projects] + [7])
+        lines = [f"{'project'.ljust(width)}  status  seconds"]
+        for p in sorted(projects, key=lambda p: -p.get("seconds", 0)):
+            lines.append(f"{p['project'].ljust(width)}  {p['status']:6}  {p.get('seconds', 0):7.2f}")
+        lines.append(f"{report['succeeded']} succeeded, {report['failed']} failed in {report['seconds']:.2f}s")
+        return "\n".join(lines)
+
+# ----------------------------------------
+
+def import_director_class(name):
+    """
+    a director class from "package.module:ClassName"
+    """
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="draw many specimen projects with the same director")
+    parser.add_argument("director", help="the director class, as package.module:ClassName")
+    parser.add_argument("projects", nargs="+", help="project roots or glob patterns")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, 0 for one per cpu")
+    parser.add_argument("--report", type=pathlib.Path, default=None, help="save the report as json")
+    parser.add_argument("--incremental", action="store_true", help="reuse the cached pages of unchanged templates")
+    args = parser.parse_args(args)
+
+    batch = SMBatch(import_director_class(args.director), args.projects,
+                    workers=args.workers or None,
+                    draw_options={"incremental": args.incremental})
+    report = batch.run(report_path=args.report)
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,46 @@
+import shutil
+
+import pytest
+
+from SpecimenMachine import batch, fontHelpers, SMDirector
+
+# ----------------------------------------
+
+class Director(SMDirector):
+    defaults = [{"template": "fonts"}]
+
+@pytest.fixture
+def projects_dir(tmp_path, family_dir, monkeypatch):
+    """
+    tmp_path/projects with two projects, and a third one with a broken font
+    """
+    monkeypatch.setattr(batch, "_worker_font_pool", None)
+    path = tmp_path / "projects"
+    for name in ["a", "b", "broken"]:
+        (path / name).mkdir(parents=True)
+    for font_path in fontHelpers.walk_font_dir(family_dir):
+        shutil.copy(font_path, path / "a")
+        shutil.copy(font_path, path / "b")
+    (path / "broken" / "Broken-Regular.ttf").write_bytes(b"not a font")
+    # a file matching the pattern is not a project
+    (path / "notes.txt").write_text("")
+    return path
+
+def test_relative_patterns_expand_to_project_dirs(projects_dir, monkeypatch):
+    monkeypatch.chdir(projects_dir.parent)
+    paths = batch.SMBatch.expand_project_paths(["projects/*", "projects/a"])
+    assert [str(p) for p in paths] == ["projects/a", "projects/b", "projects/broken"]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failing_projects_do_not_stop_the_batch(projects_dir, cache_dir, monkeypatch, workers):
+    monkeypatch.chdir(projects_dir.parent)
+    sm_batch = batch.SMBatch(Director, "projects/*", workers=workers, metadata_cache=cache_dir / "metadata.sqlite",
+                             director_options={"render_backend": "recording"})
+    report = sm_batch.run(report_path=projects_dir.parent / "report.json")
+    statuses = {p["project"]: p["status"] for p in report["projects"]}
+    assert statuses == {"projects/a": "ok", "projects/b": "ok", "projects/broken": "failed"}
+    assert (report["succeeded"], report["failed"]) == (2, 1)
+    for project in report["projects"]:
+        if project["status"] == "ok":
+            assert len(project["saved"]) == 1
+    assert (projects_dir.parent / "report.json").exists()
@@ -0,0 +1,110 @@
+"""
+pytest fixtures: synthetic fonts built with the benchmark fixtures (see benchmarks/fixtures.py),
+and caches kept in the test temporary directory.
+"""
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+import pytest
+
+from benchmarks import fixtures
+
+from SpecimenMachine import fontHelpers
+
+# ----------------------------------------
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # outlines, instances and metadata never go to the user cache
+    path = tmp_path / "cache"
+    monkeypatch.setenv(fontHelpers.metadataCache.CACHE_DIR_ENVIRON_KEY, str(path))
+    return path
+
+@pytest.fixture
+def metadata_cache(cache_dir):
+    cache = fontHelpers.FontMetadataCache(cache_dir / "metadata.sqlite")
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def font_path(tmp_path):
+    """
+    a font with GSUB/GPOS features for DFLT, latn and latn/TRK
+    """
+    return fixtures.build_font(tmp_path / "Bench-Regular.ttf", glyph_count=120)
+
+@pytest.fixture
+def make_font(tmp_path):
+    """
+    builds tmp_path/file_name from a glyph order, a cmap and optional feature code
+    """
+    def make_font(file_name, glyph_order, cmap, features=None, family="Test", style="Regular", weight=400):
+        fb = FontBuilder(1000, isTTF=True)
+        fb.setupGlyphOrder(glyph_order)
+        fb.setupCharacterMap(cmap)
+        pen = TTGlyphPen(None)
+        pen.moveTo((50, 0))
+        pen.lineTo((50, 700))
+        pen.lineTo((550, 700))
+        pen.closePath()
+        triangle = pen.glyph()
+        fb.setupGlyf({name: triangle for name in glyph_order})
+        fb.setupHorizontalMetrics({name: (600, 50) for name in glyph_order})
+        fb.setupHorizontalHeader(ascent=800, descent=-200)
+        fb.setupNameTable({"familyName": family, "styleName": style, "typographicFamily": family, "typographicSubfamily": style, "psName": f"{family}-{style}"})
+        fb.setupOS2(usWeightClass=weight)
+        fb.setupPost()
+        if features:
+            fb.addOpenTypeFeatures(features)
+        path = tmp_path / file_name
+        fb.save(str(path))
+        return path
+    return make_font
+
+VARIABLE_AXES = [("wght", 100, 400, 900, "Weight"), ("wdth", 75, 100, 100, "Width")]
+VARIABLE_NAMED_INSTANCES = [("Thin", {"wght": 100, "wdth": 100}), ("Regular", {"wght": 400, "wdth": 100}), ("Black Condensed", {"wght": 900, "wdth": 75})]
+
+@pytest.fixture
+def variable_font_path(tmp_path):
+    """
+    a wght/wdth variable font with named instances, without any deltas
+    """
+    glyph_order = [".notdef", "space", "A"]
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(glyph_order)
+    fb.setupCharacterMap({0x20: "space", 0x41: "A"})
+    pen = TTGlyphPen(None)
+    pen.moveTo((50, 0))
+    pen.lineTo((50, 700))
+    pen.lineTo((550, 700))
+    pen.closePath()
+    fb.setupGlyf({name: pen.glyph() for name in glyph_order})
+    fb.setupHorizontalMetrics({name: (600, 50) for name in glyph_order})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({"familyName": "Varia", "styleName": "Regular"})
+    fb.setupOS2()
+    fb.setupPost()
+    fb.setupFvar(VARIABLE_AXES, [{"stylename": style, "location": location} for style, location in VARIABLE_NAMED_INSTANCES])
+    fb.setupGvar({})
+    path = tmp_path / "Varia[wght,wdth].ttf"
+    fb.save(str(path))
+    return path
+
+@pytest.fixture
+def family_dir(tmp_path):
+    return fixtures.build_family(tmp_path / "family", style_count=4, glyph_count=80)
+
+@pytest.fixture
+def count_opened_fonts(monkeypatch):
+    """
+    a list collecting the path of every FontWrapper opened from now on
+    """
+    opened = []
+    original_open = fontHelpers.FontWrapper._open
+
+    def _open(self):
+        opened.append(self.path)
+        original_open(self)
+
+    monkeypatch.setattr(fontHelpers.FontWrapper, "_open", _open)
+    return opened
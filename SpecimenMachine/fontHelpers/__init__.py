@@ -1,3 +1,7 @@
-from .fontHelpers import load_font_dir, load_font_list, load_fonts_from_paths, walk_font_dir, HyperglotAssistant, CatGlyph, FontWrapper
+from .fontHelpers import load_font_dir, load_font_list, load_fonts_from_paths, walk_font_dir, HyperglotAssistant, CatGlyph, CatGlyphView, GlyphTable, FontWrapper
+from .metadataCache import FontMetadataCache
+from .fontPool import FontPool
+from .glyphOutlines import GlyphOutline, GlyphOutlineStore
+from .variableFonts import VariableFontInstancer
 
-__all__ = [load_font_dir, load_font_list, load_fonts_from_paths, walk_font_dir, HyperglotAssistant, CatGlyph, FontWrapper]
\ No newline at end of file
+__all__ = [load_font_dir, load_font_list, load_fonts_from_paths, walk_font_dir, HyperglotAssistant, CatGlyph, CatGlyphView, GlyphTable, FontWrapper, FontMetadataCache, FontPool, GlyphOutline, GlyphOutlineStore, VariableFontInstancer]
\ No newline at end of file
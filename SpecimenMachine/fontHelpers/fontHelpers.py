@@ -1,15 +1,29 @@
 from fontTools.ttLib import TTFont
+from fontTools.ttLib.sfnt import readTTCHeader
 
 import yaml
 import pathlib
 import datetime
-import time
 import unicodedata
-
-# import hyperglot.parse
-# import hyperglot.languages
-# import hyperglot.main
-import hyperglot.checker
+import os
+import mmap
+import functools
+import array
+import weakref
+import threading
+import hashlib
+import pickle
+import io
+import importlib.metadata
+import concurrent.futures
+
+from .metadataCache import get_cache_dir, get_file_identity, split_font_number, FONT_NUMBER_SEPARATOR
+from . import layoutTables
+from . import unicodeBlocks
+from .glyphOutlines import GlyphOutlineStore
+from .. import tracing
+
+# hyperglot is slow to import, it is only imported when checking language support
 
 # ----------------------------------------
 
@@ -30,108 +44,386 @@ HEAD_TABLE_MACSTYLE_PATH = "fontspecs/os2_table_fsselection.yaml"
 UNICODE_BLOCS_PATH = "fontspecs/unicode_blocs.txt"
 FEATURE_DESCRIPTIONS_PATH = "fontspecs/feature_descriptions.yaml"
 
+# bump when the cached spec format changes
+FONTSPECS_CACHE_VERSION = 1
+
+SPEC_PATHS = {
+    "name_specs": NAME_TABLE_DESCRIPTION_PATH,
+    "os2_width_specs": OS2_TABLE_WIDTH_PATH,
+    "os2_weight_specs": OS2_TABLE_WEIGHT_PATH,
+    "os2_fsSelection_specs": OS2_TABLE_FSSELECTION_PATH,
+    "os2_panose_specs": OS2_TABLE_PANOSE_PATH,
+    "head_macstyle_specs": HEAD_TABLE_MACSTYLE_PATH,
+    "feature_descriptions": FEATURE_DESCRIPTIONS_PATH,
+    "unicode_blocks": UNICODE_BLOCS_PATH,
+}
+
+# specs that are not yaml files
+SPEC_LOADERS = {
+    "unicode_blocks": lambda path: unicodeBlocks.parse_blocks_file(pathlib.Path(__file__).parent / path),
+}
+
+_specs = {}
+
 def load_yaml_from_path(path):
     p = pathlib.Path(__file__).parent / path
     with open(p, "r") as file:
-        return yaml.safe_load(file)
+        return yaml.load(file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
 
-name_specs = load_yaml_from_path(NAME_TABLE_DESCRIPTION_PATH)
-os2_width_specs = load_yaml_from_path(OS2_TABLE_WIDTH_PATH)
-os2_weight_specs = load_yaml_from_path(OS2_TABLE_WEIGHT_PATH)
-os2_fsSelection_specs = load_yaml_from_path(OS2_TABLE_FSSELECTION_PATH)
-os2_panose_specs = load_yaml_from_path(OS2_TABLE_PANOSE_PATH)
-head_macstyle_specs = load_yaml_from_path(HEAD_TABLE_MACSTYLE_PATH)
-feature_descriptions = load_yaml_from_path(FEATURE_DESCRIPTIONS_PATH)
+def load_spec_from_path(path, loader=load_yaml_from_path):
+    """
+    a spec file parsed by loader, served from a pickled copy in the cache directory
+    that is regenerated whenever the spec file changes
+    """
+    source = pathlib.Path(__file__).parent / path
+    stat = source.stat()
+    source_identity = (FONTSPECS_CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+    cache_path = get_cache_dir() / "fontspecs" / f"{source.stem}.pickle"
+    try:
+        with open(cache_path, "rb") as cache_file:
+            identity, data = pickle.load(cache_file)
+        if identity == source_identity:
+            return data
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    data = loader(path)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump((source_identity, data), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # the cache is only an optimisation
+        pass
+    return data
+
+def get_spec(name):
+    if name not in _specs:
+        loader = SPEC_LOADERS.get(name, load_yaml_from_path)
+        _specs[name] = load_spec_from_path(SPEC_PATHS[name], loader=loader)
+    return _specs[name]
+
+@functools.lru_cache()
+def get_unicode_block_index():
+    return unicodeBlocks.UnicodeBlockIndex(get_spec("unicode_blocks"))
+
+def __getattr__(name):
+    # spec tables (name_specs, feature_descriptions...) are loaded on first access
+    if name in SPEC_PATHS:
+        return get_spec(name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 # ----------------------------------------
 
-def load_font_dir(path, sort=True):
+def load_font_dir(path, sort=True, workers=1, lazy=False, metadata_cache=None):
     font_paths = walk_font_dir(path)
-    return load_fonts_from_paths(font_paths, sort=sort)
+    return load_fonts_from_paths(font_paths, sort=sort, workers=workers, lazy=lazy, metadata_cache=metadata_cache)
 
-def load_font_list(list_of_path, sort=False):
+def load_font_list(list_of_path, sort=False, workers=1, lazy=False, metadata_cache=None):
     font_paths = []
     for p in list_of_path:
         p = pathlib.Path(p)
         font_paths += walk_font_dir(p)
-    return load_fonts_from_paths(font_paths, sort=sort)
-    return fonts
+    return load_fonts_from_paths(font_paths, sort=sort, workers=workers, lazy=lazy, metadata_cache=metadata_cache)
+
+@tracing.traced("fonts.load", "fonts")
+def load_fonts_from_paths(list_of_paths, sort=True, workers=1, executor="process", lazy=False, metadata_cache=None):
+    """
+    workers > 1 parses the fonts and extracts their sorting score in a pool,
+    workers=None uses one worker per cpu.
+    executor is either "process" or "thread".
+    the returned list order is the same as the serial one.
+    lazy is passed to FontWrapper.
+
+    with a FontMetadataCache, fonts found in the cache are not opened at all,
+    the others are stored in the cache once parsed.
+    """
+    list_of_paths = list(list_of_paths)
+
+    fonts = [None] * len(list_of_paths)
+    to_parse = []
+    for i, p in enumerate(list_of_paths):
+        metadata = None
+        if metadata_cache is not None:
+            metadata = metadata_cache.get_font_metadata(p, namespace=FontWrapper.METADATA_NAMESPACE)
+        if metadata is not None:
+            fonts[i] = FontWrapper(p, lazy=lazy, metadata=FontWrapper.decode_metadata(metadata), metadata_cache=metadata_cache)
+        else:
+            to_parse.append(i)
+
+    # the full metadata is only worth extracting when it can be stored
+    if metadata_cache is not None:
+        metadata_keys = FontWrapper.METADATA_KEYS
+    else:
+        metadata_keys = ["sorting_score"]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(to_parse))
+
+    if workers <= 1:
+        for i in to_parse:
+            fonts[i] = FontWrapper(list_of_paths[i], lazy=lazy)
+    elif executor == "thread":
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            parsed = pool.map(lambda i: _load_font_with_metadata(list_of_paths[i], metadata_keys, lazy=lazy), to_parse)
+            for i, font in zip(to_parse, parsed):
+                fonts[i] = font
+    elif executor == "process":
+        # only the metadata travels back from the workers,
+        # tables are read again on demand in this process
+        chunksize = max(1, len(to_parse) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = pool.map(_get_font_metadata, [list_of_paths[i] for i in to_parse], [metadata_keys] * len(to_parse), chunksize=chunksize)
+            for i, metadata in zip(to_parse, parsed):
+                fonts[i] = FontWrapper(list_of_paths[i], lazy=lazy, metadata=FontWrapper.decode_metadata(metadata))
+    else:
+        raise ValueError(f"unknown executor '{executor}', expected 'process' or 'thread'")
+
+    if metadata_cache is not None:
+        for i in to_parse:
+            fonts[i].metadata_cache = metadata_cache
+            metadata_cache.set_font_metadata(list_of_paths[i], fonts[i].export_metadata(), namespace=FontWrapper.METADATA_NAMESPACE)
 
-def load_fonts_from_paths(list_of_paths, sort=True):
-    fonts = [FontWrapper(p) for p in list_of_paths]
     if sort:
         fonts = sorted(fonts, key=lambda f: f.get_sorting_score())
     return fonts
 
+def _load_font_with_metadata(path, metadata_keys, lazy=False):
+    font = FontWrapper(path, lazy=lazy)
+    font.export_metadata(metadata_keys)
+    return font
+
+def _get_font_metadata(path, metadata_keys):
+    font = FontWrapper(path, lazy=True)
+    metadata = font.export_metadata(metadata_keys)
+    font.close()
+    return metadata
+
 
+FONT_FILE_TYPES = [".otf", ".ttf", ".woff", ".woff2", ".ttc", ".otc"]
+FONT_COLLECTION_FILE_TYPES = [".ttc", ".otc"]
+
+@tracing.traced("fonts.walk", "fonts")
 def walk_font_dir(path):
-    file_types = [".otf", ".ttf", ".woff", ".woff2"]
+    """
+    the font paths of a directory or a font file,
+    font collections are expanded into a path per face (see split_font_number)
+    """
+    file_types = FONT_FILE_TYPES
     path = pathlib.Path(path)
+    file_path, font_number = split_font_number(path)
+    if font_number is not None:
+        if not file_path.is_file():
+            raise FileNotFoundError(f"'{file_path}' does not exist")
+        return [path]
     if not path.exists():
         raise FileNotFoundError(f"'{path}' does not exist")
         return []
     if path.is_dir():
         fonts = []
         for ext in file_types:
-            fonts += path.glob("*" + ext)
+            for font_path in path.glob("*" + ext):
+                fonts += get_font_face_paths(font_path)
         return fonts
     if path.is_file():
         assert path.suffix in file_types, f"{path.name} is not a font file"
+        return get_font_face_paths(path)
+
+def get_font_face_paths(path):
+    """
+    a path per face of a font collection, [path] for any other font file
+    """
+    if path.suffix not in FONT_COLLECTION_FILE_TYPES:
         return [path]
+    with open(path, "rb") as font_file:
+        face_count = readTTCHeader(font_file).numFonts
+    return [path.with_name(f"{path.name}{FONT_NUMBER_SEPARATOR}{i}") for i in range(face_count)]
 
 # ----------------------------------------
 
 class HyperglotAssistant:
+    """
+    language support is computed from the set of mapped codepoints,
+    so fonts sharing a character set share one result.
+    results keep every supported language with its speaker count,
+    they are memoized in memory and, given a FontMetadataCache, on disk.
+    """
 
-    def __init__(self):
-        t = time.time()
-        strict_iso = False
-        # self.langs = hyperglot.languages.Languages(strict=strict_iso)
-        # print(f"loaded langs in {time.time()-t} sec")
-
-    def collect_language_support(self, font_path, speaker_threshold=0):
-        support = "base"
-        decomposed = False
-        marks = False
-        validity = "draft"
-        include_all_orthographies = False
-        include_historical = False
-        include_constructed = False
-
-        t = time.time()
-        # chars = hyperglot.parse.parse_font_chars(font_path)
-        # # print(f"parsed font chars in {time.time()-t} sec")
-        hg_check = hyperglot.checker.FontChecker(font_path)
-        t = time.time()
-        # supported = self.langs.supported(chars, support, validity,
-        #                             decomposed, marks,
-        #                             include_all_orthographies,
-        #                             include_historical,
-        #                             include_constructed)
-        # print(f"identified supported langs in {time.time()-t} sec")
-        supported = hg_check.get_supported_languages()
+    # full language support shared by every assistant, keyed by character set
+    _support_cache = {}
+
+    def __init__(self, metadata_cache=None):
+        self.metadata_cache = metadata_cache
+
+    @staticmethod
+    def get_charset_key(codepoints):
+        data = ",".join(str(c) for c in sorted(codepoints))
+        return hashlib.sha1(data.encode("ascii")).hexdigest()
+
+    def collect_language_support(self, font_path, speaker_threshold=0, codepoints=None):
+        if codepoints is None:
+            file_path, font_number = split_font_number(font_path)
+            font = TTFont(file_path, lazy=True, fontNumber=-1 if font_number is None else font_number)
+            codepoints = font["cmap"].getBestCmap().keys()
+            font.close()
+        full_support = self.collect_full_language_support(codepoints)
+        return self.filter_language_support(full_support, speaker_threshold=speaker_threshold)
+
+    @tracing.traced("hyperglot.collect", "hyperglot")
+    def collect_full_language_support(self, codepoints):
+        """
+        {script: [(language name, iso, speakers), ...]} for a set of codepoints
+        """
+        key = self.get_charset_key(codepoints)
+        support = self.get_cached_full_language_support(key)
+        if support is None:
+            support = self.store_full_language_support(key, _check_language_support(codepoints))
+        return support
+
+    @tracing.traced("hyperglot.collect_for_fonts", "hyperglot")
+    def collect_full_language_support_for_fonts(self, fonts, workers=1):
+        """
+        full language support for each font, in order.
+        fonts sharing a character set are checked once,
+        unknown character sets are checked in a process pool when workers > 1
+        """
+        keys = []
+        unique_codepoints = {}
+        for font in fonts:
+            key = self.get_charset_key(font.unicodes)
+            keys.append(key)
+            unique_codepoints.setdefault(key, font.unicodes)
+
+        supports = {}
+        to_check = []
+        for key in unique_codepoints:
+            supports[key] = self.get_cached_full_language_support(key)
+            if supports[key] is None:
+                to_check.append(key)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(to_check))
+        if workers <= 1:
+            checked = map(_check_language_support, [unique_codepoints[k] for k in to_check])
+            for key, support in zip(to_check, checked):
+                supports[key] = self.store_full_language_support(key, support)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                checked = pool.map(_check_language_support, [sorted(unique_codepoints[k]) for k in to_check])
+                for key, support in zip(to_check, checked):
+                    supports[key] = self.store_full_language_support(key, support)
+
+        return [supports[key] for key in keys]
+
+    def get_cached_full_language_support(self, key):
+        if key in self._support_cache:
+            return self._support_cache[key]
+        if self.metadata_cache is not None:
+            support = self.metadata_cache.get_value(_get_hyperglot_cache_namespace(), key)
+            if support is not None:
+                return self._remember_full_language_support(key, support)
+        return None
+
+    def store_full_language_support(self, key, support):
+        if self.metadata_cache is not None:
+            self.metadata_cache.set_value(_get_hyperglot_cache_namespace(), key, support)
+        return self._remember_full_language_support(key, support)
+
+    def _remember_full_language_support(self, key, support):
+        support = {script: [tuple(lang) for lang in langs] for script, langs in support.items()}
+        self._support_cache[key] = support
+        return support
+
+    def filter_language_support(self, full_support, speaker_threshold=0):
         out = {}
-        for script, langs in supported.items():
-            # out[script] = [f"{lang.get_name()} ({iso})" for iso, lang in langs.items()]
-            out[script] = [f"{lang.get_name()}" for iso, lang in langs.items() if lang.get("speakers", 0)>=speaker_threshold]
+        for script, langs in full_support.items():
+            out[script] = [name for name, iso, speakers in langs if speakers >= speaker_threshold]
         return out
 
+@tracing.traced("hyperglot.check", "hyperglot")
+def _check_language_support(codepoints):
+    import hyperglot.checker
+
+    # only the character set is checked, as hyperglot.languages.Languages.supported used to
+    hg_check = hyperglot.checker.CharsetChecker([chr(c) for c in codepoints])
+    supported = hg_check.get_supported_languages()
+    out = {}
+    for script, langs in supported.items():
+        out[script] = [[lang.get_name(), iso, _get_speaker_count(lang)] for iso, lang in langs.items()]
+    return out
+
+def _get_speaker_count(lang):
+    try:
+        return int(lang.get("speakers", 0))
+    except (TypeError, ValueError):
+        return 0
+
+@functools.lru_cache()
+def _get_hyperglot_cache_namespace():
+    # the language database changes with hyperglot releases
+    try:
+        version = importlib.metadata.version("hyperglot")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"hyperglot-{version}-v1"
+
+# ----------------------------------------
+
+SUFFIX_CATEGORIES = {
+    "smcp": ["smcp", "sc", "small"],
+    "numr": ["numr", "numerator"],
+    "dnom": ["dnom", "dnominator"],
+    "sups": ["sup", "sups", "superior", "superiors"],
+    "sinf": ["sinf", "inf", "inferior", "infs"],
+    "onum.tnum": ["ot", "OT", "onum.tnum", "tnum.onum", "tosf"],
+    "onum.pnum": ["op", "OP", "onum.pnum", "pnum.onum", "osf"],
+    "lnum.tnum": ["lt", "LT", "lnum.tnum", "tnum.lnum", "tf"],
+    "lnum.pnum": ["lf", "Lf", "lnum.pnum", "tnum.pnum", "lf"],
+    "case": ["case", "cap"]
+} 
+
+# glyph name parsing is memoized for the whole process,
+# sibling fonts repeat the same glyph names
+
+@functools.lru_cache(maxsize=None)
+def parse_glyph_name(name, sep="."):
+    """
+    (root, suffix) of a glyph name, the root being everything before the first separator
+    suffix is a tuple of the remaining parts, or None
+    """
+    parts = name.split(sep)
+    if len(parts) == 1:
+        return name, None
+    return parts[0], tuple(parts[1:])
+
+@functools.lru_cache(maxsize=None)
+def get_suffix_category(suffix):
+    if suffix:
+        for s in suffix:
+            for cat, suffixes in SUFFIX_CATEGORIES.items():
+                if s in suffixes:
+                    return cat
+
+@functools.lru_cache(maxsize=None)
+def get_unicode_category(unicode):
+    if unicode:
+        return unicodedata.category(chr(unicode))
+
+@functools.lru_cache(maxsize=None)
+def is_composed_unicode(unicode):
+    if unicode:
+        return unicodedata.decomposition(chr(unicode)) != ""
+    return False
+
 # ----------------------------------------
 
 class CatGlyph():
 
-    SUFFIX_CATEGORIES = {
-        "smcp": ["smcp", "sc", "small"],
-        "numr": ["numr", "numerator"],
-        "dnom": ["dnom", "dnominator"],
-        "sups": ["sup", "sups", "superior", "superiors"],
-        "sinf": ["sinf", "inf", "inferior", "infs"],
-        "onum.tnum": ["ot", "OT", "onum.tnum", "tnum.onum", "tosf"],
-        "onum.pnum": ["op", "OP", "onum.pnum", "pnum.onum", "osf"],
-        "lnum.tnum": ["lt", "LT", "lnum.tnum", "tnum.lnum", "tf"],
-        "lnum.pnum": ["lf", "Lf", "lnum.pnum", "tnum.pnum", "lf"],
-        "case": ["case", "cap"]
-    } 
+    SUFFIX_CATEGORIES = SUFFIX_CATEGORIES
 
     def __init__(self, name, font):
         self.name = name
@@ -146,45 +438,307 @@ class CatGlyph():
             self.unicode = list(unicode)[0]
         else:
             self.unicode = None
-        for root, suffix in self._root_suffix_find(self.name):
-            pseudo_unicode = self.font.rcmap.get(root, None)
-            if pseudo_unicode:
-                self.pseudo_unicode = list(pseudo_unicode)[0]
-            else:
-                self.pseudo_unicode = None
-            self.suffix = suffix
-            self.root = root
-
-    def _root_suffix_find(self, name, sep="."):
-        parts = name.split(sep)
-        roots_suffixes = [(sep.join(parts), None)]
-        for i in range(1, len(parts)):
-            roots_suffixes.append((sep.join(parts[:-i]), parts[-i:]))    
-        return roots_suffixes
-            
+        root, suffix = parse_glyph_name(self.name)
+        pseudo_unicode = self.font.rcmap.get(root, None)
+        if pseudo_unicode:
+            self.pseudo_unicode = list(pseudo_unicode)[0]
+        else:
+            self.pseudo_unicode = None
+        self.suffix = list(suffix) if suffix else None
+        self.root = root
 
     @property
     def unicode_category(self):
-        if self.pseudo_unicode:
-            return unicodedata.category(chr(self.pseudo_unicode))
+        return get_unicode_category(self.pseudo_unicode)
     
     @property
     def suffix_category(self):
         if self.suffix:
-            for s in self.suffix:
-                for cat, suffixes in self.SUFFIX_CATEGORIES.items():
-                    if s in suffixes:
-                        return cat
+            return get_suffix_category(tuple(self.suffix))
 
     @property
     def is_composed_character(self):
-        if self.pseudo_unicode:
-            return unicodedata.decomposition(chr(self.pseudo_unicode)) != ""
-        else:
-            return False
+        return is_composed_unicode(self.pseudo_unicode)
+
+
+class GlyphTable():
+    """
+    the CatGlyph attributes of every glyph of a font, stored as parallel arrays.
+    unicodes are stored as -1 when missing.
+    rows are reachable as lightweight CatGlyphView objects.
+    """
+
+    __slots__ = ["names", "unicodes", "pseudo_unicodes", "roots", "suffixes",
+                 "suffix_categories", "unicode_categories", "composed", "_rows"]
+
+    NO_UNICODE = -1
+
+    def __init__(self, glyph_order, rcmap):
+        self.names = list(glyph_order)
+        self.unicodes = array.array("l")
+        self.pseudo_unicodes = array.array("l")
+        self.roots = []
+        self.suffixes = []
+        self.suffix_categories = []
+        self.unicode_categories = []
+        self.composed = bytearray()
+
+        first_unicodes = {name: list(unicodes)[0] for name, unicodes in rcmap.items() if unicodes}
+        for name in self.names:
+            root, suffix = parse_glyph_name(name)
+            pseudo_unicode = first_unicodes.get(root)
+            self.unicodes.append(first_unicodes.get(name, self.NO_UNICODE))
+            self.pseudo_unicodes.append(self.NO_UNICODE if pseudo_unicode is None else pseudo_unicode)
+            self.roots.append(root)
+            self.suffixes.append(suffix)
+            self.suffix_categories.append(get_suffix_category(suffix))
+            self.unicode_categories.append(get_unicode_category(pseudo_unicode))
+            self.composed.append(is_composed_unicode(pseudo_unicode))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, row):
+        return CatGlyphView(self, row)
+
+    def __iter__(self):
+        return (CatGlyphView(self, row) for row in range(len(self.names)))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self)} glyphs>"
+
+    def row_of(self, name):
+        if not hasattr(self, "_rows"):
+            self._rows = {name: row for row, name in enumerate(self.names)}
+        return self._rows[name]
+
+    def column(self, attribute):
+        """
+        the values of a CatGlyph attribute for every glyph, as a list
+        """
+        if attribute == "name":
+            return list(self.names)
+        if attribute in ("unicode", "pseudo_unicode"):
+            values = self.unicodes if attribute == "unicode" else self.pseudo_unicodes
+            return [None if v == self.NO_UNICODE else v for v in values]
+        if attribute == "root":
+            return list(self.roots)
+        if attribute == "suffix":
+            return [list(s) if s else None for s in self.suffixes]
+        if attribute == "suffix_category":
+            return list(self.suffix_categories)
+        if attribute == "unicode_category":
+            return list(self.unicode_categories)
+        if attribute == "is_composed_character":
+            return [bool(c) for c in self.composed]
+        return [getattr(glyph, attribute) for glyph in self]
+
+
+class CatGlyphView():
+    """
+    a CatGlyph like view on a GlyphTable row
+    """
+
+    __slots__ = ["table", "row", "font"]
+
+    def __init__(self, table, row, font=None):
+        self.table = table
+        self.row = row
+        self.font = font
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.name}>"
+
+    @property
+    def name(self):
+        return self.table.names[self.row]
+
+    @property
+    def unicode(self):
+        unicode = self.table.unicodes[self.row]
+        return None if unicode == GlyphTable.NO_UNICODE else unicode
+
+    @property
+    def pseudo_unicode(self):
+        unicode = self.table.pseudo_unicodes[self.row]
+        return None if unicode == GlyphTable.NO_UNICODE else unicode
 
+    @property
+    def root(self):
+        return self.table.roots[self.row]
+
+    @property
+    def suffix(self):
+        suffix = self.table.suffixes[self.row]
+        return list(suffix) if suffix else None
+
+    @property
+    def unicode_category(self):
+        return self.table.unicode_categories[self.row]
+
+    @property
+    def suffix_category(self):
+        return self.table.suffix_categories[self.row]
+
+    @property
+    def is_composed_character(self):
+        return bool(self.table.composed[self.row])
 
 
+class GlyphSetAnalysis():
+    """
+    glyph and cmap analysis shared by every font with the same glyph order and cmap,
+    sibling styles of a family usually share one.
+    analyses live as long as a font uses them.
+    """
+
+    _analyses = weakref.WeakValueDictionary()
+
+    def __init__(self, key, glyph_order, rcmap):
+        self.key = key
+        self.rcmap = rcmap
+        self.glyph_table = GlyphTable(glyph_order, rcmap)
+        self.unicodes = frozenset().union(*rcmap.values())
+        # categorisations by sorter signature, see SMGlyphSorter
+        self.categories = {}
+
+    @property
+    def unicode_block_counts(self):
+        if not hasattr(self, "_unicode_block_counts"):
+            self._unicode_block_counts = get_unicode_block_index().count_codepoints(self.unicodes)
+        return self._unicode_block_counts
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.key[:8]}>"
+
+    @classmethod
+    def for_font(cls, font):
+        key = font.glyph_set_key
+        analysis = cls._analyses.get(key)
+        if analysis is None:
+            rcmap = font._metadata.get("rcmap")
+            if rcmap is None:
+                rcmap = font.cmap.buildReversed()
+            analysis = cls(key, font.glyph_order, rcmap)
+            cls._analyses[key] = analysis
+        return analysis
+
+
+# ----------------------------------------
+
+LAYOUT_TABLE_TAGS = ["GSUB", "GPOS"]
+
+# attributes set by TTFont.__init__, accessing them opens a font created from cached metadata
+_TTFONT_ATTRIBUTES = set(vars(TTFont())) | {"_tableCache", "_reverseGlyphOrderDict", "glyphOrder"}
+
+def metadata_property(func):
+    """
+    a cached property whose value is part of the font metadata,
+    it can be provided by a metadata cache without opening the font
+    """
+    key = func.__name__
+
+    @property
+    @functools.wraps(func)
+    def wrapper(self):
+        if key not in self._metadata:
+            self._metadata[key] = func(self)
+        return self._metadata[key]
+    return wrapper
+
+# ----------------------------------------
+
+class SharedDataFile(io.RawIOBase):
+    """
+    a read-only file over data shared with other files (bytes or a memory map), with its own position.
+    closing it leaves the data alone.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            position += self.position
+        elif whence == io.SEEK_END:
+            position += len(self.data)
+        self.position = position
+        return position
+
+    def tell(self):
+        return self.position
+
+    def read(self, size=-1):
+        end = len(self.data) if size is None or size < 0 else min(self.position + size, len(self.data))
+        data = self.data[self.position:end]
+        self.position = max(self.position, end)
+        return data
+
+
+# tables keeping a state for the font reading them (post hands the glyph order once), never shared
+UNSHARED_TABLE_TAGS = ["post"]
+
+class SharedTableCache(dict):
+    """
+    decompiled tables shared by the faces of a font collection, keyed by (tag, table data)
+    """
+
+    def get(self, key, default=None):
+        if key[0] in UNSHARED_TABLE_TAGS:
+            return default
+        return super().get(key, default)
+
+    def __setitem__(self, key, table):
+        if key[0] not in UNSHARED_TABLE_TAGS:
+            super().__setitem__(key, table)
+
+
+class FontCollectionFile():
+    """
+    the data of a font collection file, shared by the FontWrappers of its faces:
+    the file is read (or memory-mapped) once, and tables stored once in the file
+    are decompiled once for all the faces using them (see TTFont _tableCache).
+    it goes away with the last face using it.
+    """
+
+    _files = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __init__(self, path, lazy=False):
+        self.path = path
+        self.lazy = lazy
+        with open(path, "rb") as font_file:
+            if lazy:
+                self.data = mmap.mmap(font_file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = font_file.read()
+        self.table_cache = SharedTableCache()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.path.name} {len(self.table_cache)} shared tables>"
+
+    @classmethod
+    def for_path(cls, path, lazy=False):
+        key = (get_file_identity(path), lazy)
+        with cls._lock:
+            collection_file = cls._files.get(key)
+            if collection_file is None:
+                collection_file = cls._files[key] = cls(path, lazy=lazy)
+        return collection_file
+
+    def get_file(self):
+        return SharedDataFile(self.data)
+
+    def release_table(self, table):
+        for key in [key for key, cached in self.table_cache.items() if cached is table]:
+            del self.table_cache[key]
 
 # ----------------------------------------
 
@@ -195,11 +749,122 @@ class FontWrapper(TTFont):
     it also keep track of the font file path
 
     this is not a comprehensive wrapper, things are being added as needed
+
+    with lazy=True the font file is memory-mapped instead of being read in memory,
+    tables are only decompiled when accessed and can be dropped again
+    with release_tables()
+
+    when created with metadata (see export_metadata), the font file
+    is only opened once something outside of the metadata is needed
     """
 
-    def __init__(self, path):
+    # bump when the metadata content changes, so cached metadata gets recomputed
+    METADATA_NAMESPACE = "font-v4"
+    METADATA_KEYS = [
+        "prefered_family_name",
+        "prefered_style_name",
+        "sorting_score",
+        "feature_tags",
+        "version",
+        "date_created",
+        "designer",
+        "copyright",
+        "rcmap",
+        "glyph_set_key",
+        "feature_script_languages",
+        ]
+
+    # cached attributes derived from each table, cleared when the table is released
+    TABLE_CACHE_ATTRIBUTES = {
+        "OS/2": ["_os2", "_fsSelection"],
+        "name": ["_name"],
+        "head": ["_head"],
+        "cmap": ["_cmap"],
+        "GSUB": ["_gsub"],
+        "GPOS": ["_gpos"],
+    }
+
+    # called with (font, tag) each time a table gets decompiled, see FontPool
+    table_listener = None
+
+    def __init__(self, path, lazy=False, metadata=None, metadata_cache=None):
         self.path = pathlib.Path(path)
-        super().__init__(path)
+        # the font file, and the face index for a font collection face (None otherwise)
+        self.file_path, self.font_number = split_font_number(self.path)
+        self.metadata_cache = metadata_cache
+        self._lazy_tables = lazy
+        self._metadata = dict(metadata) if metadata else {}
+        self._is_open = False
+        if not metadata:
+            self._open()
+
+    def _open(self):
+        self._is_open = True
+        if self.font_number is not None:
+            # faces of a collection share the file data and the tables stored once in the file
+            collection_file = FontCollectionFile.for_path(self.file_path, lazy=self._lazy_tables)
+            self._collection_file = collection_file
+            super().__init__(collection_file.get_file(), fontNumber=self.font_number, lazy=True, _tableCache=collection_file.table_cache)
+        elif self._lazy_tables:
+            super().__init__(self._map_font_file(), lazy=True)
+        else:
+            super().__init__(self.path)
+
+    def __getattr__(self, attribute):
+        # only called when the attribute is missing
+        if attribute in _TTFONT_ATTRIBUTES and not self.__dict__.get("_is_open", True):
+            self._open()
+            return getattr(self, attribute)
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{attribute}'")
+
+    @property
+    def is_open(self):
+        return self._is_open
+
+    def close(self):
+        if self._is_open:
+            super().close()
+
+    def _map_font_file(self):
+        # the map stays valid once the file is closed, it is closed with the font reader
+        with open(self.path, "rb") as font_file:
+            return mmap.mmap(font_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getitem__(self, tag):
+        loaded = tag in self.tables
+        table = super().__getitem__(tag)
+        if not loaded:
+            # tables found in a shared table cache are not kept by TTFont
+            self.tables[tag] = table
+            if self.table_listener is not None:
+                self.table_listener(self, tag)
+        return table
+
+    # releasing tables
+
+    @property
+    def decompiled_tables(self):
+        return [tag for tag in self.tables]
+
+    def release_tables(self, tags=None):
+        """
+        drop decompiled tables (all of them if tags is None),
+        they are decompiled again from the font file on next access.
+        tables that are not backed by the font file are kept.
+        """
+        if tags is None:
+            tags = self.decompiled_tables
+        released = []
+        for tag in tags:
+            if tag not in self.tables or self.reader is None or tag not in self.reader:
+                continue
+            table = self.tables.pop(tag)
+            if self._tableCache is not None:
+                self._collection_file.release_table(table)
+            for attribute in self.TABLE_CACHE_ATTRIBUTES.get(tag, []):
+                self.__dict__.pop(attribute, None)
+            released.append(tag)
+        return released
 
     # caching tables
     @property
@@ -226,17 +891,57 @@ class FontWrapper(TTFont):
             self._cmap = self["cmap"]
         return self._cmap
 
-    @property
+    @metadata_property
     def rcmap(self):
-        if not hasattr(self, "_rcmap"):
-            self._rcmap = self.cmap.buildReversed()
-        return self._rcmap
+        return self.glyph_set_analysis.rcmap
+
+    @property
+    def unicodes(self):
+        return self.glyph_set_analysis.unicodes
+
+    def get_unicode_block_coverage(self, include_empty=False):
+        """
+        {block name: {"start", "end", "covered", "assigned", "percent"}}
+        """
+        counts = self.glyph_set_analysis.unicode_block_counts
+        return get_unicode_block_index().get_coverage(counts=counts, include_empty=include_empty)
+
+    # glyph and cmap analysis, shared with fonts of the same glyph set
+
+    @metadata_property
+    def glyph_set_key(self):
+        digest = hashlib.sha1()
+        digest.update("\0".join(self.glyph_order).encode("utf-8"))
+        cmap_data = self.get_raw_table_data("cmap")
+        if cmap_data is None:
+            cmap_data = repr(sorted(self.cmap.getBestCmap().items())).encode("utf-8")
+        digest.update(cmap_data)
+        return digest.hexdigest()
+
+    @property
+    def glyph_set_analysis(self):
+        if not hasattr(self, "_glyph_set_analysis"):
+            analysis = GlyphSetAnalysis.for_font(self)
+            # keep a single copy of the reversed cmap
+            self._metadata["rcmap"] = analysis.rcmap
+            self._glyph_set_analysis = analysis
+        return self._glyph_set_analysis
+
+    def get_raw_table_data(self, tag):
+        """
+        the table data as stored in the font file, without decompiling it
+        """
+        if self.reader is not None and tag in self.reader:
+            return self.reader[tag]
+        if tag in self:
+            return self.getTableData(tag)
+        return None
 
 
     @property
     def fsSelection(self):
         if not hasattr(self, "_fsSelection"):
-            d = self._get_bits_based_dict(self.os2.fsSelection, os2_fsSelection_specs)
+            d = self._get_bits_based_dict(self.os2.fsSelection, get_spec("os2_fsSelection_specs"))
             self._fsSelection = d
         return self._fsSelection
 
@@ -245,7 +950,7 @@ class FontWrapper(TTFont):
     def year_created(self):
         return self.date_created.strftime("%Y")
 
-    @property
+    @metadata_property
     def date_created(self):
         # wtf
         time_stamp = self.head.created
@@ -254,7 +959,7 @@ class FontWrapper(TTFont):
         delta = reference_time - epoch_time
         return datetime.datetime.fromtimestamp(time_stamp) + delta
 
-    @property
+    @metadata_property
     def prefered_family_name(self):
         out = self.name.getDebugName(16)
         if out == None:
@@ -262,7 +967,7 @@ class FontWrapper(TTFont):
         else:
             return out
 
-    @property
+    @metadata_property
     def prefered_style_name(self):
         out = self.name.getDebugName(17)
         if out == None:
@@ -270,7 +975,7 @@ class FontWrapper(TTFont):
         else:
             return out
 
-    @property
+    @metadata_property
     def designer(self):
         out = self.name.getDebugName(9)
         if not out:
@@ -278,7 +983,7 @@ class FontWrapper(TTFont):
         else:
             return out
 
-    @property
+    @metadata_property
     def copyright(self):
         out = self.name.getDebugName(0)
         if not out:
@@ -287,18 +992,17 @@ class FontWrapper(TTFont):
             return out
 
 
-    @property
+    @metadata_property
     def version(self):
         return round(float(self.head.fontRevision), 3)
 
     @property
     def language_support(self):
-        hyperglot = HyperglotAssistant()
-        return hyperglot.collect_language_support(self.path)
+        return self.get_language_support()
 
     def get_language_support(self, speaker_threshold=0):
-        hyperglot = HyperglotAssistant()
-        return hyperglot.collect_language_support(self.path, speaker_threshold=speaker_threshold)
+        hyperglot = HyperglotAssistant(metadata_cache=self.metadata_cache)
+        return hyperglot.collect_language_support(self.path, speaker_threshold=speaker_threshold, codepoints=self.unicodes)
 
     # handy methods
 
@@ -309,7 +1013,9 @@ class FontWrapper(TTFont):
         return self.fsSelection["Bold"]
 
     def get_sorting_score(self):
-        return (self.os2.usWidthClass, self.os2.usWeightClass, self.is_italic())
+        if "sorting_score" not in self._metadata:
+            self._metadata["sorting_score"] = (self.os2.usWidthClass, self.os2.usWeightClass, self.is_italic())
+        return self._metadata["sorting_score"]
 
     # unicode and glyph order
 
@@ -317,8 +1023,22 @@ class FontWrapper(TTFont):
     def glyph_order(self):
         return self.getGlyphOrder()
 
+    @property
+    def glyph_table(self):
+        return self.glyph_set_analysis.glyph_table
+
     def get_cat_glyphs(self):
-        return [CatGlyph(n, self) for n in self.glyph_order]
+        table = self.glyph_table
+        return [CatGlyphView(table, row, self) for row in range(len(table))]
+
+    @property
+    def glyph_outlines(self):
+        """
+        the outlines of every glyph, encoded or not, cached in memory and on disk (see GlyphOutlineStore)
+        """
+        if not hasattr(self, "_glyph_outlines"):
+            self._glyph_outlines = GlyphOutlineStore.for_font(self)
+        return self._glyph_outlines
 
 
     #   features
@@ -326,13 +1046,13 @@ class FontWrapper(TTFont):
     @property
     def gsub(self):
         if not hasattr(self, "_gsub"):
-            self._gsub = self["GSUB"]
+            self._gsub = self.get("GSUB")
         return self._gsub
 
     @property
     def gpos(self):
         if not hasattr(self, "_gpos"):
-            self._gpos = self["GPOS"]
+            self._gpos = self.get("GPOS")
         return self._gpos
 
     @property
@@ -340,20 +1060,81 @@ class FontWrapper(TTFont):
         relevant_keys = ["friendly name", "function"]
         out = {}
         for fea in self.feature_tags:
-            fea_specs = feature_descriptions[fea]
+            fea_specs = get_spec("feature_descriptions")[fea]
             out[fea] = {key: fea_specs[key] for key in relevant_keys}
         return out
     
-    @property
+    @metadata_property
     def feature_tags(self):
         features = set()
-        tables = [self.gsub, self.gpos]
-        for table in tables:
-            if table != None:
-                for fea in table.table.FeatureList.FeatureRecord:
-                    features.add(fea.FeatureTag)
+        for tag in LAYOUT_TABLE_TAGS:
+            features.update(self.get_layout_feature_tags(tag))
         return sorted(list(features))
 
+    @metadata_property
+    def feature_script_languages(self):
+        """
+        {feature tag: {script tag: [language tags]}} for GSUB and GPOS together
+        """
+        out = {}
+        for tag in LAYOUT_TABLE_TAGS:
+            for feature, scripts in self.get_layout_feature_script_languages(tag).items():
+                for script, languages in scripts.items():
+                    script_languages = out.setdefault(feature, {}).setdefault(script, [])
+                    script_languages += [l for l in languages if l not in script_languages]
+        return out
+
+    # layout tables are only decompiled when something else already did,
+    # otherwise the FeatureList and ScriptList are read from the raw table data
+
+    def get_layout_feature_tags(self, tag):
+        if tag in self.tables:
+            table = self.tables[tag].table
+            if table.FeatureList is None:
+                return []
+            return [fea.FeatureTag for fea in table.FeatureList.FeatureRecord]
+        data = self.get_raw_table_data(tag)
+        if not data:
+            return []
+        return layoutTables.read_feature_tags(data)
+
+    def get_layout_feature_script_languages(self, tag):
+        data = self.get_raw_table_data(tag)
+        if not data:
+            return {}
+        return layoutTables.read_feature_script_languages(data)
+
+
+    # metadata
+
+    def export_metadata(self, keys=None):
+        """
+        the json friendly metadata of the font, as stored in a FontMetadataCache
+        """
+        if keys is None:
+            keys = self.METADATA_KEYS
+        metadata = {}
+        for key in keys:
+            if key == "sorting_score":
+                metadata[key] = list(self.get_sorting_score())
+            elif key == "date_created":
+                metadata[key] = self.date_created.isoformat()
+            elif key == "rcmap":
+                metadata[key] = {name: sorted(unicodes) for name, unicodes in self.rcmap.items()}
+            else:
+                metadata[key] = getattr(self, key)
+        return metadata
+
+    @classmethod
+    def decode_metadata(cls, metadata):
+        metadata = dict(metadata)
+        if "sorting_score" in metadata:
+            metadata["sorting_score"] = tuple(metadata["sorting_score"])
+        if "date_created" in metadata:
+            metadata["date_created"] = datetime.datetime.fromisoformat(metadata["date_created"])
+        if "rcmap" in metadata:
+            metadata["rcmap"] = {name: set(unicodes) for name, unicodes in metadata["rcmap"].items()}
+        return metadata
 
     # misc 
 
@@ -363,7 +1144,7 @@ class FontWrapper(TTFont):
     # fontspecs helpers 
 
     def get_fsSelection_as_dict(self):
-        return self._get_bits_based_dict(self.os2.fsSelection, os2_fsSelection_specs)
+        return self._get_bits_based_dict(self.os2.fsSelection, get_spec("os2_fsSelection_specs"))
 
 
     def _num_to_selected_bits(self, num, bits=32):
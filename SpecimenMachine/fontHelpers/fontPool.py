@@ -0,0 +1,233 @@
+from collections import OrderedDict
+import threading
+import pathlib
+
+from .fontHelpers import load_fonts_from_paths, walk_font_dir
+from .metadataCache import get_file_identity
+
+# ----------------------------------------
+
+# tables worth dropping when over the memory budget, they are decompiled again on next access
+HEAVY_TABLE_TAGS = ["glyf", "CFF ", "CFF2", "GSUB", "GPOS", "kern", "gvar"]
+
+# rough size of a decompiled table relative to its size in the font file
+DECOMPILED_SIZE_FACTORS = {
+    "glyf": 8,
+    "CFF ": 8,
+    "CFF2": 8,
+    "GSUB": 12,
+    "GPOS": 12,
+    "kern": 10,
+    "gvar": 8,
+    }
+DEFAULT_DECOMPILED_SIZE_FACTOR = 3
+
+# ----------------------------------------
+
+def estimate_table_memory(font, tag):
+    """
+    estimated memory of a decompiled table, from its size in the font file
+    """
+    if font.reader is None:
+        return 0
+    entry = font.reader.tables.get(tag)
+    if entry is None:
+        return 0
+    return getattr(entry, "length", 0) * DECOMPILED_SIZE_FACTORS.get(tag, DEFAULT_DECOMPILED_SIZE_FACTOR)
+
+def estimate_font_memory(font):
+    if not font.is_open:
+        return 0
+    return sum(estimate_table_memory(font, tag) for tag in font.decompiled_tables)
+
+# ----------------------------------------
+
+class FontPool():
+    """
+    hands out a single FontWrapper per font file, so a file is parsed once per process
+    however many collections, sub-collections and templates use it.
+
+    fonts are reference counted: acquire takes a reference, release gives it back.
+    fonts are keyed by their file identity (path + size + mtime),
+    a font file changed on disk is loaded again on its next acquire.
+
+    without a memory budget, a font without references is closed and dropped from the pool.
+    with a memory budget (in bytes, compared to an estimate of the decompiled tables),
+    released fonts stay in the pool and a later acquire is a hit. once over budget:
+    - the heavy tables (glyf, GSUB, GPOS, kern...) of the least recently used released fonts are dropped,
+      they are decompiled again on their next access
+    - then released fonts are dropped, least recently used first
+    fonts still referenced are never touched, the pool can stay over budget while they are held.
+    see stats for the hit, miss and eviction counts.
+    """
+
+    def __init__(self, workers=1, lazy=False, metadata_cache=None, memory_budget=None):
+        self.workers = workers
+        self.lazy = lazy
+        self.metadata_cache = metadata_cache
+        self.memory_budget = memory_budget
+
+        # file identity -> FontWrapper, and FontWrapper id -> (file identity, reference count)
+        self._fonts = {}
+        self._references = {}
+        # released fonts kept under a memory budget, and every font by last access, least recent first
+        self._idle = OrderedDict()
+        self._recent = OrderedDict()
+        # FontWrapper id -> estimated memory of its decompiled tables
+        self._memory = {}
+        self.memory = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.table_evictions = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self)} fonts>"
+
+    def __len__(self):
+        return len(self._fonts)
+
+    def __contains__(self, path):
+        return get_file_identity(path) in self._fonts
+
+    @property
+    def stats(self):
+        return {
+            "fonts": len(self._fonts),
+            "idle_fonts": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "table_evictions": self.table_evictions,
+            "memory": self.memory,
+            "memory_budget": self.memory_budget,
+            }
+
+    # ----------------------------------------
+
+    def acquire(self, path):
+        return self.acquire_fonts([path])[0]
+
+    def acquire_fonts(self, list_of_paths, sort=False):
+        """
+        a FontWrapper for each path, in order (or sorted as load_fonts_from_paths does).
+        fonts missing from the pool are loaded together, with the pool workers.
+        """
+        identities = [get_file_identity(p) for p in list_of_paths]
+        with self._lock:
+            missing = list(dict.fromkeys(identity for identity in identities if identity not in self._fonts))
+            self.misses += len(missing)
+            self.hits += len(identities) - len(missing)
+            if missing:
+                loaded = load_fonts_from_paths([pathlib.Path(identity[0]) for identity in missing], sort=False,
+                                               workers=self.workers, lazy=self.lazy, metadata_cache=self.metadata_cache)
+                for identity, font in zip(missing, loaded):
+                    self._add_font(identity, font)
+            fonts = []
+            for identity in identities:
+                font = self._fonts[identity]
+                self._references[id(font)][1] += 1
+                self._idle.pop(id(font), None)
+                self._recent.move_to_end(id(font))
+                fonts.append(font)
+            self._enforce_budget()
+        if sort:
+            fonts = sorted(fonts, key=lambda f: f.get_sorting_score())
+        return fonts
+
+    def acquire_font_list(self, list_of_path, sort=False):
+        """
+        as load_font_list: directories are walked, files are taken as they are
+        """
+        font_paths = []
+        for p in list_of_path:
+            font_paths += walk_font_dir(p)
+        return self.acquire_fonts(font_paths, sort=sort)
+
+    def release(self, font):
+        """
+        give back a reference to a font, once nothing holds it
+        it is closed, or kept as long as the memory budget allows
+        """
+        with self._lock:
+            reference = self._references.get(id(font))
+            if reference is None:
+                return
+            reference[1] -= 1
+            if reference[1] > 0:
+                return
+            if self.memory_budget is None:
+                self._drop_font(font)
+            else:
+                self._idle[id(font)] = font
+                self._enforce_budget()
+
+    def release_fonts(self, fonts):
+        for font in fonts:
+            self.release(font)
+
+    def get_reference_count(self, font):
+        reference = self._references.get(id(font))
+        return reference[1] if reference else 0
+
+    def clear(self):
+        with self._lock:
+            for font in list(self._recent.values()):
+                self._drop_font(font)
+
+    # ----------------------------------------
+    # memory
+
+    def _add_font(self, identity, font):
+        self._fonts[identity] = font
+        self._references[id(font)] = [identity, 0]
+        self._recent[id(font)] = font
+        self._memory[id(font)] = estimate_font_memory(font)
+        self.memory += self._memory[id(font)]
+        font.table_listener = self._table_loaded
+
+    def _drop_font(self, font):
+        identity, _ = self._references.pop(id(font))
+        if self._fonts.get(identity) is font:
+            del self._fonts[identity]
+        self._idle.pop(id(font), None)
+        self._recent.pop(id(font), None)
+        self.memory -= self._memory.pop(id(font), 0)
+        font.table_listener = None
+        font.close()
+
+    def _table_loaded(self, font, tag):
+        # called by the font when a table gets decompiled
+        with self._lock:
+            if id(font) not in self._memory:
+                return
+            size = estimate_table_memory(font, tag)
+            self._memory[id(font)] += size
+            self.memory += size
+            self._recent.move_to_end(id(font))
+            self._enforce_budget(keep=font)
+
+    def _enforce_budget(self, keep=None):
+        if self.memory_budget is None:
+            return
+        # fonts still referenced keep their tables, whoever holds them may be using them
+        for font in list(self._recent.values()):
+            if self.memory <= self.memory_budget:
+                return
+            if font is keep or self._references[id(font)][1] > 0 or not self._memory.get(id(font)):
+                continue
+            released = font.release_tables([tag for tag in HEAVY_TABLE_TAGS if tag in font.decompiled_tables])
+            if released:
+                self.table_evictions += len(released)
+                size = estimate_font_memory(font)
+                self.memory += size - self._memory[id(font)]
+                self._memory[id(font)] = size
+        for font in list(self._idle.values()):
+            if self.memory <= self.memory_budget:
+                return
+            if font is keep:
+                continue
+            self._drop_font(font)
+            self.evictions += 1
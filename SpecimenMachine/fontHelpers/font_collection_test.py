@@ -0,0 +1,63 @@
+from fontTools.ttLib import TTFont, TTCollection
+
+import pytest
+
+from SpecimenMachine import fontHelpers
+
+# ----------------------------------------
+
+STYLES = [("Regular", 400), ("Medium", 500), ("Bold", 700)]
+
+@pytest.fixture
+def collection_path(tmp_path, make_font):
+    glyph_order = [".notdef", "space", "A", "B", "a", "b"]
+    cmap = {ord(" "): "space", ord("A"): "A", ord("B"): "B", ord("a"): "a", ord("b"): "b"}
+    collection = TTCollection()
+    for style, weight in STYLES:
+        path = make_font(f"Face-{style}.ttf", glyph_order, cmap, family="Face", style=style, weight=weight)
+        collection.fonts.append(TTFont(path))
+    path = tmp_path / "Face.ttc"
+    # the outlines, metrics and cmap are the same for every face, stored once in the file
+    collection.save(path, shareTables=True)
+    return path
+
+def test_collection_faces_are_walked(collection_path):
+    paths = fontHelpers.walk_font_dir(collection_path.parent)
+    faces = [p for p in paths if p.name.startswith("Face.ttc")]
+    assert [p.name for p in faces] == [f"Face.ttc{fontHelpers.metadataCache.FONT_NUMBER_SEPARATOR}{i}" for i in range(len(STYLES))]
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_collection_faces_share_tables(collection_path, lazy):
+    paths = fontHelpers.walk_font_dir(collection_path)
+    fonts = [fontHelpers.FontWrapper(p, lazy=lazy) for p in paths]
+    assert [f.prefered_style_name for f in fonts] == [style for style, _ in STYLES]
+    assert [f["OS/2"].usWeightClass for f in fonts] == [weight for _, weight in STYLES]
+
+    # tables stored once are decompiled once
+    assert fonts[0]["glyf"] is fonts[1]["glyf"] is fonts[2]["glyf"]
+    assert fonts[0]["cmap"] is fonts[1]["cmap"]
+    assert fonts[0]["name"] is not fonts[1]["name"]
+    # post hands its glyph order to each face
+    assert all(f.getGlyphOrder() == fonts[0].getGlyphOrder() for f in fonts)
+    assert fonts[2]["glyf"]["A"].numberOfContours == 1
+
+    # one file data for every face
+    collection_files = {id(f._collection_file) for f in fonts}
+    assert len(collection_files) == 1
+
+def test_collection_faces_are_cached_apart(collection_path, metadata_cache, count_opened_fonts):
+    paths = fontHelpers.walk_font_dir(collection_path)
+    fontHelpers.load_fonts_from_paths(paths, metadata_cache=metadata_cache)
+    count_opened_fonts.clear()
+    cached = fontHelpers.load_fonts_from_paths(paths, metadata_cache=metadata_cache, sort=False)
+    assert count_opened_fonts == []
+    assert [f.prefered_style_name for f in cached] == [style for style, _ in STYLES]
+
+def test_collection_faces_in_a_pool(collection_path):
+    pool = fontHelpers.FontPool(lazy=True)
+    paths = fontHelpers.walk_font_dir(collection_path)
+    fonts = pool.acquire_fonts(paths)
+    assert len({id(f) for f in fonts}) == len(STYLES)
+    assert fonts[0]["glyf"] is fonts[1]["glyf"]
+    pool.release_fonts(fonts)
+    assert len(pool) == 0
@@ -0,0 +1,65 @@
+from SpecimenMachine import fontHelpers
+
+# ----------------------------------------
+
+def test_one_font_per_file_and_reference_counts(family_dir):
+    pool = fontHelpers.FontPool()
+    paths = fontHelpers.walk_font_dir(family_dir)
+    fonts = pool.acquire_fonts(paths)
+    again = pool.acquire(paths[0])
+    assert again is fonts[0]
+    assert pool.get_reference_count(again) == 2
+    assert pool.stats["misses"] == len(paths) and pool.stats["hits"] == 1
+
+    # without a memory budget, fonts are closed once nothing holds them
+    pool.release(again)
+    assert paths[0] in pool
+    pool.release_fonts(fonts)
+    assert len(pool) == 0
+    assert pool.get_reference_count(fonts[0]) == 0
+
+def test_released_fonts_are_kept_under_budget(family_dir):
+    pool = fontHelpers.FontPool(memory_budget=1024 * 1024 * 1024)
+    paths = fontHelpers.walk_font_dir(family_dir)
+    fonts = pool.acquire_fonts(paths)
+    pool.release_fonts(fonts)
+    assert len(pool) == len(paths)
+    assert pool.acquire_fonts(paths) == fonts
+    assert pool.stats["hits"] == len(paths)
+
+def test_referenced_fonts_keep_their_tables_over_budget(family_dir):
+    pool = fontHelpers.FontPool(lazy=True, memory_budget=1)
+    held_path, released_path = fontHelpers.walk_font_dir(family_dir)[:2]
+    held = pool.acquire(held_path)
+    released = pool.acquire(released_path)
+    held["glyf"], held["GSUB"]
+    released["glyf"]
+    assert pool.memory > pool.memory_budget
+
+    pool.release(released)
+    # the released font goes, the held one is left as it was
+    assert released_path not in pool
+    assert pool.stats["evictions"] == 1
+    assert {"glyf", "GSUB"} <= set(held.decompiled_tables)
+    assert pool.get_reference_count(held) == 1
+
+    # accessing another table of a held font never drops the ones already loaded
+    table_evictions = pool.stats["table_evictions"]
+    held["GPOS"]
+    assert {"glyf", "GSUB", "GPOS"} <= set(held.decompiled_tables)
+    assert pool.stats["table_evictions"] == table_evictions
+
+def test_released_fonts_lose_their_heavy_tables_first(family_dir):
+    paths = fontHelpers.walk_font_dir(family_dir)[:2]
+    pool = fontHelpers.FontPool(lazy=True, memory_budget=1024 * 1024 * 1024)
+    first, second = pool.acquire_fonts(paths)
+    first["glyf"]
+    second["glyf"]
+    pool.release(first)
+
+    pool.memory_budget = pool.memory - 1
+    second["GSUB"]
+    assert "glyf" not in first.decompiled_tables
+    assert paths[0] in pool
+    assert "glyf" in second.decompiled_tables
+    assert pool.stats["table_evictions"] == 1
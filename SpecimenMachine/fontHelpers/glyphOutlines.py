@@ -0,0 +1,147 @@
+from fontTools.pens.recordingPen import DecomposingRecordingPen, replayRecording
+from fontTools.pens.boundsPen import ControlBoundsPen
+
+import threading
+import weakref
+import pathlib
+import pickle
+import os
+
+from .metadataCache import get_cache_dir, get_file_content_hash
+
+# ----------------------------------------
+
+OUTLINES_CACHE_VERSION = 1
+OUTLINES_CACHE_DIR_NAME = "outlines"
+
+# ----------------------------------------
+
+class GlyphOutline():
+    """
+    a glyph outline recorded through the pen protocol, components decomposed
+    """
+    __slots__ = ("name", "value", "width")
+
+    def __init__(self, name, value, width):
+        self.name = name
+        self.value = value
+        self.width = width
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.name}>"
+
+    def draw(self, pen):
+        replayRecording(self.value, pen)
+
+    @property
+    def bounds(self):
+        pen = ControlBoundsPen(None)
+        self.draw(pen)
+        return pen.bounds
+
+
+class GlyphOutlineStore():
+    """
+    every glyph outline of a font, encoded or not, extracted once through the pen protocol
+    and kept in memory (shared by fonts with the same file content) and on disk.
+
+    outlines are extracted on first access, save() writes them in the cache directory,
+    the next process loads them back without reading the glyph tables.
+    variable fonts give their default outlines.
+    """
+
+    _stores = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __init__(self, key, font, cache_dir=None):
+        self.key = key
+        self.font = font
+        self.upm = font.head.unitsPerEm
+        if cache_dir is None:
+            cache_dir = get_cache_dir() / OUTLINES_CACHE_DIR_NAME
+        self.cache_path = pathlib.Path(cache_dir) / f"{key}-v{OUTLINES_CACHE_VERSION}.pickle"
+        self._outlines = {}
+        self._dirty = False
+        self._glyph_set = None
+        self._load()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.font.path.name} {len(self._outlines)} outlines>"
+
+    @classmethod
+    def for_font(cls, font, cache_dir=None):
+        if font.metadata_cache is not None:
+            key = font.metadata_cache.get_content_hash(font.path)
+        else:
+            key = get_file_content_hash(font.path)
+        with cls._lock:
+            store = cls._stores.get(key)
+            if store is None:
+                store = cls(key, font, cache_dir=cache_dir)
+                cls._stores[key] = store
+            elif store.font is not font:
+                # outlines are read from the font asking for them, the previous one may be closed
+                store.font = font
+                store._glyph_set = None
+        return store
+
+    # ----------------------------------------
+    # disk cache
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "rb") as cache_file:
+                outlines = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        self._outlines = {name: GlyphOutline(name, value, width) for name, (value, width) in outlines.items()}
+
+    def save(self):
+        """
+        write the extracted outlines to the disk cache, if any were added
+        """
+        if not self._dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {name: (outline.value, outline.width) for name, outline in self._outlines.items()}
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.cache_path)
+        self._dirty = False
+
+    # ----------------------------------------
+    # outlines
+
+    @property
+    def glyph_set(self):
+        if self._glyph_set is None:
+            self._glyph_set = self.font.getGlyphSet()
+        return self._glyph_set
+
+    def _extract(self, name):
+        pen = DecomposingRecordingPen(self.glyph_set)
+        glyph = self.glyph_set[name]
+        glyph.draw(pen)
+        return GlyphOutline(name, tuple(pen.value), glyph.width)
+
+    def get_outline(self, name):
+        outline = self._outlines.get(name)
+        if outline is None:
+            outline = self._outlines[name] = self._extract(name)
+            self._dirty = True
+        return outline
+
+    def get_outlines(self, names=None):
+        """
+        {glyph name: GlyphOutline} for names (every glyph of the font when None)
+        """
+        if names is None:
+            names = self.font.glyph_order
+        return {name: self.get_outline(name) for name in names}
+
+    def __contains__(self, name):
+        return name in self._outlines
+
+    def __len__(self):
+        return len(self._outlines)
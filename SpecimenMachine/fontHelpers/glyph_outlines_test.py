@@ -0,0 +1,38 @@
+from benchmarks import fixtures
+
+from SpecimenMachine import fontHelpers
+from SpecimenMachine.fontHelpers.glyphOutlines import GlyphOutlineStore
+
+# ----------------------------------------
+
+def test_outlines_round_trip_through_the_disk_cache(font_path, tmp_path):
+    # the cache directory can be given as a string
+    cache_dir = str(tmp_path / "outlines")
+    font = fontHelpers.FontWrapper(font_path)
+    store = GlyphOutlineStore.for_font(font, cache_dir=cache_dir)
+    outlines = store.get_outlines()
+    assert len(store) == len(font.glyph_order)
+    store.save()
+    assert store.cache_path.exists()
+
+    # loaded back without reading the glyph tables
+    loaded = GlyphOutlineStore(store.key, font, cache_dir=cache_dir)
+    assert len(loaded) == len(outlines)
+    loaded._extract = None
+    for name, outline in outlines.items():
+        assert loaded.get_outline(name).value == outline.value
+        assert loaded.get_outline(name).width == outline.width
+
+def test_changed_fonts_get_new_outlines(font_path, tmp_path):
+    cache_dir = tmp_path / "outlines"
+    font = fontHelpers.FontWrapper(font_path)
+    store = GlyphOutlineStore.for_font(font, cache_dir=cache_dir)
+    store.get_outlines()
+    store.save()
+
+    fixtures.build_font(font_path, glyph_count=60)
+    changed_font = fontHelpers.FontWrapper(font_path)
+    changed_store = GlyphOutlineStore.for_font(changed_font, cache_dir=cache_dir)
+    assert changed_store.key != store.key
+    assert len(changed_store) == 0
+    assert len(changed_store.get_outlines()) == len(changed_font.glyph_order) < len(font.glyph_order)
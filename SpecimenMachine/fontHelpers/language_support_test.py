@@ -0,0 +1,88 @@
+import pytest
+
+from SpecimenMachine import fontHelpers
+
+hyperglot_checker = pytest.importorskip("hyperglot.checker")
+
+# ----------------------------------------
+
+LATIN = {c: f"uni{c:04X}" for c in list(range(0x41, 0x5B)) + list(range(0x61, 0x7B))}
+FRENCH = {**LATIN, **{c: f"uni{c:04X}" for c in [0xC0, 0xC2, 0xC7, 0xC8, 0xC9, 0xCA, 0xCB, 0xCE, 0xCF, 0xD4, 0xD9, 0xDB, 0xDC, 0x178, 0x152, 0xC6,
+                                                0xE0, 0xE2, 0xE7, 0xE8, 0xE9, 0xEA, 0xEB, 0xEE, 0xEF, 0xF4, 0xF9, 0xFB, 0xFC, 0xFF, 0x153, 0xE6]}}
+
+@pytest.fixture
+def make_charset_font(make_font):
+    def make_charset_font(file_name, cmap):
+        return make_font(file_name, [".notdef"] + sorted(set(cmap.values())), cmap)
+    return make_charset_font
+
+@pytest.fixture
+def checks(monkeypatch):
+    """
+    the character sets checked by hyperglot, from an empty memo
+    """
+    monkeypatch.setattr(fontHelpers.HyperglotAssistant, "_support_cache", {})
+    checked = []
+    original = fontHelpers.fontHelpers._check_language_support
+    def check(codepoints):
+        checked.append(frozenset(codepoints))
+        return original(codepoints)
+    monkeypatch.setattr(fontHelpers.fontHelpers, "_check_language_support", check)
+    return checked
+
+def get_font_checker_support(path, speaker_thresholds):
+    # as the language support was checked before it was memoized,
+    # some languages give their speaker count as text
+    supported = hyperglot_checker.FontChecker(str(path)).get_supported_languages()
+    def speakers(lang):
+        try:
+            return int(lang.get("speakers", 0))
+        except (TypeError, ValueError):
+            return 0
+    return [{script: [lang.get_name() for iso, lang in langs.items() if speakers(lang) >= threshold] for script, langs in supported.items()}
+            for threshold in speaker_thresholds]
+
+def test_support_is_memoized_by_character_set(make_charset_font, checks):
+    paths = [make_charset_font("Latin-Regular.ttf", LATIN), make_charset_font("Latin-Bold.ttf", LATIN), make_charset_font("French-Regular.ttf", FRENCH)]
+    supports = [fontHelpers.FontWrapper(path).get_language_support() for path in paths]
+    # the second font has the same character set: a hit
+    assert checks == [frozenset(LATIN), frozenset(FRENCH)]
+    assert supports[0] == supports[1]
+    assert "French" not in supports[0]["Latin"] and "French" in supports[2]["Latin"]
+    fontHelpers.FontWrapper(paths[2]).get_language_support()
+    assert len(checks) == 2
+
+def test_support_matches_the_font_checker(make_charset_font, checks):
+    speaker_thresholds = [0, 10_000_000]
+    for file_name, cmap in [("Latin-Regular.ttf", LATIN), ("French-Regular.ttf", FRENCH)]:
+        path = make_charset_font(file_name, cmap)
+        font = fontHelpers.FontWrapper(path)
+        supports = [font.get_language_support(speaker_threshold=threshold) for threshold in speaker_thresholds]
+        assert supports == get_font_checker_support(path, speaker_thresholds)
+    assert len(checks) == 2
+
+def test_collection_union_and_intersection(make_charset_font, tmp_path):
+    from SpecimenMachine import SMDirector
+
+    class Director(SMDirector):
+        defaults = [{"template": "fonts"}]
+
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    for file_name, cmap in [("Latin-Regular.ttf", LATIN), ("French-Regular.ttf", FRENCH)]:
+        make_charset_font(file_name, cmap).rename(project_dir / file_name)
+    collection = Director(project_dir, workers=2).fonts
+    supports = [font.get_language_support() for font in collection.fonts]
+    by_name = {font.path.name: set(support["Latin"]) for font, support in zip(collection.fonts, supports)}
+    latin, french = by_name["Latin-Regular.ttf"], by_name["French-Regular.ttf"]
+    assert latin < french
+
+    union = collection.get_language_support(mode="union")
+    intersection = collection.get_language_support(mode="intersection")
+    assert set(union) == set(intersection) == {"Latin"}
+    assert set(union["Latin"]) == latin | french
+    assert set(intersection["Latin"]) == latin & french == latin
+    assert "French" in union["Latin"] and "French" not in intersection["Latin"]
+    assert collection.get_language_support(mode="first") == supports[0]
+    per_font = collection.get_collection_language_support()["per_font"]
+    assert list(per_font.values()) == supports
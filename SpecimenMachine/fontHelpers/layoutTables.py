@@ -0,0 +1,90 @@
+import struct
+
+# ----------------------------------------
+# minimal readers for the GSUB/GPOS ScriptList and FeatureList,
+# working on the raw table data so the lookups are never decompiled
+
+DEFAULT_LANGUAGE_TAG = "dflt"
+NO_REQUIRED_FEATURE = 0xFFFF
+
+# ----------------------------------------
+
+def _read_uint16(data, offset):
+    return struct.unpack_from(">H", data, offset)[0]
+
+def _read_tag(data, offset):
+    return data[offset:offset+4].decode("latin-1")
+
+def _read_header_offsets(data):
+    # majorVersion, minorVersion, scriptListOffset, featureListOffset, lookupListOffset
+    _, _, script_list, feature_list, _ = struct.unpack_from(">HHHHH", data, 0)
+    return script_list, feature_list
+
+def _read_records(data, offset, base=None):
+    """
+    [(tag, absolute offset)] of a tag/offset16 record list starting with its count,
+    the record offsets are relative to base, the list itself by default
+    """
+    if base is None:
+        base = offset
+    count = _read_uint16(data, offset)
+    records = []
+    for i in range(count):
+        record_offset = offset + 2 + i * 6
+        records.append((_read_tag(data, record_offset), base + _read_uint16(data, record_offset + 4)))
+    return records
+
+# ----------------------------------------
+
+def read_feature_tags(data):
+    """
+    the FeatureTag of every FeatureRecord, in order (tags can repeat)
+    """
+    _, feature_list = _read_header_offsets(data)
+    if not feature_list:
+        return []
+    count = _read_uint16(data, feature_list)
+    return [_read_tag(data, feature_list + 2 + i * 6) for i in range(count)]
+
+def read_script_list(data):
+    """
+    {script tag: {language tag: [feature indices]}}
+    the default language system is listed as "dflt"
+    """
+    script_list, _ = _read_header_offsets(data)
+    if not script_list:
+        return {}
+    scripts = {}
+    for script_tag, script_offset in _read_records(data, script_list):
+        languages = {}
+        default_lang_sys = _read_uint16(data, script_offset)
+        if default_lang_sys:
+            languages[DEFAULT_LANGUAGE_TAG] = _read_lang_sys(data, script_offset + default_lang_sys)
+        for language_tag, lang_sys_offset in _read_records(data, script_offset + 2, base=script_offset):
+            languages[language_tag] = _read_lang_sys(data, lang_sys_offset)
+        scripts[script_tag] = languages
+    return scripts
+
+def _read_lang_sys(data, offset):
+    # lookupOrderOffset, requiredFeatureIndex, featureIndexCount
+    _, required, count = struct.unpack_from(">HHH", data, offset)
+    indices = list(struct.unpack_from(f">{count}H", data, offset + 6))
+    if required != NO_REQUIRED_FEATURE:
+        indices.insert(0, required)
+    return indices
+
+def read_feature_script_languages(data):
+    """
+    {feature tag: {script tag: [language tags]}}
+    """
+    feature_tags = read_feature_tags(data)
+    out = {}
+    for script, languages in read_script_list(data).items():
+        for language, indices in languages.items():
+            for index in indices:
+                if index >= len(feature_tags):
+                    continue
+                script_languages = out.setdefault(feature_tags[index], {}).setdefault(script, [])
+                if language not in script_languages:
+                    script_languages.append(language)
+    return out
@@ -0,0 +1,88 @@
+from fontTools.ttLib import TTFont
+
+import pytest
+
+from SpecimenMachine import fontHelpers
+from SpecimenMachine.fontHelpers import layoutTables
+
+# ----------------------------------------
+# the raw ScriptList/FeatureList readers against the fontTools decompiled tables
+
+FEATURES = """
+languagesystem DFLT dflt;
+languagesystem latn dflt;
+languagesystem latn TRK;
+languagesystem latn ROM;
+languagesystem grek dflt;
+feature smcp { sub A by A.sc; } smcp;
+feature locl {
+    script latn;
+    language TRK exclude_dflt required;
+    sub i by i.TRK;
+    language ROM exclude_dflt;
+    sub a by a.ROM;
+} locl;
+feature liga { sub f i by f_i; } liga;
+feature kern { pos A V -50; } kern;
+feature mark {
+    script latn;
+    language ROM;
+    pos V A -20;
+} mark;
+"""
+
+def reference_script_list(table):
+    scripts = {}
+    if table.ScriptList is None:
+        return scripts
+    for script_record in table.ScriptList.ScriptRecord:
+        languages = {}
+        lang_syses = []
+        if script_record.Script.DefaultLangSys is not None:
+            lang_syses.append((layoutTables.DEFAULT_LANGUAGE_TAG, script_record.Script.DefaultLangSys))
+        lang_syses += [(record.LangSysTag, record.LangSys) for record in script_record.Script.LangSysRecord]
+        for language_tag, lang_sys in lang_syses:
+            indices = list(lang_sys.FeatureIndex)
+            if lang_sys.ReqFeatureIndex != layoutTables.NO_REQUIRED_FEATURE:
+                indices.insert(0, lang_sys.ReqFeatureIndex)
+            languages[language_tag] = indices
+        scripts[script_record.ScriptTag] = languages
+    return scripts
+
+@pytest.fixture(params=["fixture", "required"])
+def layout_font_path(request, font_path, make_font):
+    if request.param == "fixture":
+        return font_path
+    glyph_order = [".notdef", "A", "V", "a", "f", "i", "A.sc", "i.TRK", "a.ROM", "f_i"]
+    cmap = {ord(name): name for name in glyph_order if len(name) == 1}
+    return make_font("Layout-Regular.ttf", glyph_order, cmap, features=FEATURES)
+
+@pytest.mark.parametrize("tag", ["GSUB", "GPOS"])
+def test_raw_layout_reader_matches_fonttools(layout_font_path, tag):
+    font = TTFont(layout_font_path)
+    data = font.reader[tag]
+    table = font[tag].table
+    script_list = layoutTables.read_script_list(data)
+    assert script_list == reference_script_list(table)
+    # tags are kept as stored, space padded
+    assert "TRK " in script_list["latn"]
+    assert layoutTables.read_feature_tags(data) == [record.FeatureTag for record in table.FeatureList.FeatureRecord]
+
+def test_feature_script_languages_match_decompiled_tables(layout_font_path):
+    raw = fontHelpers.FontWrapper(layout_font_path, lazy=True)
+    script_languages = raw.feature_script_languages
+    assert not any(tag in raw.decompiled_tables for tag in ("GSUB", "GPOS"))
+
+    decompiled = fontHelpers.FontWrapper(layout_font_path)
+    decompiled["GSUB"], decompiled["GPOS"]
+    assert decompiled.feature_script_languages == script_languages
+    assert decompiled.feature_tags == raw.feature_tags
+
+def test_language_specific_features(make_font):
+    glyph_order = [".notdef", "A", "V", "a", "f", "i", "A.sc", "i.TRK", "a.ROM", "f_i"]
+    cmap = {ord(name): name for name in glyph_order if len(name) == 1}
+    font = fontHelpers.FontWrapper(make_font("Layout-Regular.ttf", glyph_order, cmap, features=FEATURES), lazy=True)
+    script_languages = font.feature_script_languages
+    assert list(script_languages["locl"]) == ["latn"]
+    assert sorted(script_languages["locl"]["latn"]) == ["ROM ", "TRK "]
+    assert sorted(script_languages["mark"]["latn"]) == ["ROM "]
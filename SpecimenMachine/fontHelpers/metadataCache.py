@@ -0,0 +1,230 @@
+import sqlite3
+import threading
+import hashlib
+import pathlib
+import json
+import time
+import os
+
+# ----------------------------------------
+
+CACHE_VERSION = 1
+CACHE_DIR_ENVIRON_KEY = "SPECIMENMACHINE_CACHE_DIR"
+METADATA_CACHE_FILE_NAME = "font_metadata.sqlite"
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+FONT_NAMESPACE = "font"
+
+# a face of a font collection (.ttc, .otc) is given as "Font.ttc#2"
+FONT_NUMBER_SEPARATOR = "#"
+
+# ----------------------------------------
+
+def get_cache_dir():
+    cache_dir = os.environ.get(CACHE_DIR_ENVIRON_KEY)
+    if cache_dir:
+        return pathlib.Path(cache_dir)
+    return pathlib.Path.home() / ".cache" / "SpecimenMachine"
+
+def split_font_number(path):
+    """
+    (file path, face index) of a font path, the face index is None outside of font collections
+    """
+    file_path, separator, font_number = str(path).rpartition(FONT_NUMBER_SEPARATOR)
+    if separator and font_number.isdigit():
+        return pathlib.Path(file_path), int(font_number)
+    return pathlib.Path(path), None
+
+def get_file_identity(path):
+    file_path, font_number = split_font_number(path)
+    file_path = file_path.resolve()
+    stat = file_path.stat()
+    if font_number is not None:
+        file_path = f"{file_path}{FONT_NUMBER_SEPARATOR}{font_number}"
+    return str(file_path), stat.st_size, stat.st_mtime_ns
+
+def get_file_content_hash(path, chunk_size=1024*1024):
+    file_path, font_number = split_font_number(path)
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    # the faces of a collection have their own metadata
+    if font_number is not None:
+        digest.update(f"{FONT_NUMBER_SEPARATOR}{font_number}".encode("ascii"))
+    return digest.hexdigest()
+
+# ----------------------------------------
+
+class FontMetadataCache():
+    """
+    a persistent font metadata cache stored in a sqlite file.
+
+    font entries are keyed by file identity (path + size + mtime),
+    with the file content hash as a fallback so a touched or moved font
+    still hits the cache.
+    other values (eg. language support) can be stored in their own namespace.
+    the least recently used entries are evicted once the stored values exceed max_size bytes.
+
+    several processes can share the same cache file.
+    """
+
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE):
+        if path is None:
+            path = get_cache_dir() / METADATA_CACHE_FILE_NAME
+        self.path = pathlib.Path(path)
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+        # running total of the stored sizes, other processes writing to the file make it drift
+        # so it is computed again before evicting
+        self._size = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.path}>"
+
+    # pickling only carries the settings, each process opens its own connection
+    def __getstate__(self):
+        return {"path": self.path, "max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    # ----------------------------------------
+    # connection
+
+    @property
+    def connection(self):
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._setup_tables(connection)
+            self._connection = connection
+            self._connection_pid = os.getpid()
+            self._size = None
+        return self._connection
+
+    def _setup_tables(self, connection):
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            connection.execute("DROP TABLE IF EXISTS entries")
+            connection.execute("DROP TABLE IF EXISTS files")
+            connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        connection.execute("""CREATE TABLE IF NOT EXISTS entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL,
+            PRIMARY KEY (namespace, key))""")
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        connection.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            file_size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL)""")
+
+    def close(self):
+        if self._connection is not None and self._connection_pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    # ----------------------------------------
+    # generic values
+
+    def get_value(self, namespace, key, default=None):
+        with self._lock:
+            row = self.connection.execute("SELECT value FROM entries WHERE namespace=? AND key=?", (namespace, key)).fetchone()
+            if row is None:
+                return default
+            self.connection.execute("UPDATE entries SET last_access=? WHERE namespace=? AND key=?", (time.time(), namespace, key))
+        return json.loads(row[0])
+
+    def set_value(self, namespace, key, value):
+        data = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            connection = self.connection
+            if self._size is None:
+                self._size = self._get_stored_size(connection)
+            row = connection.execute("SELECT size FROM entries WHERE namespace=? AND key=?", (namespace, key)).fetchone()
+            connection.execute("INSERT OR REPLACE INTO entries (namespace, key, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                               (namespace, key, data, len(data), time.time()))
+            self._size += len(data) - (row[0] if row else 0)
+            over_budget = self.max_size is not None and self._size > self.max_size
+        if over_budget:
+            self.evict()
+
+    # ----------------------------------------
+    # font metadata
+
+    def get_content_hash(self, path):
+        """
+        the content hash of a font file, only read from disk when the file identity changed
+        """
+        path, file_size, mtime_ns = get_file_identity(path)
+        with self._lock:
+            row = self.connection.execute("SELECT file_size, mtime_ns, content_hash FROM files WHERE path=?", (path,)).fetchone()
+        if row is not None and row[0] == file_size and row[1] == mtime_ns:
+            return row[2]
+        content_hash = get_file_content_hash(path)
+        with self._lock:
+            self.connection.execute("INSERT OR REPLACE INTO files (path, file_size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                                    (path, file_size, mtime_ns, content_hash))
+        return content_hash
+
+    def get_font_metadata(self, path, namespace=FONT_NAMESPACE):
+        return self.get_value(namespace, self.get_content_hash(path))
+
+    def set_font_metadata(self, path, metadata, namespace=FONT_NAMESPACE):
+        self.set_value(namespace, self.get_content_hash(path), metadata)
+
+    # ----------------------------------------
+    # housekeeping
+
+    @staticmethod
+    def _get_stored_size(connection):
+        return connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @property
+    def size(self):
+        with self._lock:
+            self._size = self._get_stored_size(self.connection)
+            return self._size
+
+    def evict(self):
+        """
+        drop the least recently used entries until the cache fits in max_size
+        """
+        if self.max_size is None:
+            return
+        with self._lock:
+            connection = self.connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                total = self._get_stored_size(connection)
+                to_free = total - self.max_size
+                to_delete = []
+                for namespace, key, size in connection.execute("SELECT namespace, key, size FROM entries ORDER BY last_access"):
+                    if to_free <= 0:
+                        break
+                    to_delete.append((namespace, key, size))
+                    to_free -= size
+                connection.executemany("DELETE FROM entries WHERE namespace=? AND key=?", [(namespace, key) for namespace, key, _ in to_delete])
+                if to_delete:
+                    connection.execute("DELETE FROM files WHERE content_hash NOT IN (SELECT key FROM entries)")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                self._size = None
+                raise
+            connection.execute("COMMIT")
+            self._size = total - sum(size for _, _, size in to_delete)
+
+    def clear(self):
+        with self._lock:
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("DELETE FROM files")
+            self._size = 0
@@ -0,0 +1,88 @@
+from SpecimenMachine import fontHelpers
+
+# ----------------------------------------
+
+def test_cache_hits_leave_fonts_unopened(family_dir, metadata_cache, count_opened_fonts):
+    paths = fontHelpers.walk_font_dir(family_dir)
+    parsed = fontHelpers.load_fonts_from_paths(paths, metadata_cache=metadata_cache)
+    assert len(count_opened_fonts) == len(paths)
+
+    count_opened_fonts.clear()
+    for lazy in (False, True):
+        cached = fontHelpers.load_fonts_from_paths(paths, metadata_cache=metadata_cache, lazy=lazy)
+        assert [f.path for f in cached] == [f.path for f in parsed]
+        for font, reference in zip(cached, parsed):
+            assert not font.is_open
+            for key in ["prefered_family_name", "prefered_style_name", "feature_tags", "version", "designer", "copyright", "feature_script_languages", "rcmap"]:
+                assert getattr(font, key) == getattr(reference, key)
+            assert font.get_sorting_score() == reference.get_sorting_score()
+    assert count_opened_fonts == []
+
+def test_cache_hits_with_workers(family_dir, metadata_cache, count_opened_fonts):
+    paths = fontHelpers.walk_font_dir(family_dir)
+    serial = fontHelpers.load_fonts_from_paths(paths)
+    parallel = fontHelpers.load_fonts_from_paths(paths, workers=2, metadata_cache=metadata_cache)
+    assert [f.path for f in parallel] == [f.path for f in serial]
+
+    count_opened_fonts.clear()
+    fontHelpers.load_fonts_from_paths(paths, workers=2, metadata_cache=metadata_cache)
+    assert count_opened_fonts == []
+
+def test_opening_a_cached_font_on_demand(font_path, metadata_cache):
+    fontHelpers.load_fonts_from_paths([font_path], metadata_cache=metadata_cache)
+    font = fontHelpers.load_fonts_from_paths([font_path], metadata_cache=metadata_cache, lazy=True)[0]
+    assert not font.is_open
+    # anything outside of the metadata opens the font
+    assert font["head"].unitsPerEm == 1000
+    assert font.is_open
+
+def test_changed_font_is_parsed_again(font_path, metadata_cache, count_opened_fonts):
+    fontHelpers.load_fonts_from_paths([font_path], metadata_cache=metadata_cache)
+    font = fontHelpers.FontWrapper(font_path)
+    font["name"].removeNames(nameID=17)
+    font["name"].addMultilingualName({"en": "Changed"}, nameID=17)
+    font.save(font_path)
+
+    count_opened_fonts.clear()
+    reloaded = fontHelpers.load_fonts_from_paths([font_path], metadata_cache=metadata_cache)[0]
+    assert count_opened_fonts == [font_path]
+    assert reloaded.prefered_style_name == "Changed"
+
+def test_lazy_font_releases_tables(font_path):
+    font = fontHelpers.FontWrapper(font_path, lazy=True)
+    glyph_order = font.glyph_order
+    assert "glyf" not in font.decompiled_tables
+    font["glyf"]
+    assert font.release_tables(["glyf"]) == ["glyf"]
+    assert "glyf" not in font.decompiled_tables
+    assert font.glyph_order == glyph_order
+    assert font["glyf"]["A"].numberOfContours == 1
+
+# ----------------------------------------
+
+def test_eviction_keeps_the_cache_under_max_size(metadata_cache):
+    metadata_cache.max_size = 1000
+    for i in range(50):
+        metadata_cache.set_value("test", f"key{i}", "x" * 90)
+    assert metadata_cache.size <= 1000
+    # least recently used entries go first
+    assert metadata_cache.get_value("test", "key0") is None
+    assert metadata_cache.get_value("test", "key49") == "x" * 90
+
+def test_running_size_follows_replaced_entries(metadata_cache):
+    metadata_cache.set_value("test", "key", "x" * 100)
+    metadata_cache.set_value("test", "key", "x" * 10)
+    assert metadata_cache._size == metadata_cache.size
+
+def test_failed_eviction_rolls_back(metadata_cache, monkeypatch):
+    metadata_cache.set_value("test", "key", "value")
+    metadata_cache.max_size = 1
+
+    def fail(connection):
+        raise RuntimeError("size")
+    monkeypatch.setattr(fontHelpers.FontMetadataCache, "_get_stored_size", staticmethod(fail))
+    try:
+        metadata_cache.evict()
+    except RuntimeError:
+        pass
+    assert not metadata_cache.connection.in_transaction
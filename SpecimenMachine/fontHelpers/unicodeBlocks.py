@@ -0,0 +1,112 @@
+import unicodedata
+import bisect
+import array
+
+# ----------------------------------------
+
+UNASSIGNED_CATEGORY = "Cn"
+
+# ----------------------------------------
+
+def parse_blocks_file(path):
+    """
+    [(start, end, block name)] from a unicode Blocks.txt file
+    """
+    blocks = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            ranges, name = line.split(";", 1)
+            start, end = ranges.split("..")
+            blocks.append((int(start, 16), int(end, 16), name.strip()))
+    return sorted(blocks)
+
+# ----------------------------------------
+
+class UnicodeBlockIndex():
+    """
+    codepoint -> unicode block lookups on sorted block ranges,
+    and block coverage counted in a single pass over a set of codepoints
+    """
+
+    def __init__(self, blocks):
+        self.starts = array.array("l", [start for start, end, name in blocks])
+        self.ends = array.array("l", [end for start, end, name in blocks])
+        self.names = [name for start, end, name in blocks]
+        self._positions = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self)} blocks>"
+
+    def get_block_position(self, codepoint):
+        i = bisect.bisect_right(self.starts, codepoint) - 1
+        if i >= 0 and codepoint <= self.ends[i]:
+            return i
+        return None
+
+    def get_block_name(self, codepoint):
+        i = self.get_block_position(codepoint)
+        if i is not None:
+            return self.names[i]
+
+    def get_block_range(self, name):
+        i = self._positions[name]
+        return self.starts[i], self.ends[i]
+
+    @property
+    def assigned_counts(self):
+        """
+        the number of assigned codepoints in each block, according to unicodedata
+        """
+        if not hasattr(self, "_assigned_counts"):
+            counts = array.array("l", [0] * len(self))
+            for i, (start, end) in enumerate(zip(self.starts, self.ends)):
+                counts[i] = sum(1 for c in range(start, end + 1) if unicodedata.category(chr(c)) != UNASSIGNED_CATEGORY)
+            self._assigned_counts = counts
+        return self._assigned_counts
+
+    def count_codepoints(self, codepoints):
+        """
+        the number of codepoints falling in each block, in block order
+        """
+        counts = array.array("l", [0] * len(self))
+        starts = self.starts
+        ends = self.ends
+        for codepoint in codepoints:
+            i = bisect.bisect_right(starts, codepoint) - 1
+            if i >= 0 and codepoint <= ends[i]:
+                counts[i] += 1
+        return counts
+
+    def get_coverage(self, codepoints=None, counts=None, include_empty=False):
+        """
+        {block name: {"start", "end", "covered", "assigned", "percent"}} in block order.
+        percent is relative to the assigned codepoints of the block.
+        either codepoints or precomputed counts (see count_codepoints) must be given.
+        """
+        if counts is None:
+            counts = self.count_codepoints(codepoints)
+        assigned_counts = self.assigned_counts
+        coverage = {}
+        for i, name in enumerate(self.names):
+            covered = counts[i]
+            if not covered and not include_empty:
+                continue
+            assigned = assigned_counts[i]
+            if assigned:
+                percent = round(min(covered / assigned, 1) * 100, 2)
+            else:
+                percent = 0.0
+            coverage[name] = {
+                "start": self.starts[i],
+                "end": self.ends[i],
+                "covered": covered,
+                "assigned": assigned,
+                "percent": percent,
+                }
+        return coverage
@@ -0,0 +1,53 @@
+import unicodedata
+
+from fontTools.ttLib import TTFont
+
+from SpecimenMachine import fontHelpers
+from SpecimenMachine.fontHelpers import unicodeBlocks
+
+# ----------------------------------------
+
+BLOCKS = [(0x0000, 0x007F, "Basic Latin"), (0x0080, 0x00FF, "Latin-1 Supplement"), (0x0370, 0x03FF, "Greek and Coptic")]
+
+def test_block_boundaries():
+    index = unicodeBlocks.UnicodeBlockIndex(BLOCKS)
+    assert index.get_block_name(0x0000) == "Basic Latin"
+    assert index.get_block_name(0x007F) == "Basic Latin"
+    assert index.get_block_name(0x0080) == "Latin-1 Supplement"
+    assert index.get_block_name(0x00FF) == "Latin-1 Supplement"
+    assert index.get_block_range("Greek and Coptic") == (0x0370, 0x03FF)
+    # between blocks, and past the last one
+    assert index.get_block_name(0x0100) is None
+    assert index.get_block_name(0x036F) is None
+    assert index.get_block_name(0x0400) is None
+    assert list(index.count_codepoints([0x41, 0x7F, 0x80, 0x100, 0x391, 0x10000])) == [2, 1, 1]
+
+def test_unassigned_codepoints():
+    index = fontHelpers.fontHelpers.get_unicode_block_index()
+    # a codepoint of no block
+    assert index.get_block_name(0x2FE0) is None
+    # Greek and Coptic has unassigned codepoints, they do not count in its coverage
+    start, end = index.get_block_range("Greek and Coptic")
+    unassigned = [c for c in range(start, end + 1) if unicodedata.category(chr(c)) == "Cn"]
+    assert unassigned
+    position = index.get_block_position(start)
+    assert index.assigned_counts[position] == end - start + 1 - len(unassigned)
+    coverage = index.get_coverage(codepoints=range(start, end + 1))
+    assert coverage["Greek and Coptic"]["covered"] == end - start + 1
+    assert coverage["Greek and Coptic"]["percent"] == 100
+
+def test_font_coverage_matches_a_scan_of_the_cmap(font_path):
+    font = fontHelpers.FontWrapper(font_path)
+    codepoints = set(TTFont(font_path).getBestCmap())
+    index = fontHelpers.fontHelpers.get_unicode_block_index()
+    coverage = font.get_unicode_block_coverage()
+    expected = {}
+    for start, end, name in fontHelpers.fontHelpers.get_spec("unicode_blocks"):
+        covered = sum(1 for c in codepoints if start <= c <= end)
+        if covered:
+            expected[name] = covered
+    assert {name: block["covered"] for name, block in coverage.items()} == expected
+    assert list(coverage) == [name for name in index.names if name in expected]
+    basic_latin = coverage["Basic Latin"]
+    assert basic_latin["percent"] == round(basic_latin["covered"] / basic_latin["assigned"] * 100, 2)
+    assert len(font.get_unicode_block_coverage(include_empty=True)) == len(index)
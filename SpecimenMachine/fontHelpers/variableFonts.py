@@ -0,0 +1,314 @@
+from fontTools.ttLib import TTFont
+
+import concurrent.futures
+import itertools
+import hashlib
+import pathlib
+import json
+import os
+
+from .metadataCache import get_cache_dir, get_file_content_hash, get_file_identity, split_font_number
+from .. import tracing
+
+# fontTools.varLib.instancer is only imported by the processes instancing fonts
+
+# ----------------------------------------
+
+INSTANCES_CACHE_VERSION = 1
+INSTANCES_CACHE_DIR_NAME = "instances"
+
+# the fvar axes and named instances of each font in a FontMetadataCache, bump when their format changes
+VARIATIONS_NAMESPACE = "variations-v1"
+
+# usWidthClass -> wdth axis value (percent of the normal width)
+WIDTH_CLASS_PERCENTS = {1: 50, 2: 62.5, 3: 75, 4: 87.5, 5: 100, 6: 112.5, 7: 125, 8: 150, 9: 200}
+
+RIBBI_STYLE_NAMES = ["Regular", "Italic", "Bold", "Bold Italic"]
+
+# instances of a font collection face are single fonts
+INSTANCE_FILE_SUFFIXES = {".ttc": ".ttf", ".otc": ".otf"}
+
+# ----------------------------------------
+
+def get_width_class(width_percent):
+    return min(WIDTH_CLASS_PERCENTS, key=lambda width_class: abs(WIDTH_CLASS_PERCENTS[width_class] - width_percent))
+
+def get_axis_grid_locations(axes, axis_grid):
+    """
+    every location of an axis grid, as {axis tag: value}.
+    axis_grid is {axis tag: [values] or a number of evenly spaced values from the axis min to its max},
+    axes is {axis tag: (min, default, max)}. axes outside the grid stay at their default.
+    """
+    values = []
+    for tag, grid in axis_grid.items():
+        if tag not in axes:
+            continue
+        minimum, default, maximum = axes[tag]
+        if isinstance(grid, int):
+            if grid < 2:
+                grid = [default]
+            else:
+                grid = [minimum + (maximum - minimum) * i / (grid - 1) for i in range(grid)]
+        values.append([(tag, min(max(float(v), minimum), maximum)) for v in grid])
+    if not values:
+        return []
+    return [dict(location) for location in itertools.product(*values)]
+
+def get_location_style_name(location, axes):
+    """
+    a style name for a location off the named instances, eg. "wght 350 wdth 87.5"
+    """
+    parts = [f"{tag} {value:g}" for tag, value in location.items() if value != axes[tag][1]]
+    return " ".join(parts) or "Default"
+
+
+class FontInstance():
+    """
+    a location of a variable font, and the names of the static font instanced there
+    """
+
+    def __init__(self, location, style_name, postscript_name=None):
+        self.location = location
+        self.style_name = style_name
+        self.postscript_name = postscript_name
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.style_name}>"
+
+    @property
+    def location_key(self):
+        return json.dumps(sorted(self.location.items()))
+
+def open_font(path, **kwargs):
+    # a font file, or a face of a font collection
+    file_path, font_number = split_font_number(path)
+    return TTFont(file_path, fontNumber=-1 if font_number is None else font_number, **kwargs)
+
+def read_font_variations(font):
+    """
+    the json friendly fvar axes and named instances of a font, None for a static font:
+    {"family_name", "default_style_name", "axes": {axis tag: [min, default, max]},
+     "named_instances": [{"location": {axis tag: value}, "style_name", "postscript_name"}]}
+    """
+    if "fvar" not in font:
+        return None
+    name = font["name"]
+    axes = {axis.axisTag: [axis.minValue, axis.defaultValue, axis.maxValue] for axis in font["fvar"].axes}
+    named_instances = []
+    for instance in font["fvar"].instances:
+        named_instances.append({
+            "location": {tag: instance.coordinates.get(tag, default) for tag, (_, default, _) in axes.items()},
+            "style_name": name.getDebugName(instance.subfamilyNameID),
+            "postscript_name": name.getDebugName(instance.postscriptNameID) if instance.postscriptNameID != 0xFFFF else None,
+            })
+    return {
+        "family_name": name.getDebugName(16) or name.getDebugName(1),
+        "default_style_name": name.getDebugName(17) or name.getDebugName(2),
+        "axes": axes,
+        "named_instances": named_instances,
+        }
+
+# ----------------------------------------
+
+class VariableFontInstancer():
+    """
+    expands variable fonts into static fonts: one for each fvar named instance
+    (when named_instances is True) and one for each location of axis_grid (see get_axis_grid_locations).
+    both can be given to expand, an instancer can then be shared by collections with different settings.
+
+    instances are made in worker processes (workers=None uses one per cpu) and saved in the cache directory,
+    keyed by the source file content and the location: the next runs use the saved files.
+    the static fonts get the instance names (name IDs 1, 2, 4, 6, 16, 17) and the OS/2 weight and width
+    classes of their location, so they are named and sorted as any static font.
+
+    with a FontMetadataCache, the fvar of each font is read once and stored there,
+    fonts found in the cache are not opened to tell whether they are variable.
+
+    sources maps each instance path back to its variable font.
+    """
+
+    def __init__(self, named_instances=True, axis_grid=None, workers=None, cache_dir=None, metadata_cache=None):
+        self.named_instances = named_instances
+        self.axis_grid = axis_grid or {}
+        self.workers = workers
+        if cache_dir is None:
+            cache_dir = get_cache_dir() / INSTANCES_CACHE_DIR_NAME
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.metadata_cache = metadata_cache
+        self.sources = {}
+        # file identity -> read_font_variations result
+        self._variations = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.cache_dir}>"
+
+    # ----------------------------------------
+
+    def get_variations(self, path):
+        """
+        the fvar axes and named instances of a font (see read_font_variations), None for a static font
+        """
+        identity = get_file_identity(path)
+        if identity not in self._variations:
+            self._variations[identity] = self._read_variations(path)
+        return self._variations[identity]
+
+    def _read_variations(self, path):
+        if self.metadata_cache is not None:
+            cached = self.metadata_cache.get_font_metadata(path, namespace=VARIATIONS_NAMESPACE)
+            if cached is not None:
+                return cached["variations"]
+        # only the table directory, fvar and name are read
+        font = open_font(path, lazy=True)
+        try:
+            variations = read_font_variations(font)
+        finally:
+            font.close()
+        if self.metadata_cache is not None:
+            self.metadata_cache.set_font_metadata(path, {"variations": variations}, namespace=VARIATIONS_NAMESPACE)
+        return variations
+
+    def get_instances(self, path, named_instances=None, axis_grid=None):
+        """
+        (family name, {axis tag: (min, default, max)}, [FontInstance]) of a variable font, None for a static font.
+        named_instances and axis_grid default to the instancer ones
+        """
+        variations = self.get_variations(path)
+        if variations is None:
+            return None
+        if named_instances is None:
+            named_instances = self.named_instances
+        if axis_grid is None:
+            axis_grid = self.axis_grid
+        axes = {tag: tuple(values) for tag, values in variations["axes"].items()}
+        instances = []
+        if named_instances:
+            for instance in variations["named_instances"]:
+                instances.append(FontInstance(dict(instance["location"]), instance["style_name"], instance["postscript_name"]))
+        for grid_location in get_axis_grid_locations(axes, axis_grid):
+            location = {tag: grid_location.get(tag, default) for tag, (_, default, _) in axes.items()}
+            instances.append(FontInstance(location, get_location_style_name(location, axes)))
+        if not instances:
+            # nothing asked, the default location then
+            location = {tag: default for tag, (_, default, _) in axes.items()}
+            instances.append(FontInstance(location, variations["default_style_name"]))
+        # a location is only instanced once, named instances come first
+        unique = {}
+        for instance in instances:
+            unique.setdefault(instance.location_key, instance)
+        return variations["family_name"], axes, list(unique.values())
+
+    def get_instance_path(self, path, instance):
+        if self.metadata_cache is not None:
+            source_hash = self.metadata_cache.get_content_hash(path)
+        else:
+            source_hash = get_file_content_hash(path)
+        key = hashlib.sha1(f"{INSTANCES_CACHE_VERSION}\0{source_hash}\0{instance.location_key}\0{instance.style_name}".encode("utf-8")).hexdigest()
+        file_path, font_number = split_font_number(path)
+        name = file_path.stem if font_number is None else f"{file_path.stem}-{font_number}"
+        suffix = INSTANCE_FILE_SUFFIXES.get(file_path.suffix, file_path.suffix)
+        return self.cache_dir / f"{name}-{key[:16]}{suffix}"
+
+    # ----------------------------------------
+
+    @tracing.traced("fonts.instance", "fonts")
+    def expand(self, paths, named_instances=None, axis_grid=None):
+        """
+        paths with each variable font replaced by its instances (see get_instances), instancing the missing ones
+        """
+        expanded = []
+        # instance path -> _instance_font arguments, a path listed twice is instanced once
+        to_instance = {}
+        for path in paths:
+            variations = self.get_instances(path, named_instances=named_instances, axis_grid=axis_grid)
+            if variations is None:
+                expanded.append(path)
+                continue
+            family_name, axes, instances = variations
+            for instance in instances:
+                instance_path = self.get_instance_path(path, instance)
+                self.sources[instance_path] = pathlib.Path(path)
+                expanded.append(instance_path)
+                if not instance_path.exists():
+                    to_instance[instance_path] = (str(path), tuple(instance.location.items()), family_name, instance.style_name, instance.postscript_name, str(instance_path))
+        if to_instance:
+            self._instance_fonts(list(to_instance.values()))
+        return expanded
+
+    def _instance_fonts(self, to_instance):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        workers = min(workers, len(to_instance))
+        if workers <= 1:
+            for args in to_instance:
+                _instance_font(*args)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                # list() raises the first failure
+                list(pool.map(_instance_font, *zip(*to_instance)))
+
+    def get_source_path(self, path):
+        """
+        the variable font an instance comes from, or path itself
+        """
+        return self.sources.get(pathlib.Path(path), pathlib.Path(path))
+
+# ----------------------------------------
+
+def _instance_font(source_path, location, family_name, style_name, postscript_name, output_path):
+    # runs in a worker process
+    from fontTools.varLib import instancer
+
+    location = dict(location)
+    font = open_font(source_path)
+    instancer.instantiateVariableFont(font, location, inplace=True)
+    _set_instance_names(font, family_name, style_name, postscript_name)
+    _set_instance_classes(font, location, style_name)
+
+    # written aside then moved, a concurrent run never sees a partial file
+    output_path = pathlib.Path(output_path)
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    font.save(temp_path)
+    font.close()
+    os.replace(temp_path, output_path)
+    return output_path
+
+def _set_instance_names(font, family_name, style_name, postscript_name):
+    name = font["name"]
+    if style_name in RIBBI_STYLE_NAMES:
+        legacy_family_name, legacy_style_name = family_name, style_name
+    else:
+        legacy_family_name = f"{family_name} {style_name}"
+        legacy_style_name = "Italic" if "Italic" in style_name.split() else "Regular"
+    if postscript_name is None:
+        postscript_name = f"{family_name}-{style_name}".replace(" ", "")
+    names = {
+        1: legacy_family_name,
+        2: legacy_style_name,
+        3: f"{postscript_name};{font['head'].fontRevision:.3f}",
+        4: f"{family_name} {style_name}",
+        6: postscript_name,
+        16: family_name,
+        17: style_name,
+        }
+    for name_id, value in names.items():
+        name.removeNames(nameID=name_id)
+        name.addMultilingualName({"en": value}, nameID=name_id, windows=True, mac=False)
+    # the variations postscript name prefix means nothing for a static font
+    name.removeNames(nameID=25)
+
+def _set_instance_classes(font, location, style_name):
+    os2 = font["OS/2"]
+    if "wght" in location:
+        os2.usWeightClass = int(round(min(max(location["wght"], 1), 1000)))
+    if "wdth" in location:
+        os2.usWidthClass = get_width_class(location["wdth"])
+
+    italic = location.get("ital", 0) >= .5 or "Italic" in style_name.split()
+    bold = os2.usWeightClass >= 700 and "bold" in style_name.lower()
+    # fsSelection: italic bit 0, bold bit 5, regular bit 6
+    os2.fsSelection &= ~(1 | 1 << 5 | 1 << 6)
+    os2.fsSelection |= (1 if italic else 0) | (1 << 5 if bold else 0) | (1 << 6 if not (italic or bold) else 0)
+    # macStyle: bold bit 0, italic bit 1
+    head = font["head"]
+    head.macStyle = (head.macStyle & ~3) | (1 if bold else 0) | (2 if italic else 0)
@@ -0,0 +1,48 @@
+from fontTools.ttLib import TTFont
+
+from SpecimenMachine import fontHelpers
+
+# ----------------------------------------
+
+def get_named_instances(path):
+    font = TTFont(path)
+    return [(font["name"].getDebugName(instance.subfamilyNameID), instance.coordinates) for instance in font["fvar"].instances]
+
+# ----------------------------------------
+
+def test_variations_are_read_from_fvar(variable_font_path, font_path, tmp_path):
+    instancer = fontHelpers.VariableFontInstancer(workers=1, cache_dir=tmp_path / "instances")
+    assert instancer.get_variations(font_path) is None
+    named_instances = get_named_instances(variable_font_path)
+    family_name, axes, instances = instancer.get_instances(variable_font_path)
+    assert family_name == "Varia"
+    assert axes == {"wght": (100, 400, 900), "wdth": (75, 100, 100)}
+    assert [(i.style_name, i.location) for i in instances] == named_instances
+
+    # the instance selection is given per call, the fvar is only read once
+    _, _, grid = instancer.get_instances(variable_font_path, named_instances=False, axis_grid={"wght": [100, 900]})
+    assert [i.location for i in grid] == [{"wght": 100, "wdth": 100}, {"wght": 900, "wdth": 100}]
+
+def test_expanded_instances_are_static_fonts(variable_font_path, font_path, tmp_path):
+    instancer = fontHelpers.VariableFontInstancer(workers=1, cache_dir=tmp_path / "instances")
+    named_instances = get_named_instances(variable_font_path)
+    paths = instancer.expand([variable_font_path, font_path])
+    assert len(paths) == len(named_instances) + 1
+    assert paths[-1] == font_path
+    for path, (style, location) in zip(paths, named_instances):
+        assert instancer.get_source_path(path) == variable_font_path
+        font = TTFont(path)
+        assert "fvar" not in font
+        assert font["name"].getDebugName(17) == style
+        assert font["OS/2"].usWeightClass == location["wght"]
+
+def test_cached_variations_leave_fonts_unopened(variable_font_path, family_dir, metadata_cache, tmp_path, monkeypatch):
+    paths = [variable_font_path] + fontHelpers.walk_font_dir(family_dir)
+    expanded = fontHelpers.VariableFontInstancer(workers=1, cache_dir=tmp_path / "instances", metadata_cache=metadata_cache).expand(paths)
+
+    opened = []
+    original_open_font = fontHelpers.variableFonts.open_font
+    monkeypatch.setattr(fontHelpers.variableFonts, "open_font", lambda path, **kwargs: opened.append(path) or original_open_font(path, **kwargs))
+    instancer = fontHelpers.VariableFontInstancer(workers=1, cache_dir=tmp_path / "instances", metadata_cache=metadata_cache)
+    assert instancer.expand(paths) == expanded
+    assert opened == []
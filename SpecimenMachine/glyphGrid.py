@@ -0,0 +1,140 @@
+from fontTools.pens.transformPen import TransformPen
+
+from .specimenMachine import SMBase
+from .renderBackends import db
+from . import tracing
+
+# ----------------------------------------
+
+DEFAULT_PAGE_SIZE = (595, 842)
+
+# ----------------------------------------
+
+class GridPage():
+    """
+    the labels and glyphs of a page, with their positions
+    """
+
+    def __init__(self):
+        # (text, x, y) and (glyph name, x, y), y is the bottom of the cell
+        self.labels = []
+        self.glyphs = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self.glyphs)} glyphs>"
+
+
+class SMGlyphGrid(SMBase):
+    """
+    draws the glyphs of a font in a grid of cells, from their cached outlines (see GlyphOutlineStore):
+    no text is shaped, unencoded glyphs are drawn as well.
+
+    glyphs is a list of glyph names, or {category: [glyph names]} as given by
+    SMGlyphSorter.categorise_glyph_for_font (each category starts a row, under its label),
+    None for every glyph of the font.
+
+    the layout is computed once for the page size, cell size and margins,
+    then every page draws all its glyphs as a single path.
+    """
+
+    def __init__(self, font, glyphs=None, page_size=DEFAULT_PAGE_SIZE, cell_size=40, margin=40, gap=0, label_font=None, label_size=8, fill=0):
+        self.font = font
+        self.outlines = font.glyph_outlines
+        if glyphs is None:
+            glyphs = font.glyph_order
+        if not isinstance(glyphs, dict):
+            glyphs = {None: glyphs}
+        self.sections = [(label, list(names)) for label, names in glyphs.items() if names]
+        self.page_size = page_size
+        self.cell_size = cell_size
+        self.margin = margin
+        self.gap = gap
+        self.label_font = label_font
+        self.label_size = label_size
+        self.fill = fill
+
+    @property
+    def scale(self):
+        return self.cell_size / self.outlines.upm
+
+    @property
+    def columns(self):
+        width = self.page_size[0] - 2 * self.margin
+        return max(1, int((width + self.gap) // (self.cell_size + self.gap)))
+
+    @property
+    def pages(self):
+        """
+        [GridPage], computed once
+        """
+        if not hasattr(self, "_pages"):
+            self._pages = self._layout()
+        return self._pages
+
+    def _layout(self):
+        width, height = self.page_size
+        step = self.cell_size + self.gap
+        label_height = self.label_size * 2
+        bottom = self.margin
+
+        pages = [GridPage()]
+        top = height - self.margin
+        for label, names in self.sections:
+            # a label needs a row of glyphs under it on the same page
+            needed = (label_height if label is not None else 0) + self.cell_size
+            if top - needed < bottom and (pages[-1].glyphs or pages[-1].labels):
+                pages.append(GridPage())
+                top = height - self.margin
+            if label is not None:
+                top -= label_height
+                pages[-1].labels.append((label, self.margin, top + self.label_size * .5))
+            for start in range(0, len(names), self.columns):
+                if top - self.cell_size < bottom and pages[-1].glyphs:
+                    pages.append(GridPage())
+                    top = height - self.margin
+                top -= self.cell_size
+                for column, name in enumerate(names[start:start + self.columns]):
+                    pages[-1].glyphs.append((name, self.margin + column * step, top))
+                top -= self.gap
+        return pages
+
+    # ----------------------------------------
+
+    def get_page_path(self, page):
+        """
+        a single BezierPath with every glyph of the page, centered in its cell on the font baseline
+        """
+        path = db.BezierPath()
+        scale = self.scale
+        baseline = -self.font["hhea"].descent * scale
+        for name, x, y in page.glyphs:
+            outline = self.outlines.get_outline(name)
+            dx = x + (self.cell_size - outline.width * scale) / 2
+            outline.draw(TransformPen(path, (scale, 0, 0, scale, dx, y + baseline)))
+        return path
+
+    def draw(self, new_pages=True):
+        """
+        draw the grid, starting a page for each grid page.
+        with new_pages=False the grid is drawn on the current page, it must fit a single page
+        """
+        if not new_pages and len(self.pages) > 1:
+            raise ValueError(f"the glyph grid of {self.font.path.name} needs {len(self.pages)} pages, it can not be drawn on the current page")
+        with tracing.span("glyphGrid.draw", "draw", font=self.font.path.name, pages=len(self.pages)):
+            for page in self.pages:
+                if new_pages:
+                    db.newPage(*self.page_size)
+                self.draw_page(page)
+            self.outlines.save()
+
+    def draw_page(self, page):
+        with db.savedState():
+            if page.labels:
+                if self.label_font is not None:
+                    db.font(str(self.label_font))
+                db.fontSize(self.label_size)
+                db.fill(self.fill)
+                for label, x, y in page.labels:
+                    db.text(label, (x, y))
+            db.fill(self.fill)
+            db.drawPath(self.get_page_path(page))
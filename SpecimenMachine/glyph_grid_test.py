@@ -0,0 +1,42 @@
+import pytest
+
+from SpecimenMachine import fontHelpers, renderBackends
+from SpecimenMachine.glyphGrid import SMGlyphGrid
+
+# ----------------------------------------
+
+@pytest.fixture
+def grid_font(make_font):
+    glyph_order = [".notdef"] + [f"glyph{i}" for i in range(39)]
+    return fontHelpers.FontWrapper(make_font("Grid-Regular.ttf", glyph_order, {}))
+
+def test_grid_page_count(grid_font):
+    # 4 columns and 4 rows per page, 10 rows of glyphs
+    grid = SMGlyphGrid(grid_font, page_size=(200, 200), cell_size=40, margin=20)
+    assert grid.columns == 4
+    assert [len(page.glyphs) for page in grid.pages] == [16, 16, 8]
+    assert [name for page in grid.pages for name, x, y in page.glyphs] == grid_font.glyph_order
+
+    backend = renderBackends.set_backend("recording")
+    grid.draw()
+    assert backend.pageCount() == 3
+    assert [[name for name, args, kwargs in page.calls].count("drawPath") for page in backend._pages] == [1, 1, 1]
+
+def test_grid_labels_start_rows(grid_font):
+    glyphs = {"first": grid_font.glyph_order[:5], "second": grid_font.glyph_order[5:6]}
+    grid = SMGlyphGrid(grid_font, glyphs=glyphs, page_size=(200, 1000), cell_size=40, margin=20)
+    assert len(grid.pages) == 1
+    assert [label for label, x, y in grid.pages[0].labels] == ["first", "second"]
+    # 4 columns: the first category takes two rows, the second starts a row
+    rows = sorted({y for name, x, y in grid.pages[0].glyphs}, reverse=True)
+    assert len(rows) == 3
+
+def test_grid_on_the_current_page_must_fit_a_page(grid_font):
+    renderBackends.set_backend("recording")
+    grid = SMGlyphGrid(grid_font, page_size=(200, 200), cell_size=40, margin=20)
+    with pytest.raises(ValueError):
+        grid.draw(new_pages=False)
+    single = SMGlyphGrid(grid_font, glyphs=grid_font.glyph_order[:16], page_size=(200, 200), cell_size=40, margin=20)
+    renderBackends.db.newPage(200, 200)
+    single.draw(new_pages=False)
+    assert renderBackends.db.pageCount() == 1
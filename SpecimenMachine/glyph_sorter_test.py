@@ -0,0 +1,141 @@
+from fontTools.ttLib import TTFont
+from collections import OrderedDict
+import unicodedata
+
+import pytest
+
+from SpecimenMachine import fontHelpers, SMGlyphSorter, SMGlyphSorterQuery
+
+# ----------------------------------------
+# the glyph categorisation as it was done glyph by glyph, query by query,
+# the indexed categorisation and the glyph table must give the same results
+
+def reference_glyph_attributes(name, rcmap):
+    unicode = rcmap.get(name)
+    unicode = list(unicode)[0] if unicode else None
+    parts = name.split(".")
+    root, suffix = parts[0], parts[1:] or None
+    pseudo_unicode = rcmap.get(root)
+    pseudo_unicode = list(pseudo_unicode)[0] if pseudo_unicode else None
+    return {
+        "name": name,
+        "unicode": unicode,
+        "pseudo_unicode": pseudo_unicode,
+        "root": root,
+        "suffix": suffix,
+        "unicode_category": unicodedata.category(chr(pseudo_unicode)) if pseudo_unicode else None,
+        "suffix_category": reference_suffix_category(suffix),
+        "is_composed_character": unicodedata.decomposition(chr(pseudo_unicode)) != "" if pseudo_unicode else False,
+        }
+
+def reference_suffix_category(suffix):
+    for s in suffix or []:
+        for category, suffixes in fontHelpers.CatGlyph.SUFFIX_CATEGORIES.items():
+            if s in suffixes:
+                return category
+
+class ReferenceGlyph():
+
+    def __init__(self, attributes):
+        self.__dict__.update(attributes)
+
+def reference_categorise(path, ignore=(".notdef", ".null", "CR", "space", "uni00A0", "uni2009")):
+    font = TTFont(path)
+    rcmap = font["cmap"].buildReversed()
+    categories = OrderedDict()
+    for name in font.getGlyphOrder():
+        if name in ignore:
+            continue
+        glyph = ReferenceGlyph(reference_glyph_attributes(name, rcmap))
+        for category, queries in SMGlyphSorter.category_queries.items():
+            if all(query.test_glyph(glyph) for query in queries):
+                categories.setdefault(category, []).append(name)
+                break
+        else:
+            categories.setdefault("Other", []).append(name)
+    return categories
+
+# ----------------------------------------
+
+ENCODED = {
+    "space": 0x20, "A": 0x41, "B": 0x42, "Z": 0x5A, "a": 0x61, "b": 0x62, "z": 0x7A,
+    "Agrave": 0xC0, "Eacute": 0xC9, "agrave": 0xE0, "eacute": 0xE9, "germandbls": 0xDF,
+    "hyphen": 0x2D, "parenleft": 0x28, "parenright": 0x29, "guillemotleft": 0xAB, "underscore": 0x5F,
+    "zero": 0x30, "one": 0x31, "nine": 0x39, "dollar": 0x24, "Euro": 0x20AC,
+    "plus": 0x2B, "plusminus": 0xB1, "copyright": 0xA9, "arrowright": 0x2192,
+    "gravecomb": 0x300, "acutecomb": 0x301, "onesuperior": 0xB9, "onehalf": 0xBD,
+    "uni00A0": 0xA0, "florin": 0x192, "ordfeminine": 0xAA,
+    }
+UNENCODED = [
+    "A.sc", "a.sc", "hyphen.case", "parenleft.case", "guillemotleft.cap",
+    "zero.onum.pnum", "one.osf", "nine.tosf", "zero.lf", "one.tf", "dollar.onum.tnum", "Euro.lnum.tnum",
+    "zero.sups", "one.numr", "f_i", "A.alt.ss01", "a.ss01", "plus.case", "copyright.case", "unknown.case",
+    ]
+
+@pytest.fixture
+def sorter_font_path(make_font):
+    glyph_order = [".notdef"] + list(ENCODED) + UNENCODED
+    # a glyph mapped twice, and a codepoint outside of the BMP
+    cmap = {codepoint: name for name, codepoint in ENCODED.items()}
+    cmap[0x2010] = "hyphen"
+    cmap[0x1D400] = "A.sc"
+    return make_font("Sorter-Regular.ttf", glyph_order, cmap)
+
+def test_categorisation_matches_the_reference(sorter_font_path):
+    font = fontHelpers.FontWrapper(sorter_font_path)
+    categories = SMGlyphSorter().categorise_glyph_for_font(font)
+    reference = reference_categorise(sorter_font_path)
+    assert categories == reference
+    assert list(categories) == list(reference)
+
+def test_categorisation_is_shared_and_stable(sorter_font_path, metadata_cache):
+    sorter = SMGlyphSorter()
+    first = sorter.categorise_glyph_for_font(fontHelpers.FontWrapper(sorter_font_path))
+    # from cached metadata, without opening the font
+    fontHelpers.load_fonts_from_paths([sorter_font_path], metadata_cache=metadata_cache)
+    cached = fontHelpers.load_fonts_from_paths([sorter_font_path], metadata_cache=metadata_cache)[0]
+    assert sorter.categorise_glyph_for_font(cached) == first
+    # handed out categories are copies
+    first["Uppercases"].append("changed")
+    assert "changed" not in sorter.categorise_glyph_for_font(cached)["Uppercases"]
+
+def test_cat_glyph_attributes_match_the_reference(sorter_font_path):
+    font = fontHelpers.FontWrapper(sorter_font_path)
+    rcmap = TTFont(sorter_font_path)["cmap"].buildReversed()
+    glyphs = font.get_cat_glyphs()
+    assert [glyph.name for glyph in glyphs] == font.glyph_order
+    for glyph in glyphs:
+        reference = reference_glyph_attributes(glyph.name, rcmap)
+        cat_glyph = fontHelpers.CatGlyph(glyph.name, font)
+        for attribute, value in reference.items():
+            if value is not None and attribute in ("unicode", "pseudo_unicode") and glyph.root == "hyphen":
+                # mapped twice, any of the codepoints
+                assert getattr(glyph, attribute) in rcmap["hyphen"]
+                assert getattr(cat_glyph, attribute) in rcmap["hyphen"]
+                continue
+            assert getattr(glyph, attribute) == value, (glyph.name, attribute)
+            assert getattr(cat_glyph, attribute) == value, (glyph.name, attribute)
+
+def test_custom_categories_with_predicates():
+    class Sorter(SMGlyphSorter):
+        category_queries = {
+            "Composed": [SMGlyphSorterQuery("is_composed_character", True)],
+            "Small Caps": [SMGlyphSorterQuery("suffix_category", "smcp")],
+            }
+    names = ["Agrave", "A.sc", "A"]
+    columns = {
+        "is_composed_character": [True, False, False],
+        "suffix_category": [None, "smcp", None],
+        }
+    assert Sorter().categorise_columns(names, columns) == OrderedDict([("Composed", ["Agrave"]), ("Small Caps", ["A.sc"]), ("Other", ["A"])])
+
+def test_in_a_string_is_a_substring_test():
+    query = SMGlyphSorterQuery("unicode_category", "Lu Ll", "in")
+    names = ["A", "a", "zero", "L", "x"]
+    column = ["Lu", "Ll", "Nd", "L", "x"]
+    selected = query.select(column, {value: {i} for i, value in enumerate(column)})
+    assert selected == {i for i, value in enumerate(column) if query.test_glyph(ReferenceGlyph({"unicode_category": value}))}
+    assert [names[i] for i in sorted(selected)] == ["A", "a", "L"]
+    # a list target is a membership test
+    query = SMGlyphSorterQuery("unicode_category", ["Lu", "Ll"], "in")
+    assert query.select(column, {value: {i} for i, value in enumerate(column)}) == {0, 1}
@@ -0,0 +1,756 @@
+import contextlib
+import importlib
+import functools
+import pathlib
+import json
+import math
+import os
+import re
+
+from fontTools.pens.recordingPen import RecordingPen, DecomposingRecordingPen, replayRecording
+from fontTools.pens.boundsPen import BoundsPen, ControlBoundsPen
+from fontTools.pens.transformPen import TransformPen
+from fontTools.misc.transform import Transform
+from fontTools.ttLib import TTFont
+
+# ----------------------------------------
+# SpecimenMachine draws through `db`, a proxy to the current render backend.
+# backends follow the drawBot api:
+# - "drawBot": drawBot itself (macOS)
+# - "drawbot-skia": drawbot-skia, the calls are recorded then replayed into a skia drawing on saveImage
+# - "recording": nothing is rendered, draw calls and pages are recorded
+#   and saveImage writes them as json, to time or check the template logic anywhere
+#
+# file_extension is the extension of the files a backend saves, page_file_extension
+# the one of the pages kept by the page cache and placed back with image().
+#
+# the backend is chosen with set_backend, or the SPECIMENMACHINE_RENDER_BACKEND environment variable.
+
+BACKEND_ENVIRON_KEY = "SPECIMENMACHINE_RENDER_BACKEND"
+DEFAULT_BACKEND = "drawBot"
+
+DEFAULT_PAGE_SIZE = (1000, 1000)
+# ascender, descender, x height, cap height and line gap per em, for fonts given by name
+DEFAULT_FONT_METRICS = (.75, -.25, .5, .7, 0)
+# control point distance of a quarter ellipse drawn with a cubic curve
+OVAL_KAPPA = 0.5522847498
+_WORD_RE = re.compile(r"\S+\s*|\s+")
+PAPER_SIZES = {
+    "A3": (842, 1191),
+    "A4": (595, 842),
+    "A5": (420, 595),
+    "Letter": (612, 792),
+    "Legal": (612, 1008),
+    }
+
+# ----------------------------------------
+
+class RenderBackend():
+    name = None
+    # can append the pages of a saved file to the current drawing, needed by incremental drawing
+    can_place_pages = False
+    file_extension = ".pdf"
+    page_file_extension = ".pdf"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+
+class DrawBotBackend(RenderBackend):
+    """
+    forwards everything to drawBot, imported on first use
+    """
+    name = "drawBot"
+    can_place_pages = True
+
+    def __init__(self):
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if attribute.startswith("__"):
+            raise AttributeError(attribute)
+        if self._module is None:
+            self._module = importlib.import_module("drawBot")
+        return getattr(self._module, attribute)
+
+# ----------------------------------------
+
+@functools.lru_cache(maxsize=32)
+def _open_font_file(path, size, mtime, font_number):
+    # size and mtime are part of the key, a font changed on disk is opened again
+    return TTFont(path, fontNumber=font_number, lazy=True)
+
+def get_font_file(font, font_number=0):
+    """
+    a TTFont for a font file path (the face font_number of a collection), None for a font name
+    """
+    if font is None or not os.path.isfile(str(font)):
+        return None
+    stat = os.stat(str(font))
+    return _open_font_file(str(font), stat.st_size, stat.st_mtime_ns, font_number)
+
+def get_font_metrics(font, font_number=0):
+    """
+    (ascender, descender, x height, cap height, line gap) per em of a font file, estimated for a font name
+    """
+    ttfont = get_font_file(font, font_number)
+    if ttfont is None:
+        return DEFAULT_FONT_METRICS
+    upm = ttfont["head"].unitsPerEm
+    hhea = ttfont["hhea"]
+    os2 = ttfont["OS/2"] if "OS/2" in ttfont else None
+    x_height = getattr(os2, "sxHeight", 0) / upm or DEFAULT_FONT_METRICS[2]
+    cap_height = getattr(os2, "sCapHeight", 0) / upm or DEFAULT_FONT_METRICS[3]
+    return hhea.ascent / upm, hhea.descent / upm, x_height, cap_height, hhea.lineGap / upm
+
+# ----------------------------------------
+
+class RecordedFormattedString():
+    """
+    the runs of a FormattedString, as (text, attributes)
+    """
+
+    def __init__(self, txt=None, **attributes):
+        self.runs = []
+        self._attributes = {}
+        if txt is not None:
+            self.append(txt, **attributes)
+        else:
+            self._attributes.update(attributes)
+
+    def append(self, txt, **attributes):
+        # like drawBot, attributes carry over to the next runs
+        self._attributes.update(attributes)
+        if isinstance(txt, RecordedFormattedString):
+            self.runs += txt.runs
+        else:
+            self.runs.append((str(txt), dict(self._attributes)))
+
+    def __add__(self, other):
+        new = self.copy()
+        new.append(other)
+        return new
+
+    def copy(self):
+        new = self.__class__()
+        new.runs = list(self.runs)
+        new._attributes = dict(self._attributes)
+        return new
+
+    def __len__(self):
+        return len(str(self))
+
+    def __str__(self):
+        return "".join(txt for txt, attributes in self.runs)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {str(self)[:20]!r}>"
+
+
+class RecordedBezierPath(RecordingPen):
+    """
+    a BezierPath recorded through the pen protocol, as (operator, points).
+    follows the drawBot path api for shapes, bounds and transformations,
+    text is drawn from the glyph outlines of a font file, a glyph per character without kerning nor shaping.
+    """
+
+    def copy(self):
+        new = self.__class__()
+        new.value = list(self.value)
+        return new
+
+    def drawToPen(self, pen):
+        replayRecording(self.value, pen)
+
+    def appendPath(self, other):
+        self.value += other.value
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self.value)} segments>"
+
+    # ----------------------------------------
+    # shapes
+
+    def rect(self, x, y, w, h):
+        self.polygon((x, y), (x + w, y), (x + w, y + h), (x, y + h))
+
+    def oval(self, x, y, w, h):
+        rx, ry = w / 2, h / 2
+        cx, cy = x + rx, y + ry
+        kx, ky = rx * OVAL_KAPPA, ry * OVAL_KAPPA
+        self.moveTo((cx, y))
+        self.curveTo((cx + kx, y), (x + w, cy - ky), (x + w, cy))
+        self.curveTo((x + w, cy + ky), (cx + kx, y + h), (cx, y + h))
+        self.curveTo((cx - kx, y + h), (x, cy + ky), (x, cy))
+        self.curveTo((x, cy - ky), (cx - kx, y), (cx, y))
+        self.closePath()
+
+    def line(self, point1, point2):
+        self.moveTo(point1)
+        self.lineTo(point2)
+        self.endPath()
+
+    def polygon(self, *points, close=True):
+        self.moveTo(points[0])
+        for point in points[1:]:
+            self.lineTo(point)
+        if close:
+            self.closePath()
+        else:
+            self.endPath()
+
+    def text(self, txt, offset=None, font=None, fontSize=10, align=None, fontNumber=0):
+        ttfont = get_font_file(font, fontNumber)
+        if ttfont is None:
+            raise ValueError(f"drawing text in a path needs a font file, got {font!r}")
+        cmap = ttfont.getBestCmap()
+        glyph_set = ttfont.getGlyphSet()
+        scale = fontSize / ttfont["head"].unitsPerEm
+        glyph_names = [cmap.get(ord(character), ".notdef") for character in str(txt)]
+        x, y = offset or (0, 0)
+        width = sum(glyph_set[name].width for name in glyph_names) * scale
+        if align == "center":
+            x -= width / 2
+        elif align == "right":
+            x -= width
+        for name in glyph_names:
+            # components are decomposed, the path holds outlines only
+            glyph = DecomposingRecordingPen(glyph_set)
+            glyph_set[name].draw(glyph)
+            glyph.replay(TransformPen(self, (scale, 0, 0, scale, x, y)))
+            x += glyph_set[name].width * scale
+
+    # ----------------------------------------
+    # bounds and transformations
+
+    def bounds(self):
+        pen = BoundsPen(None)
+        self.drawToPen(pen)
+        return pen.bounds
+
+    def controlPointBounds(self):
+        pen = ControlBoundsPen(None)
+        self.drawToPen(pen)
+        return pen.bounds
+
+    def transform(self, transformMatrix, center=(0, 0)):
+        transform = Transform(*transformMatrix)
+        if center != (0, 0):
+            transform = Transform().translate(*center).transform(transform).translate(-center[0], -center[1])
+        self.value = [(operator, tuple(transform.transformPoint(point) for point in points)) for operator, points in self.value]
+
+    def translate(self, x=0, y=0):
+        self.transform((1, 0, 0, 1, x, y))
+
+    def scale(self, x=1, y=None, center=(0, 0)):
+        self.transform((x, 0, 0, x if y is None else y, 0, 0), center=center)
+
+    def rotate(self, angle, center=(0, 0)):
+        angle = math.radians(angle)
+        self.transform((math.cos(angle), math.sin(angle), -math.sin(angle), math.cos(angle), 0, 0), center=center)
+
+    def skew(self, angle1, angle2=0, center=(0, 0)):
+        self.transform((1, math.tan(math.radians(angle2)), math.tan(math.radians(angle1)), 1, 0, 0), center=center)
+
+
+class RecordedPage():
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.calls = []
+
+    def to_dict(self):
+        return {
+            "size": [self.width, self.height],
+            "calls": [[name, [_serialize(arg) for arg in args], {k: _serialize(v) for k, v in kwargs.items()}] for name, args, kwargs in self.calls],
+            }
+
+
+def _serialize(value):
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_serialize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _serialize(v) for k, v in value.items()}
+    if isinstance(value, RecordedBezierPath):
+        return {"BezierPath": [[operator, [list(point) for point in points]] for operator, points in value.value]}
+    if isinstance(value, RecordedFormattedString):
+        return {"FormattedString": [[txt, {k: _serialize(v) for k, v in attributes.items()}] for txt, attributes in value.runs]}
+    return repr(value)
+
+def _deserialize(value):
+    # paths and formatted strings back from their json form, tuples stay lists
+    if isinstance(value, list):
+        return [_deserialize(v) for v in value]
+    if isinstance(value, dict):
+        if list(value) == ["BezierPath"]:
+            path = RecordedBezierPath()
+            path.value = [(operator, tuple(tuple(point) for point in points)) for operator, points in value["BezierPath"]]
+            return path
+        if list(value) == ["FormattedString"]:
+            fs = RecordedFormattedString()
+            fs.runs = [(txt, _deserialize(attributes)) for txt, attributes in value["FormattedString"]]
+            return fs
+        return {k: _deserialize(v) for k, v in value.items()}
+    return value
+
+
+class RecordingBackend(RenderBackend):
+    """
+    records the draw calls of each page without rendering anything.
+    the drawBot functions without a result are recorded (see RECORDED_CALLS), unknown names raise an AttributeError.
+    functions asking for a result are answered from the recorded state:
+    text is measured roughly, font metrics are read from font files (estimated for font names).
+    saveImage writes the pages and their calls as json, placing such a file with image()
+    copies its calls in the current page, the file can then go away.
+    """
+    name = "recording"
+    can_place_pages = True
+    file_extension = ".json"
+    page_file_extension = ".json"
+
+    RECORDED_CALLS = frozenset([
+        # graphic state
+        "fill", "stroke", "strokeWidth", "lineCap", "lineJoin", "lineDash", "miterLimit",
+        "cmykFill", "cmykStroke", "opacity", "blendMode", "shadow", "cmykShadow",
+        "linearGradient", "radialGradient", "cmykLinearGradient", "cmykRadialGradient",
+        "translate", "rotate", "scale", "skew", "transform",
+        # shapes
+        "rect", "oval", "line", "polygon", "clipPath",
+        "newPath", "moveTo", "lineTo", "curveTo", "qCurveTo", "arc", "arcTo", "closePath",
+        # text
+        "text", "tracking", "baselineShift", "underline", "strikethrough", "hyphenation",
+        "language", "writingDirection", "fontNamedInstance",
+        # document
+        "frameDuration", "linkURL", "linkRect", "linkDestination",
+        ])
+
+    def __init__(self):
+        self.newDrawing()
+
+    def __getattr__(self, name):
+        if name not in self.RECORDED_CALLS:
+            raise AttributeError(f"'{name}' is not supported by the {self.name} render backend")
+        def record(*args, **kwargs):
+            self._record(name, args, kwargs)
+        record.__name__ = name
+        return record
+
+    def _record(self, name, args, kwargs):
+        if self._page is None:
+            self.newPage()
+        self._page.calls.append((name, args, kwargs))
+
+    @property
+    def call_count(self):
+        return sum(len(page.calls) for page in self._pages)
+
+    # ----------------------------------------
+    # drawing and pages
+
+    def newDrawing(self):
+        self._pages = []
+        self._page = None
+        self._reset_state()
+
+    def endDrawing(self):
+        self.newDrawing()
+
+    def _reset_state(self):
+        # the text state drawBot answers from, reset on each page
+        self._state = {"font": None, "fontNumber": 0, "fontSize": 10, "lineHeight": None, "openTypeFeatures": {}, "fontVariations": {}}
+        self._state_stack = []
+
+    def size(self, width, height=None):
+        if self._page is None:
+            self.newPage(width, height)
+        else:
+            self._page.width, self._page.height = self._get_page_size(width, height)
+
+    def newPage(self, width=None, height=None):
+        if width is None and self._page is not None:
+            width, height = self._page.width, self._page.height
+        self._page = RecordedPage(*self._get_page_size(width, height))
+        self._pages.append(self._page)
+        self._reset_state()
+
+    def _get_page_size(self, width, height):
+        if isinstance(width, str):
+            landscape = width.endswith("Landscape")
+            width, height = PAPER_SIZES.get(width.replace("Landscape", ""), DEFAULT_PAGE_SIZE)
+            if landscape:
+                width, height = height, width
+        if width is None:
+            width, height = DEFAULT_PAGE_SIZE
+        return width, height
+
+    def pageCount(self):
+        return len(self._pages)
+
+    def pages(self):
+        return [self._page_context(page) for page in self._pages]
+
+    @contextlib.contextmanager
+    def _page_context(self, page):
+        previous = self._page
+        self._page = page
+        try:
+            yield page
+        finally:
+            self._page = previous
+
+    def width(self):
+        return self._page.width if self._page is not None else DEFAULT_PAGE_SIZE[0]
+
+    def height(self):
+        return self._page.height if self._page is not None else DEFAULT_PAGE_SIZE[1]
+
+    @contextlib.contextmanager
+    def savedState(self):
+        self._record("save", (), {})
+        self._state_stack.append(dict(self._state))
+        try:
+            yield
+        finally:
+            self._state = self._state_stack.pop()
+            self._record("restore", (), {})
+
+    # ----------------------------------------
+    # text
+
+    def font(self, fontNameOrPath, fontSize=None, fontNumber=0):
+        kwargs = {}
+        if fontSize is not None:
+            kwargs["fontSize"] = fontSize
+        if fontNumber:
+            kwargs["fontNumber"] = fontNumber
+        # recorded first, the first call of a drawing starts a page with a fresh state
+        self._record("font", (fontNameOrPath,), kwargs)
+        if fontSize is not None:
+            self._state["fontSize"] = fontSize
+        self._state["font"] = fontNameOrPath
+        self._state["fontNumber"] = fontNumber
+        ttfont = get_font_file(fontNameOrPath, fontNumber)
+        if ttfont is None:
+            return str(fontNameOrPath)
+        return ttfont["name"].getDebugName(6) or str(fontNameOrPath)
+
+    def fontSize(self, size):
+        self._record("fontSize", (size,), {})
+        self._state["fontSize"] = size
+
+    def lineHeight(self, value):
+        self._record("lineHeight", (value,), {})
+        self._state["lineHeight"] = value
+
+    def openTypeFeatures(self, *args, resetFeatures=False, **features):
+        return self._update_state_dict("openTypeFeatures", "resetFeatures", args, resetFeatures, features)
+
+    def fontVariations(self, *args, resetVariations=False, **variations):
+        return self._update_state_dict("fontVariations", "resetVariations", args, resetVariations, variations)
+
+    def _update_state_dict(self, name, reset_name, args, reset, values):
+        kwargs = dict(values)
+        if reset:
+            kwargs[reset_name] = True
+        self._record(name, args, kwargs)
+        if reset:
+            self._state[name] = {}
+        self._state[name] = dict(self._state[name], **values)
+        return dict(self._state[name])
+
+    def _get_font_metric(self, index):
+        return get_font_metrics(self._state["font"], self._state["fontNumber"])[index] * self._state["fontSize"]
+
+    def fontAscender(self):
+        return self._get_font_metric(0)
+
+    def fontDescender(self):
+        return self._get_font_metric(1)
+
+    def fontXHeight(self):
+        return self._get_font_metric(2)
+
+    def fontCapHeight(self):
+        return self._get_font_metric(3)
+
+    def fontLineHeight(self):
+        if self._state["lineHeight"] is not None:
+            return self._state["lineHeight"]
+        return self.fontAscender() - self.fontDescender() + self._get_font_metric(4)
+
+    def fontLeading(self):
+        return self.fontLineHeight() - (self.fontAscender() - self.fontDescender())
+
+    def textBox(self, txt, box, align=None):
+        # nothing overflows
+        self._record("textBox", (txt, box), {"align": align} if align is not None else {})
+        return ""
+
+    def FormattedString(self, *args, **kwargs):
+        return RecordedFormattedString(*args, **kwargs)
+
+    def textSize(self, txt, align=None, width=None, height=None):
+        font_size = self._state["fontSize"]
+        if isinstance(txt, RecordedFormattedString) and txt.runs:
+            font_size = max(attributes.get("fontSize", 10) for _, attributes in txt.runs)
+        measure = lambda line: len(line.rstrip()) * font_size * 0.5
+        lines = self._wrap_lines(str(txt), width, measure)
+        text_width = width if width is not None else max(measure(line) for line in lines)
+        return text_width, len(lines) * font_size * 1.2
+
+    @staticmethod
+    def _wrap_lines(txt, width, measure):
+        """
+        the lines of txt once wrapped between words to width (measure gives the width of a string)
+        """
+        lines = []
+        for paragraph in txt.split("\n"):
+            line = ""
+            for word in _WORD_RE.findall(paragraph):
+                if width is not None and line and measure((line + word).rstrip()) > width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line += word
+            lines.append(line)
+        return lines
+
+    # ----------------------------------------
+    # paths
+
+    def BezierPath(self, *args, **kwargs):
+        return RecordedBezierPath()
+
+    def drawPath(self, path):
+        # the path can still change after being drawn
+        self._record("drawPath", (path.copy(),), {})
+
+    # ----------------------------------------
+    # saving and placing
+
+    def to_dict(self):
+        return {"backend": self.name, "pageCount": self.pageCount(), "pages": [page.to_dict() for page in self._pages]}
+
+    def saveImage(self, path, **kwargs):
+        if pathlib.Path(path).suffix != RecordingBackend.file_extension:
+            raise ValueError(f"recorded pages are saved as {RecordingBackend.file_extension} files, not {pathlib.Path(path).name}")
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    def _load_pages(self, path):
+        if pathlib.Path(path).suffix != RecordingBackend.file_extension:
+            raise ValueError(f"the {self.name} render backend only reads the pages it recorded, not {pathlib.Path(path).name}")
+        with open(path) as file:
+            return json.load(file)["pages"]
+
+    def numberOfPages(self, path):
+        return len(self._load_pages(path))
+
+    def imageSize(self, path, pageNumber=1):
+        return tuple(self._load_pages(path)[pageNumber - 1]["size"])
+
+    def image(self, path, position, alpha=1, pageNumber=None):
+        if pathlib.Path(path).suffix != RecordingBackend.file_extension:
+            self._record("image", (str(path), position), {"alpha": alpha, "pageNumber": pageNumber})
+            return
+        # a recorded page is copied in, alpha is not applied
+        page = self._load_pages(path)[(pageNumber or 1) - 1]
+        x, y = position[:2]
+        with self.savedState():
+            if x or y:
+                self._record("translate", (x, y), {})
+            for name, args, kwargs in page["calls"]:
+                self._record(name, tuple(_deserialize(args)), _deserialize(kwargs))
+
+
+class SkiaBackend(RecordingBackend):
+    """
+    drawbot-skia: calls are recorded, then replayed into a drawbot_skia drawing on saveImage,
+    so pages can still be revisited with pages(). only the calls drawbot-skia supports are accepted.
+    FormattedStrings are drawn run by run. pages are cached as recorded json (see RecordingBackend.image),
+    pdf files can not be placed.
+    """
+    name = "drawbot-skia"
+    can_place_pages = True
+    file_extension = ".pdf"
+    page_file_extension = ".json"
+
+    # calls changing the text state, mirrored on a drawing used to measure text
+    TEXT_STATE_CALLS = {"font", "fontSize", "openTypeFeatures", "fontVariations", "language"}
+
+    def __init__(self):
+        from drawbot_skia.drawing import Drawing
+        from drawbot_skia.path import BezierPath
+        self._drawing_class = Drawing
+        self._path_class = BezierPath
+        super().__init__()
+
+    def _reset_state(self):
+        super()._reset_state()
+        # a page to measure on, savedState needs one
+        self._measure = self._drawing_class()
+        self._measure.newPage(1, 1)
+
+    def __getattr__(self, name):
+        if name in self.RECORDED_CALLS and not hasattr(self._drawing_class, name):
+            raise AttributeError(f"'{name}' is not supported by the {self.name} render backend")
+        return super().__getattr__(name)
+
+    def _record(self, name, args, kwargs):
+        super()._record(name, args, kwargs)
+        if name in self.TEXT_STATE_CALLS:
+            getattr(self._measure, name)(*args, **self._get_skia_kwargs(name, kwargs))
+
+    @staticmethod
+    def _get_skia_kwargs(name, kwargs):
+        # drawbot-skia always uses the first face of a font collection, and draws the first page of an image
+        if name == "font":
+            return {k: v for k, v in kwargs.items() if k != "fontNumber"}
+        if name == "image":
+            return {k: v for k, v in kwargs.items() if k != "pageNumber"}
+        return kwargs
+
+    @contextlib.contextmanager
+    def savedState(self):
+        # the text state used to measure is restored with the recorded one
+        with self._measure.savedState(), super().savedState():
+            yield
+
+    def image(self, path, position, alpha=1, pageNumber=None):
+        if pathlib.Path(path).suffix == ".pdf":
+            raise ValueError(f"the {self.name} render backend can not place pdf files, {pathlib.Path(path).name}")
+        super().image(path, position, alpha=alpha, pageNumber=pageNumber)
+
+    def textSize(self, txt, align=None, width=None, height=None):
+        if width is None:
+            if isinstance(txt, RecordedFormattedString):
+                return self._get_formatted_string_size(txt)
+            return self._measure.textSize(str(txt))
+        # wrapped text is measured with the attributes of its first run
+        if isinstance(txt, RecordedFormattedString) and txt.runs:
+            self._apply_run_attributes(self._measure, txt.runs[0][1])
+        measure = lambda line: self._measure.textSize(line.rstrip())[0]
+        lines = self._wrap_lines(str(txt), width, measure)
+        return width, len(lines) * self._measure.textSize(" ")[1]
+
+    def _get_formatted_string_size(self, fs):
+        width = height = line_width = line_height = 0
+        for txt, attributes in fs.runs:
+            self._apply_run_attributes(self._measure, attributes)
+            for i, part in enumerate(txt.split("\n")):
+                if i:
+                    width = max(width, line_width)
+                    height += line_height
+                    line_width = line_height = 0
+                line_width += self._measure.textSize(part)[0] if part else 0
+                line_height = max(line_height, attributes.get("lineHeight") or attributes.get("fontSize", 10) * 1.2)
+        return max(width, line_width), height + line_height
+
+    def _apply_run_attributes(self, drawing, attributes):
+        if "font" in attributes:
+            drawing.font(str(attributes["font"]))
+        if "fontSize" in attributes:
+            drawing.fontSize(attributes["fontSize"])
+        if "fill" in attributes and attributes["fill"] is not None:
+            fill = attributes["fill"]
+            if isinstance(fill, (list, tuple)):
+                drawing.fill(*fill)
+            else:
+                drawing.fill(fill)
+        if "openTypeFeatures" in attributes:
+            drawing.openTypeFeatures(**attributes["openTypeFeatures"])
+
+    def saveImage(self, path, **kwargs):
+        # cached pages are kept as recorded json
+        if pathlib.Path(path).suffix == RecordingBackend.file_extension:
+            return super().saveImage(path, **kwargs)
+        drawing = self._drawing_class()
+        for page in self._pages:
+            drawing.newPage(page.width, page.height)
+            saved_states = []
+            for name, args, call_kwargs in page.calls:
+                self._replay(drawing, saved_states, name, args, call_kwargs)
+            while saved_states:
+                saved_states.pop().__exit__(None, None, None)
+        drawing.saveImage(str(path), **kwargs)
+
+    def _replay(self, drawing, saved_states, name, args, kwargs):
+        if name == "save":
+            saved_state = drawing.savedState()
+            saved_state.__enter__()
+            saved_states.append(saved_state)
+        elif name == "restore":
+            saved_states.pop().__exit__(None, None, None)
+        elif name in ("text", "textBox") and args and isinstance(args[0], RecordedFormattedString):
+            self._draw_formatted_string(drawing, args[0], args[1])
+        elif name == "textBox":
+            x, y, w, h = args[1]
+            drawing.text(str(args[0]), (x, y + h))
+        elif name == "drawPath" and isinstance(args[0], RecordedBezierPath):
+            path = self._path_class()
+            args[0].drawToPen(path)
+            drawing.drawPath(path)
+        else:
+            getattr(drawing, name)(*args, **self._get_skia_kwargs(name, kwargs))
+
+    def _draw_formatted_string(self, drawing, fs, position):
+        if len(position) == 4:
+            x, y, w, h = position
+            y += h
+        else:
+            x, y = position
+        start_x = x
+        with drawing.savedState():
+            for txt, attributes in fs.runs:
+                self._apply_run_attributes(drawing, attributes)
+                for i, part in enumerate(txt.split("\n")):
+                    if i:
+                        x = start_x
+                        y -= attributes.get("lineHeight") or attributes.get("fontSize", 10) * 1.2
+                    if part:
+                        drawing.text(part, (x, y))
+                        x += drawing.textSize(part)[0]
+
+# ----------------------------------------
+
+BACKENDS = {
+    "drawBot": DrawBotBackend,
+    "drawbot-skia": SkiaBackend,
+    "recording": RecordingBackend,
+    }
+
+_backend = None
+
+def get_backend():
+    if _backend is None:
+        set_backend(os.environ.get(BACKEND_ENVIRON_KEY, DEFAULT_BACKEND))
+    return _backend
+
+def set_backend(backend):
+    """
+    a backend name (see BACKENDS) or a RenderBackend instance
+    """
+    global _backend
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown render backend '{backend}', expected one of {', '.join(BACKENDS)}")
+        backend = BACKENDS[backend]()
+    _backend = backend
+    return backend
+
+
+class RenderBackendProxy():
+    """
+    forwards drawBot calls to the current backend
+    """
+
+    def __getattr__(self, attribute):
+        return getattr(get_backend(), attribute)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {get_backend()}>"
+
+db = RenderBackendProxy()
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from SpecimenMachine import renderBackends
+
+# ----------------------------------------
+
+@pytest.fixture
+def backend():
+    return renderBackends.RecordingBackend()
+
+def test_recording_saves_json_only(backend, tmp_path):
+    backend.newPage(100, 200)
+    backend.text("hello", (0, 0))
+    with pytest.raises(ValueError):
+        backend.saveImage(tmp_path / "out.pdf")
+    backend.saveImage(tmp_path / "out.json")
+    with open(tmp_path / "out.json") as file:
+        assert json.load(file)["pages"] == [{"size": [100, 200], "calls": [["text", ["hello", [0, 0]], {}]]}]
+
+def test_unknown_calls_raise(backend):
+    backend.fill(1, 0, 0)
+    with pytest.raises(AttributeError):
+        backend.notADrawBotCall()
+    assert backend.call_count == 1
+
+def test_placed_pages_are_copied_in(backend, tmp_path):
+    path = backend.BezierPath()
+    path.rect(0, 0, 10, 10)
+    backend.newPage(100, 200)
+    backend.drawPath(path)
+    backend.text(backend.FormattedString("hi", fontSize=20), (5, 5))
+    backend.saveImage(tmp_path / "page.json")
+    backend.newDrawing()
+
+    assert backend.numberOfPages(tmp_path / "page.json") == 1
+    assert backend.imageSize(tmp_path / "page.json", pageNumber=1) == (100, 200)
+    backend.newPage(100, 200)
+    backend.image(tmp_path / "page.json", (10, 0), pageNumber=1)
+    (tmp_path / "page.json").unlink()
+    calls = backend._page.calls
+    assert [name for name, args, kwargs in calls] == ["save", "translate", "drawPath", "text", "restore"]
+    assert calls[2][1][0].bounds() == (0, 0, 10, 10)
+    assert str(calls[3][1][0]) == "hi"
+
+def test_value_returning_calls(backend, font_path):
+    assert backend.font("Helvetica", 20) == "Helvetica"
+    assert backend.fontAscender() == 15
+    assert backend.textSize("abcd") == (40, 24)
+    assert backend.openTypeFeatures(smcp=True) == {"smcp": True}
+    assert backend.openTypeFeatures(liga=False) == {"smcp": True, "liga": False}
+    assert backend.openTypeFeatures(resetFeatures=True) == {}
+    assert backend.textBox("hello", (0, 0, 100, 100)) == ""
+    with backend.savedState():
+        backend.font(font_path, 1000)
+        assert backend.fontAscender() == 800
+        assert backend.fontDescender() == -200
+        assert backend.fontLineHeight() == 1000
+    assert backend.fontAscender() == 15
+    with pytest.raises(ValueError):
+        backend.imageSize("image.pdf")
+
+def test_bezier_path_api(font_path):
+    path = renderBackends.RecordedBezierPath()
+    path.rect(0, 0, 10, 20)
+    path.oval(20, 0, 10, 10)
+    assert path.bounds() == (0, 0, 30, 20)
+    path.translate(5, 5)
+    assert path.bounds() == (5, 5, 35, 25)
+    path.scale(2, center=(5, 5))
+    assert path.bounds() == (5, 5, 65, 45)
+
+    text = renderBackends.RecordedBezierPath()
+    text.text("AA", offset=(100, 0), font=font_path, fontSize=100)
+    assert text.bounds() is not None and text.bounds()[0] >= 100
+    with pytest.raises(ValueError):
+        text.text("A", font="Helvetica")
+
+def test_skia_saves_with_saved_states(tmp_path):
+    pytest.importorskip("drawbot_skia")
+    backend = renderBackends.SkiaBackend()
+    backend.newPage(100, 100)
+    with backend.savedState():
+        backend.fontSize(40)
+        backend.translate(10, 10)
+        backend.fill(1, 0, 0)
+        backend.rect(0, 0, 10, 10)
+    backend.rect(0, 0, 10, 10)
+    with pytest.raises(AttributeError):
+        backend.cmykFill(0, 0, 0, 1)
+    backend.saveImage(tmp_path / "out.pdf")
+    assert (tmp_path / "out.pdf").stat().st_size > 0
+    # cached pages are kept as json, pdf files can not be placed
+    backend.saveImage(tmp_path / "page.json")
+    with pytest.raises(ValueError):
+        backend.image(tmp_path / "out.pdf", (0, 0))
+
+def test_font_files_changed_on_disk_are_opened_again(tmp_path, make_font):
+    path = make_font("Changing-Regular.ttf", [".notdef", "A"], {0x41: "A"}, style="Regular")
+    backend = renderBackends.RecordingBackend()
+    assert backend.font(path) == "Test-Regular"
+    make_font("Changing-Regular.ttf", [".notdef", "A"], {0x41: "A"}, style="Bold")
+    assert backend.font(path) == "Test-Bold"
@@ -1,7 +1,9 @@
 # import drawbotgrid.grid as dbgrid
 from . import fontHelpers
+from . import tracing
+from . import renderBackends
+from . import textLayout
 
-import drawBot as db
 from fontTools.ttLib import TTFont
 from addict import Dict
 
@@ -10,6 +12,17 @@ import yaml
 import pathlib
 import datetime
 import copy
+import os
+import operator
+import hashlib
+import json
+import traceback
+import concurrent.futures
+
+# ----------------------------------------
+
+# drawing goes through the current render backend, drawBot by default
+db = renderBackends.db
 
 # ----------------------------------------
 
@@ -45,16 +58,74 @@ def nested_set(dic, keys, value):
 def nested_keys(dic):
     return [k for k, v in nested_items(dic)]
 
-def nested_items(dic, parent_keys=[]):
-    items = []
+def nested_items(dic, parent_keys=()):
+    """
+    yields (chained keys tuple, value) for every leaf of a nested dict
+    """
     for k, v in dic.items():
+        chained_keys = parent_keys + (k,)
         if isinstance(v, dict):
-            new_parent_keys = parent_keys[:]
-            new_parent_keys.append(k)
-            items += nested_items(v, new_parent_keys)
+            yield from nested_items(v, chained_keys)
         else:
-            items.append((parent_keys+[k], v))
-    return items
+            yield chained_keys, v
+
+# ----------------------------------------
+# lazy settings
+
+class Deferred():
+    """
+    placeholder for an autofill value not computed yet
+    """
+    __slots__ = ("token",)
+
+    def __init__(self, token):
+        self.token = token
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.token}>"
+
+
+class LazySettingsDict(Dict):
+    """
+    an addict Dict computing its deferred autofill values on first access.
+    reads and assignments are reported to the SMSettings owning it, see SMSettings.resolve_setting.
+    use to_dict() (or items, values, get) to read resolved values, dict(settings) does not resolve them.
+    """
+    _owner = None
+    _path = ()
+
+    @classmethod
+    def for_owner(cls, owner, path=()):
+        dic = cls()
+        object.__setattr__(dic, "_owner", owner)
+        object.__setattr__(dic, "_path", path)
+        return dic
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if self._owner is not None:
+            path = self._path + (key,)
+            self._owner._record_setting_read(path)
+            if isinstance(value, Deferred):
+                value = self._owner.resolve_setting(path)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if self._owner is not None:
+            self._owner._setting_assigned(self._path + (key,))
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
 # ----------------------------------------
 
 class SMBase():
@@ -65,6 +136,10 @@ class SMBase():
 class SMSettings(SMBase):
 
     defaults = {}
+
+    # autofill values are computed on first access,
+    # set to False to compute them all when the settings load (eg. for autofill functions with side effects)
+    lazy_autofill = True
     
     # ----------------------------------------
     
@@ -107,25 +182,124 @@ class SMSettings(SMBase):
     
     def _autofill_settings(self):
         """
-        this autofill values for both autofill tokens of key at a time 
-        (allowing autofill functions to reference previous keys)
+        autofill values are deferred and computed on first access (see resolve_setting),
+        so an expensive autofill function costs nothing until something reads its key.
+        autofill functions can reference other keys, these reads are recorded
+        and changing a setting only invalidates the values depending on it.
         """
-        self.settings_fill = Dict()
-        self.settings = Dict()
+        # chained keys -> autofill token, computed values, and {read keys: {autofilled keys reading them}}
+        self._autofill_tokens = {}
+        self._autofill_values = {}
+        self._setting_dependents = {}
+        self._resolving = []
+
+        self.settings_fill = LazySettingsDict.for_owner(self)
+        self.settings = LazySettingsDict.for_owner(self)
 
         for chained_keys, value in nested_items(self.settings_raw):
-            if value == AUTO_TOKEN:
-                auto_value = self._get_autofill_value(chained_keys)
-                nested_set(self.settings, chained_keys, auto_value)
-                nested_set(self.settings_fill, chained_keys, value)
-            elif value == FILL_TOKEN:
-                fill_value = self._get_autofill_value(chained_keys)
-                nested_set(self.settings_fill, chained_keys, fill_value)
-                nested_set(self.settings, chained_keys, fill_value)
-            else:
-                nested_set(self.settings_fill, chained_keys, value)
-                nested_set(self.settings, chained_keys, value)
+            self._place_setting_value(chained_keys, value)
+
+        if not self.lazy_autofill:
+            self.resolve_all_settings()
+
+    def _place_setting_value(self, chained_keys, value):
+        if value == AUTO_TOKEN:
+            self._autofill_tokens[chained_keys] = value
+            self._place_setting(self.settings, chained_keys, Deferred(value))
+            self._place_setting(self.settings_fill, chained_keys, value)
+        elif value == FILL_TOKEN:
+            self._autofill_tokens[chained_keys] = value
+            self._place_setting(self.settings, chained_keys, Deferred(value))
+            self._place_setting(self.settings_fill, chained_keys, Deferred(value))
+        else:
+            self._autofill_tokens.pop(chained_keys, None)
+            self._place_setting(self.settings, chained_keys, value)
+            self._place_setting(self.settings_fill, chained_keys, value)
+
+    def _place_setting(self, root, chained_keys, value):
+        # sets a value without reporting it as an assignment
+        dic = root
+        for i, key in enumerate(chained_keys[:-1]):
+            child = dict.get(dic, key)
+            if not isinstance(child, LazySettingsDict):
+                child = LazySettingsDict.for_owner(self, chained_keys[:i+1])
+                dict.__setitem__(dic, key, child)
+            dic = child
+        dict.__setitem__(dic, chained_keys[-1], value)
+
+    # ----------------------------------------
+    # lazy resolution
 
+    def resolve_setting(self, chained_keys):
+        """
+        the autofilled value of chained_keys, computed once then memoized
+        """
+        if isinstance(chained_keys, str):
+            chained_keys = (chained_keys,)
+        chained_keys = tuple(chained_keys)
+        if chained_keys in self._autofill_values:
+            return self._autofill_values[chained_keys]
+        if chained_keys in self._resolving:
+            cycle = " -> ".join(".".join(keys) for keys in self._resolving + [chained_keys])
+            raise RecursionError(f"circular autofill in {self}: {cycle}")
+
+        self._resolving.append(chained_keys)
+        try:
+            value = self._get_autofill_value(chained_keys)
+        finally:
+            self._resolving.pop()
+
+        self._autofill_values[chained_keys] = value
+        self._place_setting(self.settings, chained_keys, value)
+        if self._autofill_tokens.get(chained_keys) == FILL_TOKEN:
+            self._place_setting(self.settings_fill, chained_keys, value)
+        return value
+
+    def resolve_all_settings(self):
+        for chained_keys in list(self._autofill_tokens):
+            self.resolve_setting(chained_keys)
+
+    def update_setting(self, chained_keys, value):
+        """
+        change a user setting (value can be an autofill token),
+        the autofilled values that read it, directly or not, are computed again on next access.
+        returns the invalidated chained keys.
+        """
+        if isinstance(chained_keys, str):
+            chained_keys = (chained_keys,)
+        chained_keys = tuple(chained_keys)
+        nested_set(self.settings_raw, chained_keys, value)
+        self._autofill_values.pop(chained_keys, None)
+        self._place_setting_value(chained_keys, value)
+        return self._invalidate_dependents(chained_keys)
+
+    def _record_setting_read(self, chained_keys):
+        if self._resolving and self._resolving[-1] != chained_keys:
+            self._setting_dependents.setdefault(chained_keys, set()).add(self._resolving[-1])
+
+    def _setting_assigned(self, chained_keys):
+        # an assigned value replaces the autofilled one
+        self._autofill_values.pop(chained_keys, None)
+        self._autofill_tokens.pop(chained_keys, None)
+        self._invalidate_dependents(chained_keys)
+
+    def _invalidate_dependents(self, chained_keys):
+        invalidated = []
+        for read_keys in list(self._setting_dependents):
+            # a read of the changed key, of one of its parents or of one of its children
+            if read_keys[:len(chained_keys)] != chained_keys and chained_keys[:len(read_keys)] != read_keys:
+                continue
+            for dependent in self._setting_dependents.pop(read_keys, ()):
+                if dependent not in self._autofill_values:
+                    continue
+                del self._autofill_values[dependent]
+                token = self._autofill_tokens[dependent]
+                self._place_setting(self.settings, dependent, Deferred(token))
+                if token == FILL_TOKEN:
+                    self._place_setting(self.settings_fill, dependent, Deferred(token))
+                invalidated.append(dependent)
+                invalidated += self._invalidate_dependents(dependent)
+        return invalidated
 
     def _load_recursive_autofill_dict(self, output_dic, input_dic, token):
         for chained_keys, value in nested_items(input_dic):
@@ -146,7 +320,8 @@ class SMSettings(SMBase):
         autofill_key = self._get_autofill_funct_name(chained_keys)
         if hasattr(self, autofill_key):
             autofill_func = getattr(self, autofill_key)
-            return autofill_func()
+            with tracing.span(f"autofill.{self.__class__.__name__}.{autofill_key}", "autofill"):
+                return autofill_func()
         else:
             try:
                 return nested_get(self.defaults, chained_keys)
@@ -161,6 +336,9 @@ class SMFontCollection(SMSettings):
     defaults = {
         "font_directory": AUTO_TOKEN, 
         "font_paths": AUTO_TOKEN,
+        # variable fonts are drawn as static instances, see VariableFontInstancer
+        "variable_named_instances": True,
+        "variable_axis_grid": None,
         }
 
     # ----------------------------------------
@@ -170,7 +348,8 @@ class SMFontCollection(SMSettings):
         
     def _did_autofill_private(self):
         self.load_fonts()
-        font_paths = [str(f.path.relative_to(self.director.root_dir)) for f in self.fonts]
+        # variable fonts are listed once, not per instance
+        font_paths = [self._get_relative_font_path(path) for path in self.font_source_paths]
         self.settings.font_paths = font_paths
 
     # ----------------------------------------
@@ -180,14 +359,61 @@ class SMFontCollection(SMSettings):
   
     def autofill_font_paths(self):
         font_path_unsorted = fontHelpers.walk_font_dir(self.settings["font_directory"])
-        self.fonts = fontHelpers.load_font_list(font_path_unsorted, sort=True)
-        font_paths_sorted = [str(f.path.relative_to(self.director.root_dir)) for f in self.fonts]
+        self.set_fonts(self.director.font_pool.acquire_fonts(self.expand_variable_fonts(font_path_unsorted), sort=True))
+        font_paths_sorted = [self._get_relative_font_path(path) for path in self.font_source_paths]
         return font_paths_sorted
+
+    def _get_relative_font_path(self, path):
+        # pooled fonts have resolved paths, variable font sources keep the path they were found with
+        return str(pathlib.Path(path).resolve().relative_to(self.director.root_dir))
         
     # ----------------------------------------
     
     def load_fonts(self):
-        self.fonts = fontHelpers.load_font_list(self.absolute_font_paths)
+        # fonts come from the director font pool, already loaded fonts are not parsed again
+        font_paths = []
+        for p in self.absolute_font_paths:
+            font_paths += fontHelpers.walk_font_dir(p)
+        fonts = self.director.font_pool.acquire_fonts(self.expand_variable_fonts(font_paths))
+        self.set_fonts(self._sort_variable_font_instances(fonts))
+
+    def _sort_variable_font_instances(self, fonts):
+        # the instances of a variable font are sorted among themselves, the font_paths order is kept otherwise
+        groups = {}
+        for f in fonts:
+            groups.setdefault(self.variable_font_instancer.get_source_path(f.path), []).append(f)
+        return [f for group in groups.values() for f in sorted(group, key=lambda f: f.get_sorting_score())]
+
+    @property
+    def variable_font_instancer(self):
+        # shared by every collection of the director
+        return self.director.variable_font_instancer
+
+    def expand_variable_fonts(self, font_paths):
+        return self.variable_font_instancer.expand(font_paths,
+            named_instances=self.settings.variable_named_instances,
+            axis_grid=self.settings.variable_axis_grid)
+
+    @property
+    def font_source_paths(self):
+        """
+        the font files of the collection, a variable font once for all its instances
+        """
+        return self._remove_duplicate_in_list([self.variable_font_instancer.get_source_path(f.path) for f in self.fonts])
+
+    def set_fonts(self, fonts):
+        """
+        hold fonts acquired from the director font pool, releasing the previous ones
+        """
+        previous = getattr(self, "fonts", [])
+        self.fonts = fonts
+        self.director.font_pool.release_fonts(previous)
+
+    def release_fonts(self):
+        """
+        give the fonts back to the director font pool, once the collection is not used anymore
+        """
+        self.set_fonts([])
 
     @property
     def absolute_font_paths(self):
@@ -219,11 +445,53 @@ class SMFontCollection(SMSettings):
     def copyright(self):
         return list(set([f.copyright for f in self.fonts]))
 
-    def get_language_support(self, speaker_threshold=0):
-        # for efficiency reasons, only the first font languge support is processed here
-        # i am not sure what should happen if language support are inconsistents accross the font collection
-        return self.fonts[0].get_language_support(speaker_threshold=speaker_threshold)
+    def get_language_support(self, speaker_threshold=0, mode="first"):
+        """
+        mode is one of:
+        - "first": the first font language support only, the historical shortcut
+        - "union": languages supported by any font of the collection
+        - "intersection": languages supported by every font of the collection
+        """
+        if mode == "first":
+            return self.fonts[0].get_language_support(speaker_threshold=speaker_threshold)
+        return self.get_collection_language_support(speaker_threshold=speaker_threshold)[mode]
+
+    def get_collection_language_support(self, speaker_threshold=0):
+        """
+        language support of every font, as {"union": ..., "intersection": ..., "per_font": {font: ...}}
+        fonts with identical character sets are only analysed once
+        """
+        hyperglot = fontHelpers.HyperglotAssistant(metadata_cache=self.director.metadata_cache)
+        full_supports = hyperglot.collect_full_language_support_for_fonts(self.fonts, workers=self.director.workers)
+        per_font = {font: hyperglot.filter_language_support(support, speaker_threshold=speaker_threshold)
+                    for font, support in zip(self.fonts, full_supports)}
+
+        union = {}
+        for support in per_font.values():
+            for script, langs in support.items():
+                union[script] = self._remove_duplicate_in_list(union.get(script, []) + langs)
 
+        intersection = {}
+        supports = list(per_font.values())
+        if supports:
+            for script, langs in supports[0].items():
+                others = [set(support.get(script, [])) for support in supports[1:]]
+                if all(script in support for support in supports[1:]):
+                    intersection[script] = [l for l in langs if all(l in other for other in others)]
+
+        return {"union": union, "intersection": intersection, "per_font": per_font}
+
+
+    def get_unicode_block_coverage(self, include_empty=False):
+        """
+        unicode block coverage as {"collection": coverage of all fonts together, "per_font": {font: coverage}}
+        see FontWrapper.get_unicode_block_coverage
+        """
+        index = fontHelpers.fontHelpers.get_unicode_block_index()
+        per_font = {font: font.get_unicode_block_coverage(include_empty=include_empty) for font in self.fonts}
+        unicodes = frozenset().union(*[font.unicodes for font in self.fonts])
+        collection = index.get_coverage(codepoints=unicodes, include_empty=include_empty)
+        return {"collection": collection, "per_font": per_font}
 
     @property
     def font_collection_name(self):
@@ -242,28 +510,48 @@ class SMFontCollection(SMSettings):
     # ----------------------------------------
     # formatted strings
         
+    @property
+    def text_layout_cache(self):
+        """
+        memoized text shaping and measurement for the templates, see textLayout.TextLayoutCache
+        """
+        if not hasattr(self, "_text_layout_cache"):
+            self._text_layout_cache = textLayout.TextLayoutCache()
+        return self._text_layout_cache
+
+    def _get_memoized_formatted_string(self, key, build):
+        # built once per fonts and arguments, a copy is handed out as templates may append to it
+        fonts = tuple(str(font.path) for font in self.fonts)
+        return self.text_layout_cache.get_memoized(("collection", fonts, key), build).copy()
+
     def get_font_names_as_formatted_string(self, sep="\n", **kwargs):
+        return self._get_memoized_formatted_string(("names", sep, kwargs), lambda: self._build_font_names_formatted_string(sep, **kwargs))
+
+    def _build_font_names_formatted_string(self, sep="\n", **kwargs):
         if not sep:
             sep = ""
 
         fs = db.FormattedString()
         for i, font in enumerate(self.fonts):
             fs.append(f"{font.prefered_family_name} {font.prefered_style_name}",
-                      font=font.path, **kwargs)
+                      font=font.file_path, fontNumber=font.font_number or 0, **kwargs)
             if i+1 < len(font):
                 fs.append(sep)
         return fs
 
     def get_font_sample_as_formatted_string(self, sample_str, sep="\n", **kwargs):
+        return self._get_memoized_formatted_string(("sample", sample_str, sep, kwargs), lambda: self._build_font_sample_formatted_string(sample_str, sep, **kwargs))
+
+    def _build_font_sample_formatted_string(self, sample_str, sep="\n", **kwargs):
         if not sep:
             sep = ""
         fs = db.FormattedString()
         for i, font in enumerate(self.fonts):
             fs.append(sample_str,
-                      font=font.path, **kwargs)
+                      font=font.file_path, fontNumber=font.font_number or 0, **kwargs)
             if i+1 < len(font):
                 fs.append(sep, 
-                          font=font.path, **kwargs)
+                          font=font.file_path, fontNumber=font.font_number or 0, **kwargs)
         return fs
 
     # ----------------------------------------
@@ -286,7 +574,18 @@ class SMFontCollection(SMSettings):
     # ----------------------------------------
     
     def get_fonts_as_list_of_single_font_collections(self):
-        return [self.__class__(self.director, {"font_directory": self.settings.font_directory, "font_paths": [font_path]}) for font_path in self.settings.font_paths]
+        return [self.get_single_font_collection(font_path) for font_path in self.settings.font_paths]
+
+    def get_single_font_collection(self, font_path):
+        return self.__class__(self.director, self.get_single_font_collection_settings(font_path))
+
+    def get_single_font_collection_settings(self, font_path):
+        return {
+            "font_directory": self.settings.font_directory,
+            "font_paths": [font_path],
+            "variable_named_instances": self.settings.variable_named_instances,
+            "variable_axis_grid": self.settings.variable_axis_grid,
+            }
 
 class SMSingleFontCollection(SMFontCollection):
 
@@ -299,41 +598,71 @@ class SMSingleFontCollection(SMFontCollection):
 
 class SMGlyphSorterQuery(SMBase):
 
+    OPERATORS = {
+        "==": operator.eq,
+        ">=": operator.ge,
+        "<=": operator.le,
+        "!=": operator.ne,
+        ">": operator.gt,
+        "<": operator.lt,
+        "in": lambda value, target: value in target,
+        "not in": lambda value, target: value not in target,
+    }
+
     def __init__(self, target_attribute, target_value, equality="=="):
         self.target_attribute = target_attribute
         self.target_value = target_value
         self.equality = equality
 
+    @property
+    def key(self):
+        target_value = self.target_value
+        if isinstance(target_value, list):
+            target_value = tuple(target_value)
+        return (self.target_attribute, self.equality, target_value)
+
+    def compile(self):
+        """
+        a predicate testing an attribute value, empty values never match
+        """
+        compare = self.OPERATORS.get(self.equality)
+        target_value = self.target_value
+        if compare is None:
+            return lambda value: False
+        return lambda value: bool(value) and compare(value, target_value)
+
     def test_glyph(self, glyph):
-        value = getattr(glyph, self.target_attribute)
+        return self.compile()(getattr(glyph, self.target_attribute))
+
+    def select(self, column, index):
+        """
+        the set of row numbers whose value in column matches the query,
+        index maps values to row numbers and is used for equality and membership queries
+        """
         if self.equality == "==":
-            if value:
-                return value == self.target_value
-        elif self.equality == ">=":
-            if value:
-                return value >= self.target_value
-        elif self.equality == "<=":
-            if value:
-                return value <= self.target_value
-        elif self.equality == "!=":
-            if value:
-                return value != self.target_value
-        elif self.equality == ">":
-            if value:
-                return value > self.target_value
-        elif self.equality == "<":
-            if value:
-                return value < self.target_value
-        elif self.equality == "in":
-            if value:
-                return value in self.target_value
-        elif self.equality == "not in":
-            if value:
-                return value not in self.target_value
-        return False
+            try:
+                return index.get(self.target_value, set()) if self.target_value else set()
+            except TypeError:
+                pass
+        elif self.equality == "in" and not isinstance(self.target_value, str):
+            # in a string target, "in" is a substring test: left to the predicate
+            try:
+                return set().union(*[index.get(v, set()) for v in self.target_value if v])
+            except TypeError:
+                pass
+        predicate = self.compile()
+        return {i for i, value in enumerate(column) if predicate(value)}
 
 
 class SMGlyphSorter(SMBase):
+    """
+    glyphs go in the first category whose queries all match,
+    the remaining ones are gathered in "Other".
+
+    the queries are evaluated once per font on columns of glyph attributes,
+    equality and membership queries go through a value -> glyphs index,
+    categories are then resolved with set operations.
+    """
     category_queries = {
         "Uppercases": [SMGlyphSorterQuery("unicode", 65, equality=">="), SMGlyphSorterQuery("unicode", 90, equality="<=")],
         "Accented Uppercases": [SMGlyphSorterQuery("unicode_category", "Lu")],
@@ -352,42 +681,205 @@ class SMGlyphSorter(SMBase):
         "Other Figures": [SMGlyphSorterQuery("unicode_category", "No")],
     }
 
+    OTHER_CATEGORY = "Other"
+
+    @property
+    def compiled_categories(self):
+        """
+        [(category, [query keys])] in order, and the unique queries by key
+        """
+        if not hasattr(self, "_compiled_categories"):
+            queries = {}
+            categories = []
+            for category, category_queries in self.category_queries.items():
+                keys = []
+                for query in category_queries:
+                    queries.setdefault(query.key, query)
+                    keys.append(query.key)
+                categories.append((category, keys))
+            self._compiled_categories = (categories, queries)
+        return self._compiled_categories
+
     def categorise_glyph_for_font(self, font, ignore=[".notdef", ".null", "CR", "space", "uni00A0", "uni2009"]):
-        categories = OrderedDict()
-        for glyph in font.get_cat_glyphs():
-            if glyph.name not in ignore:
-                categorized = False
-                for category, queries in self.category_queries.items():
-                    results = [querie.test_glyph(glyph) for querie in queries]
-                    if False not in results:
-                        categories.setdefault(category, []).append(glyph.name)
-                        categorized = True
-                        break
-                if not categorized:
-                    categories.setdefault("Other", []).append(glyph.name)
-        return categories
+        # categorisations are shared by fonts with the same glyph set
+        categories, queries = self.compiled_categories
+        signature = (tuple((category, tuple(keys)) for category, keys in categories), tuple(ignore))
+        shared = font.glyph_set_analysis.categories
+        if signature not in shared:
+            shared[signature] = self._categorise_glyph_table(font.glyph_table, ignore)
+        return OrderedDict((category, list(names)) for category, names in shared[signature].items())
+
+    def _categorise_glyph_table(self, table, ignore):
+        ignore = set(ignore)
+        rows = [i for i, name in enumerate(table.names) if name not in ignore]
+        names = [table.names[i] for i in rows]
+        categories, queries = self.compiled_categories
+
+        columns = {}
+        for attribute in {query.target_attribute for query in queries.values()}:
+            column = table.column(attribute)
+            columns[attribute] = [column[i] for i in rows]
+        return self.categorise_columns(names, columns)
+
+    def categorise_columns(self, names, columns):
+        """
+        categorise glyphs given as a list of names and {attribute: [value for each glyph]}
+        """
+        categories, queries = self.compiled_categories
+
+        indexes = {}
+        for attribute, column in columns.items():
+            index = {}
+            for i, value in enumerate(column):
+                try:
+                    index.setdefault(value, set()).add(i)
+                except TypeError:
+                    # unhashable values are only reachable through predicates
+                    pass
+            indexes[attribute] = index
+
+        selections = {}
+        for key, query in queries.items():
+            selections[key] = query.select(columns[query.target_attribute], indexes[query.target_attribute])
+
+        members = {}
+        remaining = set(range(len(names)))
+        for category, keys in categories:
+            selected = remaining.intersection(*[selections[key] for key in keys])
+            if selected:
+                members[category] = selected
+                remaining -= selected
+        if remaining:
+            members[self.OTHER_CATEGORY] = remaining
+
+        # categories come in the order their first glyph appears
+        out = OrderedDict()
+        for category, rows in sorted(members.items(), key=lambda item: min(item[1])):
+            out[category] = [names[i] for i in sorted(rows)]
+        return out
 
 
 class SMTemplate(SMSettings):
 
+    # bump when the drawing code changes, this invalidates the cached pages
+    version = 1
+
     # def __init__(self, director, settings):
     #     super().__init__(director, settings)
 
     def draw(self):
         print(f"-- drawing {self}")
-        self._draw()
+        with tracing.span(f"draw.{self.__class__.__name__}", "template"):
+            self._draw()
 
     def _draw():
         print(f"must overide {self}._draw()")
 
+    def span(self, name, **args):
+        """
+        a tracing span for a step of the template, a no-op unless tracing is enabled:
+
+            with self.span("glyph grid"):
+                ...
+        """
+        return tracing.span(f"{self.__class__.__name__}.{name}", "template", **args)
+
 
 class SMTemplateAllPages(SMTemplate):
 
     def draw(self):
         print(f"-- drawing {self}")
-        for page in db.pages():
-            with page:
-                self._draw()
+        with tracing.span(f"draw.{self.__class__.__name__}", "template"):
+            for page in db.pages():
+                with page:
+                    self._draw()
+
+# ----------------------------------------
+
+PAGE_CACHE_DIR_NAME = ".specimenMachine/pages"
+
+class SMPageCache(SMBase):
+    """
+    keeps the pages drawn by each template as a pdf (or as recorded by the render backend, see page_file_extension),
+    keyed by the template class and version, its resolved settings and the fonts it uses.
+    templates whose key did not change are placed back from their file instead of being drawn again.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.used_keys = set()
+
+    def get_template_key(self, template, fonts):
+        font_identities = []
+        for font in fonts.fonts:
+            font_identities.append(fontHelpers.metadataCache.get_file_identity(font.path))
+        description = {
+            "template": f"{template.__class__.__module__}.{template.__class__.__qualname__}",
+            "backend": renderBackends.get_backend().name,
+            "version": template.version,
+            "settings": template.settings.to_dict(),
+            "fonts": font_identities,
+            }
+        data = json.dumps(description, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _get_pages_path(self, key):
+        # a pdf, or the recorded pages for backends that can not place a pdf
+        return self.cache_dir / f"{key}{renderBackends.get_backend().page_file_extension}"
+
+    def _get_empty_marker_path(self, key):
+        return self.cache_dir / f"{key}.empty"
+
+    def get_template_pages(self, template, fonts):
+        """
+        the file holding the template pages (None if it has no pages), drawn only if needed
+        """
+        key = self.get_template_key(template, fonts)
+        self.used_keys.add(key)
+        pages_path = self._get_pages_path(key)
+        if pages_path.exists():
+            print(f"-- reusing cached pages for {template}")
+            return pages_path
+        if self._get_empty_marker_path(key).exists():
+            return None
+        return self.render_template(template, key)
+
+    def render_template(self, template, key):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        db.newDrawing()
+        try:
+            template.draw()
+            if db.pageCount() == 0:
+                self._get_empty_marker_path(key).touch()
+                return None
+            pages_path = self._get_pages_path(key)
+            # write next to the final file so a killed run never leaves a partial file behind
+            temp_path = pages_path.with_name(f"{key}.{os.getpid()}.tmp{pages_path.suffix}")
+            db.saveImage(temp_path)
+            os.replace(temp_path, pages_path)
+            return pages_path
+        finally:
+            db.endDrawing()
+
+    def place_pages(self, pages_path):
+        """
+        append the pages of a cached file to the current drawing
+        """
+        for page_number in range(1, db.numberOfPages(pages_path) + 1):
+            width, height = db.imageSize(pages_path, pageNumber=page_number)
+            db.newPage(width, height)
+            db.image(pages_path, (0, 0), pageNumber=page_number)
+
+    def prune(self):
+        """
+        remove the cached pages that were not used since this cache was created
+        """
+        if not self.cache_dir.exists():
+            return
+        for path in self.cache_dir.iterdir():
+            key = path.name.split(".")[0]
+            if key not in self.used_keys:
+                path.unlink()
 
 # ----------------------------------------
 
@@ -401,23 +893,60 @@ class SMDirector(SMBase):
 
     defaults = []
 
-    def __init__(self, input_path, single_font_mode=False):
+    def __init__(self, input_path, single_font_mode=False, workers=1, lazy_fonts=False, metadata_cache=None, font_memory_budget=None, font_pool=None, render_backend=None, settings=None):
 
         assert FONT_COLLECTION_SECTION_IDENTIFIER in self.template_map
 
         # ----------------------------------------
         
+        # kept to build the same director in worker processes
+        self.init_options = {
+            "single_font_mode": single_font_mode,
+            "workers": workers,
+            "lazy_fonts": lazy_fonts,
+            "metadata_cache": metadata_cache,
+            "font_memory_budget": font_memory_budget,
+            "render_backend": render_backend,
+            }
+
+        # a backend name (see renderBackends.BACKENDS) or instance, replaces the current backend
+        if render_backend is not None:
+            renderBackends.set_backend(render_backend)
+
+        # number of workers used to load fonts, None means one per cpu
+        self.workers = workers
+        # memory-map fonts and only decompile the tables that are used
+        self.lazy_fonts = lazy_fonts
+        # persistent font metadata cache: True for the default location, a path, or a FontMetadataCache
+        if metadata_cache is True:
+            metadata_cache = fontHelpers.FontMetadataCache()
+        elif isinstance(metadata_cache, (str, pathlib.Path)):
+            metadata_cache = fontHelpers.FontMetadataCache(metadata_cache)
+        self.metadata_cache = metadata_cache
+
         self.input_path = pathlib.Path(input_path)
+        # resolved as the font pool resolves font paths, font_paths are written relative to it
         if self.input_path.is_dir():
-            self.root_dir = self.input_path
+            self.root_dir = self.input_path.resolve()
         else:
-            self.root_dir = self.input_path.parent
+            self.root_dir = self.input_path.resolve().parent
 
         self.settings_path =  self.root_dir/SETTINGS_FILE_NAME
-        self.load_settings()
+        # a list of template sections can be given in place of the settings file (see get_resolved_settings_as_list)
+        if settings is None:
+            self.load_settings()
+        else:
+            self.settings = settings
         
         # ----------------------------------------
         
+        # every font collection loads its fonts from this pool,
+        # font_memory_budget (bytes) bounds the decompiled tables it keeps, see FontPool.
+        # a pool can be shared by several directors (see SMBatch), its own options are then used
+        if font_pool is None:
+            font_pool = fontHelpers.FontPool(workers=workers, lazy=lazy_fonts, metadata_cache=self.metadata_cache, memory_budget=font_memory_budget)
+        self.font_pool = font_pool
+
         self.templates = []
         self.load_font_collection()
         self.load_templates()
@@ -436,8 +965,11 @@ class SMDirector(SMBase):
         else:
             self.settings_path = setting_paths[0]
             print(f"-- loading settings from {self.settings_path.relative_to(self.root_dir)}")
-            with open(self.settings_path, "r") as setting_file:
-                self.settings = yaml.safe_load(setting_file.read())
+            with tracing.span("settings.load", "settings"):
+                with open(self.settings_path, "r") as setting_file:
+                    data = setting_file.read()
+                with tracing.span("settings.parse", "settings"):
+                    self.settings = yaml.safe_load(data)
 
 
     def yaml_write_settings_to_path(self, templates, path):
@@ -452,6 +984,15 @@ class SMDirector(SMBase):
                         width=float("inf")))
             out_file.write("\n".join(out_str))
 
+    @property
+    def variable_font_instancer(self):
+        """
+        the VariableFontInstancer of every font collection, variations are read once per font
+        """
+        if not hasattr(self, "_variable_font_instancer"):
+            self._variable_font_instancer = fontHelpers.VariableFontInstancer(workers=self.workers, metadata_cache=self.metadata_cache)
+        return self._variable_font_instancer
+
     # ----------------------------------------
 
     def load_font_collection(self):
@@ -462,11 +1003,49 @@ class SMDirector(SMBase):
                 setattr(self, FONT_COLLECTION_SECTION_IDENTIFIER, fonts)
 
     def load_templates(self):
+        # each template is kept with a copy of its settings section, see reload_templates
+        self._template_sections = []
         for s in self.settings:
             if s["template"] in self.template_map and s["template"] != FONT_COLLECTION_SECTION_IDENTIFIER:
                 template = self.init_section_from_settings(s)
                 self.templates.append(template)
- 
+                self._template_sections.append((copy.deepcopy(s), template))
+
+    def reload_font_collection(self):
+        """
+        initialise the font collection again from self.settings, in place of the current one
+        """
+        previous = self.fonts
+        for s in self.settings:
+            if s["template"] == FONT_COLLECTION_SECTION_IDENTIFIER:
+                fonts = self.init_section_from_settings(s)
+                self.templates = [fonts if t is previous else t for t in self.templates]
+                setattr(self, FONT_COLLECTION_SECTION_IDENTIFIER, fonts)
+        # unchanged fonts are shared with the new collection, changed ones are closed
+        previous.release_fonts()
+
+    def reload_templates(self, force=False):
+        """
+        initialise the templates again from self.settings.
+        a template whose settings section is unchanged (same position, same content) is kept,
+        unless force is True (eg. when the fonts they autofill from changed).
+        returns the templates that were initialised again.
+        """
+        previous = self._template_sections
+        self.templates = [self.fonts]
+        self._template_sections = []
+        reloaded = []
+        sections = [s for s in self.settings if s["template"] in self.template_map and s["template"] != FONT_COLLECTION_SECTION_IDENTIFIER]
+        for i, s in enumerate(sections):
+            if not force and i < len(previous) and previous[i][0] == s:
+                template = previous[i][1]
+            else:
+                template = self.init_section_from_settings(s)
+                reloaded.append(template)
+            self.templates.append(template)
+            self._template_sections.append((copy.deepcopy(s), template))
+        return reloaded
+
 
     def init_section_from_settings(self, template_dict):
         template_class = self.template_map.get(template_dict["template"])
@@ -477,32 +1056,132 @@ class SMDirector(SMBase):
             settings.update(template_dict.get("settings", {}))
             return template_class(self, settings)
 
-    def draw(self, output_dir=None):
+    def watch(self, interval=0.5, debounce=0.5, **draw_options):
+        """
+        draw, then keep drawing incrementally whenever the settings file or a font changes,
+        see SMWatcher
+        """
+        from .watcher import SMWatcher
+        SMWatcher(self, interval=interval, debounce=debounce, draw_options=draw_options).watch()
+
+    def draw(self, output_dir=None, incremental=False, workers=1):
+        """
+        with incremental=True, the pages of each template are cached (see SMPageCache)
+        and only the templates whose settings, fonts or version changed are drawn again.
+        this assumes each template draws on its own pages,
+        SMTemplateAllPages templates are always drawn.
+
+        in single font mode, workers > 1 draws the fonts in a process pool
+        (workers=None uses one per cpu), see draw_single_fonts_in_processes.
+
+        returns the list of saved pdf paths.
+        """
+        if output_dir == None:
+            output_dir = self.root_dir
+
+        if self.single_font_mode and workers != 1:
+            return self.draw_single_fonts_in_processes(output_dir=output_dir, incremental=incremental, workers=workers)
 
         if self.single_font_mode:
+            self.resolve_template_settings()
             targets = self.fonts.get_fonts_as_list_of_single_font_collections()
         else:
             targets = [self.fonts]
 
-        original_fonts = self.fonts
+        if incremental and not renderBackends.get_backend().can_place_pages:
+            print(f"-- {renderBackends.get_backend().name} can not place cached pages, drawing everything")
+            incremental = False
 
-        for fonts in targets:
-            self.fonts = fonts
+        page_cache = None
+        if incremental:
+            page_cache = SMPageCache(self.root_dir / PAGE_CACHE_DIR_NAME)
 
-            now = datetime.datetime.now()
-            db.newDrawing()
-            self._draw()
+        saved = [self._draw_to_pdf(fonts, output_dir, page_cache=page_cache) for fonts in targets]
+        if self.single_font_mode:
+            for fonts in targets:
+                fonts.release_fonts()
 
-            if output_dir == None:
-                output_dir = self.root_dir
+        if page_cache is not None:
+            page_cache.prune()
+        return saved
 
-            out = output_dir / f"{now.strftime('%Y%m%d-%H%M')}-specimenMachine-{self.fonts.font_collection_filename}.pdf"
-            db.saveImage(out)
-            print(f"-- saved {out}")
+    def resolve_template_settings(self):
+        """
+        compute the deferred autofill values of every template against the current font collection,
+        in single font mode they are shared by the pdf of each font, as when autofill was not lazy
+        """
+        for template in self.templates:
+            if not isinstance(template, SMFontCollection):
+                template.resolve_all_settings()
 
+    def _draw_to_pdf(self, fonts, output_dir, page_cache=None):
+        original_fonts = self.fonts
+        self.fonts = fonts
+        try:
+            now = datetime.datetime.now()
+            if page_cache is not None:
+                self._draw_incremental(page_cache)
+            else:
+                db.newDrawing()
+                self._draw()
+
+            out = output_dir / f"{now.strftime('%Y%m%d-%H%M')}-specimenMachine-{self.fonts.font_collection_filename}{renderBackends.get_backend().file_extension}"
+            with tracing.span("saveImage", "drawbot", path=out.name):
+                db.saveImage(out)
+            print(f"-- saved {out}")
+        finally:
+            # a failing template does not leave its drawing to the next pdf
             db.endDrawing()
+            self.fonts = original_fonts
+        return out
 
-        self.fonts = original_fonts
+    def draw_single_fonts_in_processes(self, output_dir=None, incremental=False, workers=None):
+        """
+        draw one pdf per font, each font in a worker process.
+        workers get the template settings already resolved against the whole collection
+        and build a director with their font only, nothing is autofilled again.
+        progress is printed as fonts complete, a failing font does not stop the others,
+        failures are kept in self.draw_failures as {font path: traceback}.
+
+        the director class must be importable by the workers
+        (defined in a module, or under a `if __name__ == "__main__":` guard in a script).
+        """
+        if output_dir == None:
+            output_dir = self.root_dir
+        font_paths = list(self.fonts.settings.font_paths)
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        saved = []
+        used_keys = set()
+        self.draw_failures = {}
+        # workers draw with the current backend, even if it was set after this director
+        backend = renderBackends.get_backend()
+        options = dict(self.init_options, workers=1, render_backend=backend.name if backend.name in renderBackends.BACKENDS else backend)
+        self.resolve_template_settings()
+        settings = self.get_resolved_settings_as_list()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(font_paths)) or 1) as pool:
+            futures = {}
+            for font_path in font_paths:
+                font_settings = self.get_single_font_settings_as_list(font_path, settings)
+                futures[pool.submit(_draw_single_font, self.__class__, self.input_path, options, font_settings, output_dir, incremental)] = font_path
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                font_path = futures[future]
+                try:
+                    out, keys = future.result()
+                except Exception:
+                    self.draw_failures[font_path] = traceback.format_exc()
+                    print(f"-- [{done}/{len(font_paths)}] failed {font_path}\n{self.draw_failures[font_path]}")
+                    continue
+                saved.append(out)
+                used_keys |= keys
+                print(f"-- [{done}/{len(font_paths)}] saved {out}")
+
+        if incremental and not self.draw_failures:
+            page_cache = SMPageCache(self.root_dir / PAGE_CACHE_DIR_NAME)
+            page_cache.used_keys = used_keys
+            page_cache.prune()
+        return saved
 
     def _draw(self):
         draw_last = []
@@ -516,6 +1195,51 @@ class SMDirector(SMBase):
         for template in draw_last:
             template.draw()
 
+    def _draw_incremental(self, page_cache):
+        # stale templates are drawn in their own drawing first,
+        # then every page is placed back in a new drawing
+        draw_last = []
+        pdf_paths = []
+        for template in self.templates:
+            if issubclass(type(template), SMTemplateAllPages):
+                draw_last.append(template)
+            elif issubclass(type(template), SMFontCollection):
+                pass
+            else:
+                pdf_paths.append(page_cache.get_template_pages(template, self.fonts))
+
+        db.newDrawing()
+        for pdf_path in pdf_paths:
+            if pdf_path is not None:
+                page_cache.place_pages(pdf_path)
+        for template in draw_last:
+            template.draw()
+
+    def close(self):
+        """
+        give the fonts back to the font pool, the director should not be drawn anymore
+        """
+        for template in self.templates:
+            if isinstance(template, SMFontCollection):
+                template.release_fonts()
+
+    def get_resolved_settings_as_list(self):
+        """
+        the template sections with their resolved values, as given to the director settings argument
+        """
+        return [{"template": self.reverse_template_map[template.__class__], "settings": template.settings.to_dict()} for template in self.templates]
+
+    def get_single_font_settings_as_list(self, font_path, settings):
+        """
+        settings (see get_resolved_settings_as_list) with a font collection of font_path only
+        """
+        out = []
+        for section in settings:
+            if section["template"] == FONT_COLLECTION_SECTION_IDENTIFIER:
+                section = dict(section, settings=self.fonts.get_single_font_collection_settings(font_path))
+            out.append(section)
+        return out
+
     def get_settings_as_list(self):
         out = [{"template": self.reverse_template_map[template.__class__], "settings": template.settings_fill.to_dict()} for template in self.templates]
         for template in out:
@@ -532,3 +1256,19 @@ class SMDirector(SMBase):
     @property
     def reverse_template_map(self):
         return {v:k for k, v in self.template_map.items()}
+
+# ----------------------------------------
+
+def _draw_single_font(director_class, input_path, options, settings, output_dir, incremental):
+    # runs in a worker process, with its own drawBot state.
+    # settings are resolved, the font collection only lists the font to draw
+    director = director_class(input_path, settings=settings, **options)
+    page_cache = None
+    if incremental:
+        page_cache = SMPageCache(director.root_dir / PAGE_CACHE_DIR_NAME)
+    try:
+        out = director._draw_to_pdf(director.fonts, output_dir, page_cache=page_cache)
+    finally:
+        director.close()
+    used_keys = page_cache.used_keys if page_cache is not None else set()
+    return out, used_keys
@@ -0,0 +1,185 @@
+import concurrent.futures
+import multiprocessing
+import functools
+import shutil
+import json
+
+import pytest
+
+from SpecimenMachine import fontHelpers, renderBackends, SMDirector, SMFontCollection, SMTemplate
+from SpecimenMachine import specimenMachine
+from SpecimenMachine.specimenMachine import AUTO_TOKEN
+
+db = renderBackends.db
+
+# ----------------------------------------
+
+class Director(SMDirector):
+    defaults = [{"template": "fonts"}]
+
+@pytest.fixture
+def static_project_dir(tmp_path, family_dir):
+    # the fonts only, each test director writes its default settings
+    path = tmp_path / "project"
+    path.mkdir()
+    for font_path in fontHelpers.walk_font_dir(family_dir):
+        shutil.copy(font_path, path)
+    return path
+
+@pytest.fixture
+def project_dir(static_project_dir, variable_font_path):
+    shutil.copy(variable_font_path, static_project_dir)
+    return static_project_dir
+
+def test_relative_and_symlinked_project_dirs(project_dir, tmp_path, monkeypatch):
+    (tmp_path / "link").symlink_to(project_dir)
+    monkeypatch.chdir(tmp_path)
+    for path in ("project", "link"):
+        director = Director(path)
+        assert sorted(director.fonts.settings.font_paths) == sorted(p.name for p in project_dir.glob("*.ttf"))
+        # loaded again from the font_paths written to the settings
+        director = Director(path)
+        assert len(director.fonts.fonts) == 4 + 3
+
+def test_collections_share_the_director_instancer(project_dir, cache_dir):
+    director = Director(project_dir, metadata_cache=cache_dir / "metadata.sqlite", workers=2)
+    instancer = director.variable_font_instancer
+    assert instancer.workers == 2
+    collections = director.fonts.get_fonts_as_list_of_single_font_collections()
+    assert all(collection.variable_font_instancer is instancer for collection in collections)
+    # the variable font is listed once, drawn as its named instances
+    assert len(director.fonts.settings.font_paths) == len(collections) == 5
+    assert len(director.fonts.fonts) == 4 + 3
+
+def test_cached_fonts_are_not_opened_for_variations(project_dir, cache_dir, count_opened_fonts, monkeypatch):
+    metadata_cache = cache_dir / "metadata.sqlite"
+    Director(project_dir, metadata_cache=metadata_cache)
+
+    opened = []
+    original_open_font = fontHelpers.variableFonts.open_font
+    monkeypatch.setattr(fontHelpers.variableFonts, "open_font", lambda path, **kwargs: opened.append(path) or original_open_font(path, **kwargs))
+    count_opened_fonts.clear()
+    director = Director(project_dir, metadata_cache=metadata_cache)
+    for collection in director.fonts.get_fonts_as_list_of_single_font_collections():
+        collection.release_fonts()
+    assert opened == []
+    assert count_opened_fonts == []
+
+# ----------------------------------------
+
+class StyleNames(SMTemplate):
+    defaults = {"style_names": AUTO_TOKEN, "size": 12}
+    drawn = []
+
+    def autofill_style_names(self):
+        return [font.prefered_style_name for font in self.director.fonts.fonts]
+
+    def _draw(self):
+        self.drawn.append((self.director.fonts.font_collection_filename, list(self.settings.style_names)))
+        db.newPage()
+        db.text(" ".join(self.settings.style_names), (0, 0))
+
+class StyleNamesDirector(SMDirector):
+    template_map = {"fonts": SMFontCollection, "names": StyleNames}
+    defaults = [{"template": "fonts"}, {"template": "names"}]
+
+def test_single_font_pdfs_share_the_autofilled_values(static_project_dir, monkeypatch):
+    monkeypatch.setattr(StyleNames, "drawn", [])
+    director = StyleNamesDirector(static_project_dir, single_font_mode=True, render_backend="recording")
+    style_names = [font.prefered_style_name for font in director.fonts.fonts]
+    saved = director.draw()
+    assert len(saved) == len(StyleNames.drawn) == len(style_names)
+    # every pdf gets the values autofilled from the whole collection, whichever font is drawn first
+    assert len({filename for filename, _ in StyleNames.drawn}) == len(style_names)
+    assert all(names == style_names for _, names in StyleNames.drawn)
+
+def test_autofilled_values_follow_the_settings_they_read(static_project_dir):
+    director = StyleNamesDirector(static_project_dir, render_backend="recording")
+    names = director.templates[1]
+    assert names.settings.style_names == [font.prefered_style_name for font in director.fonts.fonts]
+    # a font collection loaded again (eg. by the watcher) is seen by the templates initialised again
+    director.settings[0]["settings"] = {"font_paths": director.fonts.settings.font_paths[:1]}
+    director.reload_font_collection()
+    names = director.reload_templates(force=True)[0]
+    assert names.settings.style_names == [director.fonts.fonts[0].prefered_style_name]
+
+# ----------------------------------------
+
+def get_recorded_texts(path):
+    with open(path) as file:
+        pages = json.load(file)["pages"]
+    return [args[0] for page in pages for name, args, kwargs in page["calls"] if name == "text"]
+
+def test_single_font_processes_draw_the_resolved_settings(static_project_dir):
+    director = StyleNamesDirector(static_project_dir, single_font_mode=True, render_backend="recording")
+    style_names = [font.prefered_style_name for font in director.fonts.fonts]
+    saved = director.draw(workers=2)
+    assert director.draw_failures == {}
+    assert len(saved) == len(style_names)
+    for path in saved:
+        assert get_recorded_texts(path) == [" ".join(style_names)]
+
+def test_processes_draw_with_the_current_backend(static_project_dir, monkeypatch):
+    monkeypatch.delenv(renderBackends.BACKEND_ENVIRON_KEY, raising=False)
+    # spawned workers do not inherit the backend set in this process
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", functools.partial(concurrent.futures.ProcessPoolExecutor, mp_context=spawn))
+    director = StyleNamesDirector(static_project_dir, single_font_mode=True)
+    renderBackends.set_backend("recording")
+    saved = director.draw(workers=2)
+    assert director.draw_failures == {}
+    assert all(path.suffix == ".json" and get_recorded_texts(path) for path in saved)
+
+def test_worker_director_is_closed(static_project_dir, tmp_path, monkeypatch):
+    director = StyleNamesDirector(static_project_dir, render_backend="recording")
+    director.resolve_template_settings()
+    font_path = director.fonts.settings.font_paths[0]
+    settings = director.get_single_font_settings_as_list(font_path, director.get_resolved_settings_as_list())
+    closed = []
+    monkeypatch.setattr(StyleNamesDirector, "close", lambda self: closed.append(self))
+    specimenMachine._draw_single_font(StyleNamesDirector, static_project_dir, {"render_backend": "recording"}, settings, tmp_path, False)
+    assert len(closed) == 1
+
+def test_worker_director_only_loads_its_font(static_project_dir, monkeypatch):
+    director = StyleNamesDirector(static_project_dir, render_backend="recording")
+    director.resolve_template_settings()
+    style_names = director.templates[1].settings.style_names
+    font_path = director.fonts.settings.font_paths[-1]
+    settings = director.get_single_font_settings_as_list(font_path, director.get_resolved_settings_as_list())
+
+    def autofill_style_names(self):
+        raise AssertionError("resolved settings are not autofilled again")
+    monkeypatch.setattr(StyleNames, "autofill_style_names", autofill_style_names)
+    worker_director = StyleNamesDirector(static_project_dir, settings=settings, render_backend="recording")
+    assert [str(f.path.name) for f in worker_director.fonts.fonts] == [font_path]
+    assert worker_director.font_pool.stats["misses"] == 1
+    assert worker_director.templates[1].settings.style_names == style_names
+
+def test_failed_drawing_is_ended(static_project_dir, monkeypatch):
+    backend = renderBackends.RecordingBackend()
+    director = StyleNamesDirector(static_project_dir, render_backend=backend)
+    fonts = director.fonts
+
+    def _draw(self):
+        db.newPage()
+        raise RuntimeError("template")
+    monkeypatch.setattr(StyleNames, "_draw", _draw)
+    with pytest.raises(RuntimeError):
+        director.draw()
+    assert backend.pageCount() == 0
+    assert director.fonts is fonts
+
+def test_incremental_output_outlives_the_page_cache(static_project_dir, tmp_path):
+    director = StyleNamesDirector(static_project_dir, render_backend="recording")
+    first = director.draw(output_dir=tmp_path, incremental=True)[0]
+    assert first.suffix == ".json"
+    texts = get_recorded_texts(first)
+    assert texts
+    # drawn again from the cache, then every cached page is pruned
+    second = director.draw(output_dir=tmp_path, incremental=True)[0]
+    assert get_recorded_texts(second) == texts
+    page_cache = director.root_dir / specimenMachine.PAGE_CACHE_DIR_NAME
+    assert list(page_cache.iterdir())
+    specimenMachine.SMPageCache(page_cache).prune()
+    assert not list(page_cache.iterdir())
+    assert get_recorded_texts(second) == texts
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import re
+
+from .renderBackends import db, get_backend
+from .fontHelpers.metadataCache import split_font_number
+
+# ----------------------------------------
+
+DEFAULT_MAX_SIZE = 4096
+
+# a word and the whitespace after it, pages are split between tokens
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+# ----------------------------------------
+
+def freeze(value):
+    """
+    a hashable version of nested dicts, lists and sets, to build cache keys
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(v) for v in value))
+    return value
+
+
+class TextLayoutCache():
+    """
+    memoized FormattedStrings and text measurements,
+    keyed by (render backend, text, font, font size, features and other attributes, box width).
+    the least recently used entries are dropped past max_size.
+
+    measurements use the current render backend (see renderBackends).
+    fit_font_size and paginate do a binary search over these measurements
+    instead of laying the text out again for every try.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self._entries)} entries>"
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        self._entries.clear()
+
+    def _get(self, key, compute):
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        value = compute()
+        self._entries[key] = value
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return value
+
+    def get_memoized(self, key, build):
+        """
+        a value built once per key (and render backend), shared by every call: do not modify it
+        """
+        return self._get(("memoized", get_backend().name, freeze(key)), build)
+
+    # ----------------------------------------
+    # shaping and measuring
+
+    def get_formatted_string(self, txt, font, fontSize, **attributes):
+        """
+        a FormattedString of txt, shared by every call with the same inputs: do not modify it
+        """
+        key = ("fs", get_backend().name, txt, str(font), fontSize, freeze(attributes))
+        font_path, font_number = split_font_number(font)
+        if font_number is not None:
+            # a face of a font collection
+            attributes["fontNumber"] = font_number
+        return self._get(key, lambda: db.FormattedString(txt, font=str(font_path), fontSize=fontSize, **attributes))
+
+    def text_size(self, txt, font, fontSize, width=None, **attributes):
+        """
+        (width, height) of txt, wrapped in a column when width is given
+        """
+        key = ("size", get_backend().name, txt, str(font), fontSize, width, freeze(attributes))
+        def measure():
+            fs = self.get_formatted_string(txt, font, fontSize, **attributes)
+            return tuple(db.textSize(fs, width=width))
+        return self._get(key, measure)
+
+    def fits(self, txt, width, height, font, fontSize, **attributes):
+        return self.text_size(txt, font, fontSize, width=width, **attributes)[1] <= height
+
+    # ----------------------------------------
+    # layout helpers
+
+    def fit_font_size(self, txt, width, height, font, min_size=4, max_size=500, precision=0.5, **attributes):
+        """
+        the biggest font size (to precision) at which txt fits in a width x height column,
+        min_size if it never fits
+        """
+        if self.fits(txt, width, height, font, max_size, **attributes):
+            return max_size
+        low, high = min_size, max_size
+        while high - low > precision:
+            middle = (low + high) / 2
+            if self.fits(txt, width, height, font, middle, **attributes):
+                low = middle
+            else:
+                high = middle
+        return low
+
+    def paginate(self, txt, width, height, font, fontSize, **attributes):
+        """
+        split txt in pages of text fitting a width x height column,
+        each page ends between words (a single word too big for a page gets its own page)
+        """
+        tokens = _TOKEN_RE.findall(txt)
+        pages = []
+        start = 0
+        while start < len(tokens):
+            # the biggest number of tokens fitting the column, as fitting is monotonic
+            low, high = 1, len(tokens) - start
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self.fits("".join(tokens[start:start + middle]), width, height, font, fontSize, **attributes):
+                    low = middle
+                else:
+                    high = middle - 1
+            pages.append("".join(tokens[start:start + low]))
+            start += low
+        return pages
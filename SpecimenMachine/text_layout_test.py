@@ -0,0 +1,47 @@
+import pytest
+
+from SpecimenMachine import renderBackends, textLayout
+
+# ----------------------------------------
+# the recording backend measures a character as half the font size, a line as 1.2 the font size
+
+@pytest.fixture
+def cache():
+    renderBackends.set_backend("recording")
+    return textLayout.TextLayoutCache()
+
+def test_paginate_splits_between_words(cache):
+    txt = "aaaa bbbb cccc dddd eeee ffff gggg"
+    # a 10pt line holds two words (9 characters, 45 wide), a 30 high page holds two lines
+    pages = cache.paginate(txt, 45, 30, "Helvetica", 10)
+    assert pages == ["aaaa bbbb cccc dddd ", "eeee ffff gggg"]
+    assert "".join(pages) == txt
+    for page in pages:
+        assert cache.fits(page, 45, 30, "Helvetica", 10)
+    # a word too big for a page gets its own page
+    assert cache.paginate("aaaaaaaaaaaa b", 20, 12, "Helvetica", 10) == ["aaaaaaaaaaaa ", "b"]
+
+def test_fit_font_size_is_the_biggest_fitting_size(cache):
+    # a line is 1.2 the font size high, it fits in 24 up to 20pt
+    size = cache.fit_font_size("abcd", 1000, 24, "Helvetica", precision=0.5)
+    assert 19.5 <= size <= 20
+    assert cache.fits("abcd", 1000, 24, "Helvetica", size)
+    assert not cache.fits("abcd", 1000, 24, "Helvetica", size + 0.5 + 1e-6)
+    assert cache.fit_font_size("abcd", 1000, 1000, "Helvetica", max_size=200) == 200
+    assert cache.fit_font_size("abcd", 1000, 1, "Helvetica", min_size=4) == 4
+
+def test_measurements_are_kept_per_backend(cache):
+    class Backend(renderBackends.RecordingBackend):
+        name = "other"
+        def textSize(self, txt, align=None, width=None, height=None):
+            return (1, 1)
+    assert cache.text_size("abcd", "Helvetica", 10) == (20, 12)
+    renderBackends.set_backend(Backend())
+    assert cache.text_size("abcd", "Helvetica", 10) == (1, 1)
+
+def test_memoized_values_are_bounded(cache):
+    cache.max_size = 2
+    for i in range(5):
+        cache.get_memoized(("sample", i), lambda: i)
+    assert len(cache) == 2
+    assert cache.get_memoized(("sample", 4), lambda: None) == 4
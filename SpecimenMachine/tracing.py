@@ -0,0 +1,185 @@
+import contextlib
+import functools
+import threading
+import json
+import time
+import sys
+import os
+
+# ----------------------------------------
+# spans are only recorded while a tracer is enabled,
+# otherwise span() returns a shared no-op context.
+#
+#     with tracing.trace() as tracer:
+#         director = MyDirector(path)
+#         director.draw()
+#     tracer.save_chrome_trace("trace.json")
+#     print(tracer.format_summary())
+#
+# spans from worker processes are not collected.
+
+_active_tracer = None
+_null_span = contextlib.nullcontext()
+
+# ----------------------------------------
+
+class Span():
+    """
+    a finished span: wall and cpu time in seconds,
+    net_allocated_blocks is the change in allocated memory blocks (sys.getallocatedblocks) over the span:
+    blocks allocated and freed within the span, and the ones of other threads, are not told apart
+    """
+
+    __slots__ = ("name", "category", "start", "wall", "cpu", "net_allocated_blocks", "thread_id", "depth", "args")
+
+    def __init__(self, name, category, start, wall, cpu, net_allocated_blocks, thread_id, depth, args):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.wall = wall
+        self.cpu = cpu
+        self.net_allocated_blocks = net_allocated_blocks
+        self.thread_id = thread_id
+        self.depth = depth
+        self.args = args
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.name} {self.wall*1000:.1f}ms>"
+
+
+class Tracer():
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self.spans)} spans>"
+
+    @contextlib.contextmanager
+    def span(self, name, category="", **args):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        blocks = sys.getallocatedblocks()
+        cpu = time.thread_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu
+            blocks = sys.getallocatedblocks() - blocks
+            self._local.depth = depth
+            span = Span(name, category, start - self.origin, wall, cpu, blocks, threading.get_ident(), depth, args)
+            with self._lock:
+                self.spans.append(span)
+
+    def clear(self):
+        self.spans = []
+        self.origin = time.perf_counter()
+
+    # ----------------------------------------
+    # export
+
+    def to_chrome_trace(self):
+        """
+        the spans as complete events of the chrome trace event format,
+        to open in chrome://tracing or https://ui.perfetto.dev
+        """
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            args = {"cpu_ms": round(span.cpu * 1000, 3), "net_allocated_blocks": span.net_allocated_blocks}
+            args.update({key: str(value) for key, value in span.args.items()})
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.wall * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+        return path
+
+    def get_summary(self):
+        """
+        {span name: {"count", "wall", "cpu", "net_allocated_blocks"}} totals, the slowest first
+        """
+        summary = {}
+        for span in self.spans:
+            row = summary.setdefault(span.name, {"count": 0, "wall": 0.0, "cpu": 0.0, "net_allocated_blocks": 0})
+            row["count"] += 1
+            row["wall"] += span.wall
+            row["cpu"] += span.cpu
+            row["net_allocated_blocks"] += span.net_allocated_blocks
+        return dict(sorted(summary.items(), key=lambda item: -item[1]["wall"]))
+
+    def format_summary(self):
+        summary = self.get_summary()
+        width = max([len(name) for name in summary] + [4])
+        lines = [f"{'span'.ljust(width)}  count  wall (ms)  cpu (ms)  net blocks"]
+        for name, row in summary.items():
+            lines.append(f"{name.ljust(width)}  {row['count']:5}  {row['wall']*1000:9.1f}  {row['cpu']*1000:8.1f}  {row['net_allocated_blocks']:10}")
+        return "\n".join(lines)
+
+# ----------------------------------------
+
+def get_tracer():
+    return _active_tracer
+
+def enable(tracer=None):
+    global _active_tracer
+    if tracer is None:
+        tracer = Tracer()
+    _active_tracer = tracer
+    return tracer
+
+def disable():
+    global _active_tracer
+    tracer = _active_tracer
+    _active_tracer = None
+    return tracer
+
+@contextlib.contextmanager
+def trace(tracer=None):
+    previous = _active_tracer
+    tracer = enable(tracer)
+    try:
+        yield tracer
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+
+def span(name, category="", **args):
+    """
+    a span on the enabled tracer, a no-op when tracing is off
+    """
+    if _active_tracer is None:
+        return _null_span
+    return _active_tracer.span(name, category, **args)
+
+def traced(name=None, category=""):
+    """
+    decorator recording each call of a function as a span
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_tracer is None:
+                return func(*args, **kwargs)
+            with _active_tracer.span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
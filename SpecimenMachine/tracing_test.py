@@ -0,0 +1,61 @@
+import json
+
+from SpecimenMachine import tracing
+
+# ----------------------------------------
+
+@tracing.traced("traced", "test")
+def traced_function():
+    return 1
+
+def test_spans_are_only_recorded_while_tracing():
+    assert tracing.get_tracer() is None
+    with tracing.span("ignored"):
+        traced_function()
+    with tracing.trace() as tracer:
+        traced_function()
+    assert tracing.get_tracer() is None
+    assert [span.name for span in tracer.spans] == ["traced"]
+
+def test_chrome_trace_of_nested_spans(tmp_path):
+    with tracing.trace() as tracer:
+        with tracing.span("outer", "test", font="A.ttf"):
+            with tracing.span("inner", "test"):
+                # allocations kept past the span
+                kept = [object() for _ in range(10_000)]
+            traced_function()
+    inner, traced, outer = tracer.spans
+    assert (outer.depth, inner.depth, traced.depth) == (0, 1, 1)
+    assert inner.net_allocated_blocks >= 10_000
+    assert outer.net_allocated_blocks >= inner.net_allocated_blocks - 100
+    assert len(kept) == 10_000
+
+    path = tracer.save_chrome_trace(tmp_path / "trace.json")
+    with open(path) as file:
+        trace = json.load(file)
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    # complete events, in start order, in microseconds
+    assert [event["name"] for event in events] == ["outer", "inner", "traced"]
+    for event in events:
+        assert event["ph"] == "X"
+        assert set(event) == {"name", "cat", "ph", "ts", "dur", "pid", "tid", "args"}
+        assert isinstance(event["ts"], float) and event["dur"] >= 0
+        assert isinstance(event["pid"], int) and isinstance(event["tid"], int)
+        assert {"cpu_ms", "net_allocated_blocks"} <= set(event["args"])
+    outer_event, inner_event, traced_event = events
+    # children lie within their parent, on the same thread
+    for child in (inner_event, traced_event):
+        assert outer_event["ts"] <= child["ts"] and child["ts"] + child["dur"] <= outer_event["ts"] + outer_event["dur"]
+        assert child["tid"] == outer_event["tid"]
+    assert outer_event["args"]["font"] == "A.ttf"
+    assert inner_event["args"]["net_allocated_blocks"] == inner.net_allocated_blocks
+
+def test_summary_totals():
+    with tracing.trace() as tracer:
+        for _ in range(3):
+            traced_function()
+    summary = tracer.get_summary()
+    assert summary["traced"]["count"] == 3
+    assert set(summary["traced"]) == {"count", "wall", "cpu", "net_allocated_blocks"}
+    assert "net blocks" in tracer.format_summary().splitlines()[0]
@@ -0,0 +1,142 @@
+from .specimenMachine import SMBase, FONT_COLLECTION_SECTION_IDENTIFIER
+from . import fontHelpers
+
+import traceback
+import copy
+import pathlib
+import time
+
+# ----------------------------------------
+
+class SMWatcher(SMBase):
+    """
+    keeps a director alive and draws it again whenever its settings file
+    or one of its fonts changes.
+
+    changes are debounced, then only what changed is reloaded:
+    - a template whose settings changed is rebuilt on its own
+    - a change in the fonts section or in a font file rebuilds the font collection,
+      and the templates which may have autofilled values from it
+    drawing is incremental, so unchanged templates are placed back from the page cache.
+    """
+
+    def __init__(self, director, interval=0.5, debounce=0.5, draw_options=None):
+        self.director = director
+        self.interval = interval
+        self.debounce = debounce
+        self.draw_options = dict(incremental=True)
+        self.draw_options.update(draw_options or {})
+
+        self._snapshot = self.take_snapshot()
+        self._keep_warm()
+
+    # ----------------------------------------
+    # file monitoring
+
+    @property
+    def font_directory(self):
+        return pathlib.Path(self.director.fonts.settings.font_directory)
+
+    def get_watched_paths(self):
+        paths = [self.director.settings_path]
+        try:
+            paths += fontHelpers.walk_font_dir(self.font_directory)
+        except FileNotFoundError:
+            pass
+        return paths
+
+    def take_snapshot(self):
+        snapshot = {}
+        for path in self.get_watched_paths():
+            try:
+                # the faces of a font collection follow their file
+                stat = fontHelpers.metadataCache.split_font_number(path)[0].stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def get_changed_paths(self, old, new):
+        return {p for p in set(old) | set(new) if old.get(p) != new.get(p)}
+
+    def wait_for_changes(self):
+        """
+        block until watched files changed and stayed untouched for `debounce` seconds
+        """
+        while True:
+            time.sleep(self.interval)
+            snapshot = self.take_snapshot()
+            if snapshot == self._snapshot:
+                continue
+            # debounce: editors and font exports often write several times
+            stable_since = time.monotonic()
+            while time.monotonic() - stable_since < self.debounce:
+                time.sleep(self.interval)
+                latest = self.take_snapshot()
+                if latest != snapshot:
+                    snapshot = latest
+                    stable_since = time.monotonic()
+            changed = self.get_changed_paths(self._snapshot, snapshot)
+            self._snapshot = snapshot
+            return changed
+
+    # ----------------------------------------
+    # invalidation
+
+    def apply_changes(self, changed_paths):
+        """
+        reload what changed_paths invalidate, returns the templates that were initialised again
+        """
+        settings_changed = self.director.settings_path in changed_paths
+        rebuild_fonts = any(p != self.director.settings_path for p in changed_paths)
+
+        if settings_changed:
+            previous_fonts_sections = self._get_fonts_sections(self.director.settings)
+            self.director.load_settings()
+            if self._get_fonts_sections(self.director.settings) != previous_fonts_sections:
+                rebuild_fonts = True
+
+        if rebuild_fonts:
+            print("-- reloading the font collection")
+            self.director.reload_font_collection()
+        # templates may have autofilled values from the fonts
+        reloaded = self.director.reload_templates(force=rebuild_fonts)
+        self._keep_warm()
+        return reloaded
+
+    def _get_fonts_sections(self, settings):
+        return [copy.deepcopy(s) for s in settings if s["template"] == FONT_COLLECTION_SECTION_IDENTIFIER]
+
+    def _keep_warm(self):
+        # glyph set analyses are shared by weak reference,
+        # holding them lets a rebuilt font collection pick them up again
+        self._analyses = []
+        for font in self.director.fonts.fonts:
+            if "_glyph_set_analysis" in font.__dict__:
+                self._analyses.append(font.__dict__["_glyph_set_analysis"])
+
+    # ----------------------------------------
+
+    def draw(self):
+        try:
+            return self.director.draw(**self.draw_options)
+        except Exception:
+            print(f"-- drawing failed\n{traceback.format_exc()}")
+
+    def watch(self, draw_first=True):
+        print(f"-- watching {self.director.root_dir}, press ctrl-c to stop")
+        if draw_first:
+            self.draw()
+        try:
+            while True:
+                changed_paths = self.wait_for_changes()
+                print(f"-- changed: {', '.join(p.name for p in sorted(changed_paths))}")
+                try:
+                    reloaded = self.apply_changes(changed_paths)
+                    print(f"-- {len(reloaded)} template(s) to draw again")
+                except Exception:
+                    print(f"-- reloading failed\n{traceback.format_exc()}")
+                    continue
+                self.draw()
+        except KeyboardInterrupt:
+            print("-- stopped watching")
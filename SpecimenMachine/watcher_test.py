@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from SpecimenMachine import fontHelpers, watcher, SMDirector
+
+# ----------------------------------------
+
+class Director(SMDirector):
+    defaults = [{"template": "fonts"}]
+
+class FakeTime():
+    """
+    a clock moved by sleep, which runs the scheduled actions and stops the watcher after `polls` sleeps
+    """
+
+    def __init__(self, polls, actions=None):
+        self.now = 0
+        self.sleeps = 0
+        self.polls = polls
+        self.actions = actions or {}
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.sleeps += 1
+        if self.sleeps > self.polls:
+            raise KeyboardInterrupt
+        if self.sleeps in self.actions:
+            self.actions[self.sleeps]()
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+@pytest.fixture
+def watched(family_dir, tmp_path, monkeypatch):
+    director = Director(family_dir, render_backend="recording")
+    sm_watcher = watcher.SMWatcher(director, interval=1, debounce=2)
+    draws = []
+    monkeypatch.setattr(sm_watcher, "draw", lambda: draws.append(sm_watcher.draw_options))
+    return sm_watcher, draws
+
+def test_a_font_change_draws_once(watched, monkeypatch):
+    sm_watcher, draws = watched
+    font_path = fontHelpers.walk_font_dir(sm_watcher.font_directory)[0]
+    reloaded = []
+    apply_changes = sm_watcher.apply_changes
+    monkeypatch.setattr(sm_watcher, "apply_changes", lambda changed: reloaded.append(changed) or apply_changes(changed))
+    # the font is written twice within the debounce delay, then nothing changes for a while
+    clock = FakeTime(polls=20, actions={2: lambda: touch(font_path), 3: lambda: touch(font_path)})
+    monkeypatch.setattr(watcher, "time", clock)
+    sm_watcher.watch(draw_first=False)
+    assert reloaded == [{font_path}]
+    assert draws == [{"incremental": True}]
+
+def test_a_settings_change_draws_once(watched, monkeypatch):
+    sm_watcher, draws = watched
+    clock = FakeTime(polls=20, actions={5: lambda: touch(sm_watcher.director.settings_path)})
+    monkeypatch.setattr(watcher, "time", clock)
+    sm_watcher.watch(draw_first=False)
+    assert len(draws) == 1
+
+def test_nothing_changed_nothing_drawn(watched, monkeypatch):
+    sm_watcher, draws = watched
+    monkeypatch.setattr(watcher, "time", FakeTime(polls=20))
+    sm_watcher.watch(draw_first=False)
+    assert draws == []
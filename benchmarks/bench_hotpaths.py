@@ -0,0 +1,204 @@
+"""
+hot path benchmarks on synthetic fonts (see fixtures.py),
+from 200 to 60,000 glyphs and from 1 to 300 styles.
+
+each case is timed over a few runs on fresh objects, its peak memory is measured
+with tracemalloc on one extra run. results can be saved as json and compared
+against a previous run to catch regressions.
+
+    python benchmarks/bench_hotpaths.py [--quick] [--runs 5] [--filter load]
+                                        [--output results.json]
+                                        [--compare baseline.json] [--threshold 0.2]
+
+fixtures are built once in --fixtures-dir (a temporary directory by default).
+"""
+import contextlib
+import statistics
+import tracemalloc
+import platform
+import argparse
+import datetime
+import tempfile
+import pathlib
+import json
+import time
+import gc
+import io
+import sys
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import fontTools
+from SpecimenMachine import fontHelpers, SMDirector, SMFontCollection, SMGlyphSorter
+
+import fixtures
+
+# ----------------------------------------
+
+# name: (style count, glyph count, part of --quick)
+FAMILIES = {
+    "glyphs-200": (1, 200, True),
+    "glyphs-5000": (1, 5000, True),
+    "glyphs-60000": (1, 60000, False),
+    "styles-30": (30, 500, True),
+    "styles-300": (300, 200, False),
+}
+
+RESULTS_VERSION = 1
+
+# ----------------------------------------
+# cases, a setup returning the state a run works on (not timed), and the run itself
+
+def setup_paths(directory):
+    return directory
+
+def setup_font_paths(directory):
+    return fontHelpers.walk_font_dir(directory)
+
+def setup_font(directory):
+    return fontHelpers.FontWrapper(fontHelpers.walk_font_dir(directory)[0])
+
+def setup_director(directory):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SMDirector(directory)
+
+def setup_director_fresh_pool(directory):
+    # an empty pool, so the autofill loads the fonts instead of hitting the ones the director already holds
+    director = setup_director(directory)
+    director.font_pool = fontHelpers.FontPool(workers=director.workers, lazy=director.lazy_fonts, metadata_cache=director.metadata_cache)
+    return director
+
+def run_categorise(font):
+    return SMGlyphSorter().categorise_glyph_for_font(font)
+
+def run_director(directory):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SMDirector(directory)
+
+CASES = {
+    "walk_font_dir": (setup_paths, fontHelpers.walk_font_dir),
+    "load_fonts_from_paths": (setup_font_paths, lambda paths: fontHelpers.load_fonts_from_paths(paths, sort=True)),
+    "get_cat_glyphs": (setup_font, lambda font: font.get_cat_glyphs()),
+    "categorise_glyph_for_font": (setup_font, run_categorise),
+    "feature_tags": (setup_font, lambda font: font.feature_tags),
+    "SMSettings autofill": (setup_director_fresh_pool, lambda director: SMFontCollection(director, {})),
+    "SMDirector": (setup_paths, run_director),
+}
+
+# ----------------------------------------
+
+def time_case(setup, run, directory, runs):
+    timings = []
+    for _ in range(runs):
+        state = setup(directory)
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+        del state
+
+    state = setup(directory)
+    gc.collect()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del state
+
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "runs": runs,
+        "peak_memory": peak,
+        }
+
+def run_benchmarks(fixtures_dir, runs, quick=False, filter_=None):
+    results = {}
+    for family_name, (style_count, glyph_count, in_quick) in FAMILIES.items():
+        if quick and not in_quick:
+            continue
+        selected = {name: case for name, case in CASES.items() if filter_ is None or filter_ in f"{name}/{family_name}"}
+        if not selected:
+            continue
+        print(f"-- building {family_name}", file=sys.stderr)
+        directory = fixtures.build_family(fixtures_dir / family_name, style_count=style_count, glyph_count=glyph_count)
+        for case_name, (setup, run) in selected.items():
+            name = f"{case_name}/{family_name}"
+            print(f"-- {name}", file=sys.stderr)
+            results[name] = time_case(setup, run, directory, runs)
+    return results
+
+# ----------------------------------------
+# reporting
+
+def format_size(size):
+    return f"{size / (1024 * 1024):.1f}"
+
+def print_results(results):
+    width = max([len(name) for name in results] + [4])
+    print(f"{'case'.ljust(width)}  median (ms)  min (ms)  peak (MiB)")
+    for name, result in results.items():
+        print(f"{name.ljust(width)}  {result['median']*1000:11.1f}  {result['min']*1000:8.1f}  {format_size(result['peak_memory']):>10}")
+
+def compare_results(results, baseline, threshold):
+    """
+    print the changes against a baseline, returns the names of the cases
+    that got slower (median) or bigger (peak memory) by more than threshold
+    """
+    regressions = []
+    width = max([len(name) for name in results] + [4])
+    print(f"\n{'case'.ljust(width)}  time    memory")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        time_ratio = result["median"] / previous["median"] if previous["median"] else 1
+        memory_ratio = result["peak_memory"] / previous["peak_memory"] if previous["peak_memory"] else 1
+        flag = ""
+        if time_ratio > 1 + threshold or memory_ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  <- regression"
+        print(f"{name.ljust(width)}  {time_ratio:5.2f}x  {memory_ratio:5.2f}x{flag}")
+    return regressions
+
+def get_metadata(quick):
+    return {
+        "version": RESULTS_VERSION,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fontTools": fontTools.version,
+        "quick": quick,
+        }
+
+# ----------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="skip the 60,000 glyphs and 300 styles fixtures")
+    parser.add_argument("--filter", default=None, help="only run the cases whose 'case/fixture' name contains this")
+    parser.add_argument("--fixtures-dir", type=pathlib.Path, default=pathlib.Path(tempfile.gettempdir()) / "SpecimenMachine-benchmark-fixtures")
+    parser.add_argument("--output", type=pathlib.Path, default=None, help="save the results as json")
+    parser.add_argument("--compare", type=pathlib.Path, default=None, help="a json file saved with --output")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.fixtures_dir, args.runs, quick=args.quick, filter_=args.filter)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"metadata": get_metadata(args.quick), "results": results}, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+startup benchmark: time spent importing SpecimenMachine in a fresh interpreter,
+with the fontspecs tables loaded lazily from their cache,
+compared to loading everything eagerly as the package used to.
+
+    python benchmarks/bench_startup.py [--runs 10]
+"""
+import subprocess
+import statistics
+import argparse
+import tempfile
+import pathlib
+import shutil
+import time
+import sys
+import os
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# the specs the package loaded at import before they were cached
+EAGER_SPEC_NAMES = ["name_specs", "os2_width_specs", "os2_weight_specs", "os2_fsSelection_specs", "os2_panose_specs", "head_macstyle_specs", "feature_descriptions"]
+
+SCENARIOS = {
+    "import": "import SpecimenMachine",
+    "import + specs": (
+        "import SpecimenMachine.fontHelpers.fontHelpers as fh\n"
+        "[fh.get_spec(name) for name in fh.SPEC_PATHS]"
+        ),
+    # the yaml specs parsed at import, with the pure python loader, the unicode blocks were not loaded
+    "eager (previous behaviour)": (
+        "import SpecimenMachine.fontHelpers.fontHelpers as fh\n"
+        "import yaml\n"
+        f"[yaml.safe_load(open(fh.pathlib.Path(fh.__file__).parent / fh.SPEC_PATHS[name])) for name in {EAGER_SPEC_NAMES!r}]\n"
+        "import hyperglot.checker"
+        ),
+}
+
+# ----------------------------------------
+
+def time_snippet(snippet, cache_dir):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(REPO_ROOT), env.get("PYTHONPATH", "")])
+    env["SPECIMENMACHINE_CACHE_DIR"] = str(cache_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", snippet], env=env, check=True)
+    return time.perf_counter() - start
+
+def run(runs):
+    results = {}
+    baseline = time_snippet("pass", tempfile.gettempdir())
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_dir = pathlib.Path(temp_dir) / "cache"
+        for name, snippet in SCENARIOS.items():
+            timings = [time_snippet(snippet, cache_dir) - baseline for _ in range(runs)]
+            results[name] = timings
+
+        # cold cache: the yaml files are parsed and the cache is written
+        cold = []
+        for _ in range(runs):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(time_snippet(SCENARIOS["import + specs"], cache_dir) - baseline)
+        results["import + specs (cold cache)"] = cold
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    width = max(len(name) for name in results)
+    print(f"{'scenario'.ljust(width)}  median (ms)  min (ms)")
+    for name, timings in results.items():
+        print(f"{name.ljust(width)}  {statistics.median(timings)*1000:11.1f}  {min(timings)*1000:8.1f}")
+
+if __name__ == "__main__":
+    main()
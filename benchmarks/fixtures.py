@@ -0,0 +1,154 @@
+"""
+synthetic font fixtures for the benchmarks, built with fontTools' FontBuilder.
+
+glyph sets mix encoded glyphs taken from several unicode blocks
+with unencoded alternates (.sc, .case, .tnum, .onum.pnum...),
+and carry a small GSUB/GPOS so feature lookups have something to read.
+families are built once and kept in the fixtures directory.
+"""
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+import unicodedata
+import itertools
+import pathlib
+import shutil
+
+# ----------------------------------------
+
+FIXTURES_VERSION = 1
+
+SUFFIXES = [".sc", ".case", ".tnum", ".onum.pnum", ".alt", ".ss01"]
+# share of the glyph set left unencoded, as alternates
+ALTERNATE_RATIO = 0.2
+
+WEIGHTS = [100, 200, 300, 400, 500, 600, 700, 800, 900]
+WIDTHS = [3, 4, 5, 6, 7]
+
+FEATURES = """
+languagesystem DFLT dflt;
+languagesystem latn dflt;
+languagesystem latn TRK;
+feature smcp { sub A by A.sc; } smcp;
+feature case { sub hyphen by hyphen.case; } case;
+feature tnum { sub zero by zero.tnum; } tnum;
+feature liga { sub f i by f_i; } liga;
+feature kern { pos A V -50; } kern;
+"""
+
+FIXED_GLYPHS = {"A": 0x41, "V": 0x56, "f": 0x66, "i": 0x69, "zero": 0x30, "hyphen": 0x2D}
+FIXED_ALTERNATES = ["A.sc", "hyphen.case", "zero.tnum", "f_i"]
+
+# ----------------------------------------
+
+def iter_assigned_codepoints(start=0x21):
+    for codepoint in range(start, 0x110000):
+        if 0xD800 <= codepoint <= 0xDFFF:
+            continue
+        if unicodedata.category(chr(codepoint)) in ("Cn", "Co", "Cs", "Cc"):
+            continue
+        yield codepoint
+
+def get_glyph_set(glyph_count):
+    """
+    glyph order and cmap of a synthetic font with glyph_count glyphs
+    """
+    glyph_order = [".notdef", "space"] + list(FIXED_GLYPHS) + FIXED_ALTERNATES
+    cmap = {0x20: "space"}
+    cmap.update({codepoint: name for name, codepoint in FIXED_GLYPHS.items()})
+
+    remaining = max(glyph_count - len(glyph_order), 0)
+    alternate_count = int(remaining * ALTERNATE_RATIO)
+    encoded_count = remaining - alternate_count
+
+    encoded = []
+    codepoints = (c for c in iter_assigned_codepoints() if c not in cmap)
+    for codepoint in itertools.islice(codepoints, encoded_count):
+        name = f"uni{codepoint:04X}" if codepoint <= 0xFFFF else f"u{codepoint:05X}"
+        cmap[codepoint] = name
+        encoded.append(name)
+    glyph_order += encoded
+
+    for i in range(alternate_count):
+        base = encoded[i % len(encoded)] if encoded else "A"
+        suffix = SUFFIXES[i % len(SUFFIXES)]
+        repeat = i // (len(encoded) * len(SUFFIXES)) if encoded else i
+        glyph_order.append(f"{base}{suffix}" + (f".{repeat}" if repeat else ""))
+    return glyph_order, cmap
+
+def get_style_name(weight, width, italic, index=0):
+    name = f"W{weight} Wd{width}"
+    if italic:
+        name += " Italic"
+    if index:
+        name += f" {index}"
+    return name
+
+def build_font(path, glyph_count=200, family="Bench", style="Regular", weight=400, width=5, italic=False):
+    glyph_order, cmap = get_glyph_set(glyph_count)
+
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(glyph_order)
+    fb.setupCharacterMap(cmap)
+
+    pen = TTGlyphPen(None)
+    pen.moveTo((50, 0))
+    pen.lineTo((50, 700))
+    pen.lineTo((550, 700))
+    pen.lineTo((550, 0))
+    pen.closePath()
+    box = pen.glyph()
+    empty = TTGlyphPen(None).glyph()
+    # outlines only matter for the glyphs shown first, the rest stay empty to keep big fixtures small
+    fb.setupGlyf({name: box if i < 500 else empty for i, name in enumerate(glyph_order)})
+    fb.setupHorizontalMetrics({name: (600, 50) for name in glyph_order})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({
+        "familyName": family,
+        "styleName": style,
+        "typographicFamily": family,
+        "typographicSubfamily": style,
+        "designer": "SpecimenMachine benchmarks",
+        "copyright": "no copyright",
+        "version": "Version 1.000",
+        })
+    fb.setupOS2(usWeightClass=weight, usWidthClass=width, fsSelection=0x01 if italic else 0x40)
+    fb.setupPost()
+    fb.addOpenTypeFeatures(FEATURES)
+    fb.save(str(path))
+    return path
+
+# ----------------------------------------
+
+def get_family_styles(style_count):
+    """
+    [(style name, weight, width, italic)] for style_count styles
+    """
+    combinations = itertools.product([False, True], WIDTHS, WEIGHTS)
+    styles = []
+    for i, (italic, width, weight) in enumerate(itertools.cycle(combinations)):
+        if i == style_count:
+            break
+        repeat = i // (2 * len(WIDTHS) * len(WEIGHTS))
+        styles.append((get_style_name(weight, width, italic, repeat), weight, width, italic))
+    return styles
+
+def build_family(directory, style_count=1, glyph_count=200, family="Bench"):
+    """
+    a directory of style_count fonts, with a settings file for SMDirector.
+    the family is only built when the directory does not hold it already.
+    """
+    directory = pathlib.Path(directory)
+    done_marker = directory / ".complete"
+    if done_marker.exists() and done_marker.read_text() == str(FIXTURES_VERSION):
+        return directory
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+
+    for style, weight, width, italic in get_family_styles(style_count):
+        file_name = f"{family}-{style.replace(' ', '')}.ttf"
+        build_font(directory / file_name, glyph_count=glyph_count, family=family, style=style, weight=weight, width=width, italic=italic)
+
+    (directory / "settings.yaml").write_text("- template: fonts\n")
+    done_marker.write_text(str(FIXTURES_VERSION))
+    return directory